@@ -0,0 +1,29 @@
+"""meals keyset index
+
+Revision ID: 3b8e6f0d2c71
+Revises: 5e9d3b7c1a24
+Create Date: 2026-10-18 06:04:27.310584
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e6f0d2c71'
+down_revision: Union[str, None] = '5e9d3b7c1a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # build the index w/o locking the meals against writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_meals_updated_id', 'meals', ['updated_at', 'id'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_meals_updated_id', table_name='meals', postgresql_concurrently=True, if_exists=True)
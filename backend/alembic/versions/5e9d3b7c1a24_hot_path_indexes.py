@@ -0,0 +1,59 @@
+"""hot path indexes
+
+Revision ID: 5e9d3b7c1a24
+Revises: 8c1f4e2a9b37
+Create Date: 2026-10-18 05:32:09.571942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9d3b7c1a24'
+down_revision: Union[str, None] = '8c1f4e2a9b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial index predicate)
+indexes = [
+    ('ix_doctors_hospital_id', 'doctors', ['hospital_id'], None),
+    ('ix_appointments_doctor_status_date', 'appointments', ['doctor_id', 'status', 'appointment_date'], None),
+    ('ix_appointments_doctor_requested', 'appointments', ['doctor_id', sa.text('appointment_date DESC')], "status = 'requested'"),
+    ('ix_appointments_doctor_patient_date', 'appointments', ['doctor_id', 'patient_id', 'appointment_date'], None),
+    ('ix_appointments_patient_status', 'appointments', ['patient_id', 'status'], None),
+    ('ix_health_records_patient_id', 'health_records', ['patient_id'], None),
+    ('ix_medications_patient_updated', 'medications', ['patient_id', sa.text('updated_at DESC')], None),
+    ('ix_medications_patient_active', 'medications', ['patient_id', sa.text('updated_at DESC')], 'medications IS NOT NULL OR exercises IS NOT NULL'),
+    ('ix_medications_appointment_id', 'medications', ['appointment_id'], None),
+    ('ix_messages_sender_type_created', 'messages', ['sender_id', 'type', sa.text('created_at DESC')], None),
+    ('ix_messages_direct', 'messages', ['sender_id', 'receiver_id', sa.text('created_at DESC')], "type = 'direct'"),
+]
+
+
+def upgrade() -> None:
+    # build the indexes w/o locking the tables against writes
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in indexes:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(indexes):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,29 @@
+"""messages direct receiver index
+
+Revision ID: a4c7d2e9f150
+Revises: 3b8e6f0d2c71
+Create Date: 2026-10-18 06:41:15.832907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c7d2e9f150'
+down_revision: Union[str, None] = '3b8e6f0d2c71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # build the index w/o locking the messages against writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_messages_direct_receiver', 'messages', ['receiver_id', sa.text('created_at DESC')], postgresql_where=sa.text("type = 'direct'"), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_messages_direct_receiver', table_name='messages', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,391 @@
+import json
+import math
+import time
+import random
+import asyncio
+import inspect
+import functools
+from uuid import uuid4
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable
+
+from redis.asyncio import Redis, BlockingConnectionPool
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import unit_of_work
+
+
+class Cache:
+    """
+    Asynchronous caching facade shared by every service.
+    -----------------------------------------------------
+
+    Wraps a `redis.asyncio` client bound to a single connection pool, so requests
+    borrow a pooled connection instead of opening a new one. Values are stored as
+    json documents and decoded on the way out.
+
+    Keys can be registered under tags (e.g, `doctor:{id}`, `patient:{id}`) when they
+    are stored. Invalidating a tag deletes exactly its member keys in a single round
+    trip, so writes never have to scan the keyspace with `KEYS`.
+
+    Read-through lookups (`fetch`) are protected against cache stampedes: only one
+    coroutine per process and one worker across processes recomputes a missing key,
+    and hot keys are recomputed probabilistically shortly before they expire.
+
+    Rarely changing reference data can additionally be kept in a bounded in-process
+    LRU (L1) in front of redis (L2). Every invalidation is published over redis
+    pub/sub so the L1 of every worker drops the affected entries.
+    """
+
+    def __init__(self, pool: BlockingConnectionPool, local_size: int = 1024):
+        self.pool = pool
+        self.client = Redis(connection_pool=pool)
+        self.local = LocalCache(local_size)
+        self.hits = {"l1": 0, "l2": 0}
+        self.misses = {"l1": 0, "l2": 0}
+        self._invalidate_tags = self.client.register_script(INVALIDATE_TAGS_SCRIPT)
+        self._release_lock = self.client.register_script(RELEASE_LOCK_SCRIPT)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._listener: asyncio.Task | None = None
+        self._origin = uuid4().hex  # Identifies the messages published by this worker
+
+    # Retrieve a json decoded value, returns None if the key does not exist
+    async def get(self, key: str):
+        if (cached := await self.client.get(key)) is not None:
+            self.hits["l2"] += 1
+            return json.loads(cached)
+        self.misses["l2"] += 1
+
+    # Store a json serializable value with an optional expiry (in seconds)
+    async def set(
+        self,
+        key: str,
+        value,
+        expire: int | None = 3600,
+        tags: Iterable[str] = (),
+    ):
+        if not tags:
+            await self.client.set(key, json.dumps(value), expire)
+            return
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(key, json.dumps(value), expire)
+            for tag in tags:
+                pipe.sadd(tag_key(tag), key)
+                # The tag set lives as long as its longest lived member: the ttl is
+                # set on a new tag set n otherwise only extended (redis 7)
+                if expire:
+                    pipe.expire(tag_key(tag), expire, nx=True)
+                    pipe.expire(tag_key(tag), expire, gt=True)
+            await pipe.execute()
+
+    # Delete one or more keys
+    async def delete(self, *keys: str):
+        if keys:
+            await self.invalidate(keys=keys)
+
+    # Delete every key registered under the tags (and any extra keys) at once
+    async def invalidate(self, *tags: str, keys: Iterable[str] = ()):
+        keys = list(keys)
+        self.local.discard(keys, tags)
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            if tags:
+                await self._invalidate_tags(
+                    keys=[tag_key(tag) for tag in tags], client=pipe
+                )
+            if keys:
+                pipe.delete(*keys)
+            # Let the other workers drop the same entries from their L1
+            message = {"origin": self._origin, "tags": list(tags), "keys": keys}
+            pipe.publish(INVALIDATION_CHANNEL, json.dumps(message))
+            await pipe.execute()
+
+    # Retrieve a value through the cache, computing it with the loader on a miss.
+    # The loader receives a session of its own: the recomputation is shared by the
+    # concurrent callers n must not use the session of a request that may go away
+    async def fetch(
+        self,
+        key: str,
+        loader: Callable[[AsyncSession], Awaitable[Any]],
+        expire: int = 3600,
+        tags: Iterable[str] = (),
+        local_ttl: int | None = None,
+    ):
+        # Reference data is served from the in-process L1 when possible
+        if local_ttl:
+            if (value := self.local.get(key, MISSING)) is not MISSING:
+                self.hits["l1"] += 1
+                return value
+            self.misses["l1"] += 1
+
+        value = await self._fetch_remote(key, loader, expire, tags)
+
+        if local_ttl:
+            self.local.set(key, value, local_ttl, tags)
+
+        return value
+
+    # Retrieve a value through redis, recomputing it at most once at a time
+    async def _fetch_remote(self, key, loader, expire, tags):
+        entry = await self._read_entry(key)
+        if entry and not should_refresh_early(entry):
+            self.hits["l2"] += 1
+            return entry["value"]
+        self.misses["l2"] += 1
+
+        # Single-flight: concurrent callers of this process share one recomputation
+        if key not in self._inflight:
+            task = asyncio.ensure_future(
+                self._recompute(key, loader, expire, tags, entry)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(self._inflight[key])
+
+    # Recompute a value while holding the cross-worker lock of the key
+    async def _recompute(self, key, loader, expire, tags, entry):
+        lock_key, token = f"locks:{key}", uuid4().hex
+
+        if await self.client.set(lock_key, token, nx=True, px=LOCK_TIMEOUT_MS):
+            try:
+                start = time.monotonic()
+                value = await self._load(key, loader)
+                delta = time.monotonic() - start
+                await self.set(
+                    key,
+                    {"value": value, "delta": delta, "expiry": time.time() + expire},
+                    expire,
+                    tags,
+                )
+                return value
+            finally:
+                await self._release_lock(keys=[lock_key], args=[token])
+
+        # Another worker is refreshing the key, keep serving the current value
+        if entry:
+            return entry["value"]
+
+        # Otherwise wait for the other worker to store the value
+        deadline = time.monotonic() + LOCK_TIMEOUT_MS / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            if entry := await self._read_entry(key):
+                return entry["value"]
+
+        # The lock holder is gone or too slow, compute the value ourselves
+        return await self._load(key, loader)
+
+    # Run a loader in a short lived session of its own
+    async def _load(self, key, loader):
+        async with unit_of_work(f"cache {key}") as db:
+            return await loader(db)
+
+    # Read an entry stored by `fetch` (value along with its recomputation metadata)
+    async def _read_entry(self, key: str) -> dict | None:
+        if (cached := await self.client.get(key)) is None:
+            return None
+        entry = json.loads(cached)
+        return entry if isinstance(entry, dict) and "expiry" in entry else None
+
+    # Hit/miss counters of both tiers
+    def stats(self) -> dict:
+        return {
+            tier: {
+                "hits": self.hits[tier],
+                "misses": self.misses[tier],
+                "hit_ratio": round(
+                    self.hits[tier] / max(1, self.hits[tier] + self.misses[tier]), 4
+                ),
+            }
+            for tier in ("l1", "l2")
+        } | {"l1_size": len(self.local)}
+
+    # Start listening for invalidations published by the other workers
+    def listen(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self.client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        data = json.loads(message["data"])
+                        if data["origin"] != self._origin:
+                            self.local.discard(data["keys"], data["tags"])
+            except RedisError:
+                # Invalidations may have been missed while disconnected
+                self.local.clear()
+                await asyncio.sleep(1)
+
+    # Stop the listener and release every pooled connection
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self.client.aclose()
+        await self.pool.aclose()
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per entry expiry.
+    ---------------------------------------------------
+
+    Entries remember their tags so tag invalidations published by any worker can
+    evict them. The least recently used entry is evicted once `maxsize` is reached.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, Any, frozenset]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Retrieve a value that has not expired yet, returns default otherwise
+    def get(self, key: str, default=None):
+        if (entry := self._entries.get(key)) is None:
+            return default
+
+        expiry, value, _ = entry
+        if expiry <= time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    # Store a value for ttl seconds, evicting the least recently used entry if full
+    def set(self, key: str, value, ttl: int, tags: Iterable[str] = ()):
+        self._entries[key] = (time.monotonic() + ttl, value, frozenset(tags))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    # Drop the given keys and every entry registered under one of the tags
+    def discard(self, keys: Iterable[str] = (), tags: Iterable[str] = ()):
+        for key in keys:
+            self._entries.pop(key, None)
+
+        if tags := set(tags):
+            for key in [k for k, (_, _, t) in self._entries.items() if t & tags]:
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+MISSING = object()  # Sentinel of a local cache miss (None is a valid value)
+
+
+# Redis key of the set holding the members of a tag
+def tag_key(tag: str) -> str:
+    return f"tags:{tag}"
+
+
+# Probabilistic early expiration (XFetch): the longer a value takes to compute and
+# the closer it gets to its expiry, the likelier a request recomputes it in advance
+def should_refresh_early(entry: dict, beta: float = 1.0) -> bool:
+    jitter = -entry["delta"] * beta * math.log(1 - random.random())
+    return time.time() + jitter >= entry["expiry"]
+
+
+# Read-through caching decorator for service functions receiving a `redis` argument
+def read_through(
+    key: str | Callable[[dict], str | None],
+    expire: int = 3600,
+    tags: Iterable[str] | Callable[[dict], Iterable[str]] = (),
+    local_ttl: int | None = None,
+):
+    """
+    Cache the result of an async service function.
+    ----------------------------------------------
+
+    Parameters:
+    -----------
+    - key (str | Callable): A key template formatted with the call arguments, or a
+      callable receiving the call arguments. Returning None skips the cache.
+    - expire (int): The expiry of the cached value in seconds | default=3600
+    - tags (Iterable | Callable): The tags of the cached value, or a callable
+      receiving the call arguments and returning them.
+    - local_ttl (int | None): Also keep the value in the in-process L1 cache for
+      this many seconds (reference data only) | default=None
+
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+
+            redis_key = key(arguments) if callable(key) else key.format(**arguments)
+            if redis_key is None:
+                return await func(*args, **kwargs)
+
+            # the shared recomputation runs w a session of its own (as `db`)
+            async def load(session):
+                loader_bound = signature.bind(*args, **kwargs)
+                loader_bound.arguments["db"] = session
+                return await func(*loader_bound.args, **loader_bound.kwargs)
+
+            return await arguments["redis"].fetch(
+                redis_key,
+                load,
+                expire,
+                tags(arguments) if callable(tags) else tags,
+                local_ttl,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+# Delete the members of every tag set (KEYS) along with the tag sets themselves
+INVALIDATE_TAGS_SCRIPT = """
+local deleted = 0
+for _, tag in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag)
+    for i = 1, #members, 500 do
+        local last = math.min(i + 499, #members)
+        deleted = deleted + redis.call('DEL', unpack(members, i, last))
+    end
+    redis.call('DEL', tag)
+end
+return deleted
+"""
+
+
+# Delete the lock only if it is still owned by the releasing worker
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+INVALIDATION_CHANNEL = "cache:invalidations"  # Pub/sub channel of L1 invalidations
+LOCK_TIMEOUT_MS = 10_000  # Upper bound of a recomputation holding the lock
+LOCK_POLL_INTERVAL = 0.05  # Seconds between reads while waiting for another worker
+
+
+# Blocking pool waits for a free connection (up to the timeout) instead of failing
+redis_pool = BlockingConnectionPool(
+    host=settings.redis_host,
+    port=settings.redis_port,
+    max_connections=settings.redis_max_connections,
+    timeout=settings.redis_pool_timeout,
+)
+
+redis_cache = Cache(redis_pool, settings.local_cache_size)
@@ -8,11 +8,22 @@ class Settings(BaseSettings):
     postgres_host: str
     postgres_port: str
     postgres_database_name: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800  # seconds before a connection is replaced
+    db_statement_cache_size: int = 100  # set 0 behind pgbouncer (transaction mode)
+    db_hold_warning: float = 60  # seconds a checked out connection is reported after
     pgadmin_default_email: str
     pgadmin_default_pass: str
     redis_password: str
     redis_host: str
     redis_port: int
+    redis_max_connections: int = 50
+    redis_pool_timeout: int = 5
+    local_cache_size: int = 10_000
+    auth_cache_size: int = 10_000
     flower_basic_auth: str
     jwt_secret_key: str
     jwt_algorithm: str
@@ -24,6 +35,22 @@ class Settings(BaseSettings):
     google_redirect_uri: str
     celery_broker_url: str
     celery_result_backend: str
+    analytics_reconcile_days: int = 35  # window rebuilt by the nightly beat task
+    readings_max_batch: int = 100_000  # health readings accepted per upload
+    readings_max_bytes: int = 16 * 1024 * 1024  # body size of a readings upload
+    readings_max_line_bytes: int = 4096  # size of a single reading (ndjson line)
+    readings_retention_days: int = 90  # days the raw health readings are kept
+    readings_rollup_retention_days: int = 365  # days the 5 minute rollups are kept
+    readings_chart_points: int = 2500  # most points of a health readings chart
+    pagination_exact_count_below: int = 1000  # planner estimates below are counted
+    socket_broker: str = "redis"  # "local" when a single worker serves every socket
+    socket_send_timeout: float = 5.0  # seconds before a stalled socket is dropped
+    socket_queue_size: int = 100  # messages queued per connection
+    socket_overflow_policy: str = "disconnect"  # or "drop_oldest" when full
+    presence_heartbeat: float = 30  # seconds between refreshes of the online users
+    chat_write_batch_size: int = 500  # chat messages stored per insert
+    chat_write_interval: float = 0.05  # seconds a batch of chat messages fills up
+    chat_write_queue_size: int = 10_000  # chat messages waiting to be stored
     owner_email: str
     smtp_password: str
     smtp_port: int
@@ -1,30 +1,29 @@
-import redis
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, SecurityScopes
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from app.core.security import verify_token
+from app.core.security import (
+    verify_claims,
+    request_claims,
+    load_principal,
+    principal_from_snapshot,
+)
 from app.core.utils import ResponseHandler
 from app.db import get_async_db as db
-from sqlalchemy.orm import defer
-from app.core.config import settings
-from app.models import Patient, Doctor
+from app.core.cache import Cache, redis_cache
 
 
 http_bearer = HTTPBearer()
 
 
-def cache():
-    return redis.Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
-    )
+def cache() -> Cache:
+    return redis_cache
 
 
 async def include_auth(
+    request: Request,
     security_scopes: SecurityScopes,
-    db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
 ):
     """
@@ -33,35 +32,18 @@ async def include_auth(
     if credentials.scheme != "Bearer":
         raise ResponseHandler.invalid_token()
 
-    user = await verify_token(credentials.credentials, db, security_scopes.scopes)
-
-    if user.role == "user":
-        query = (
-            select(Patient)
-            .where(Patient.id == user.id)
-            .options(
-                defer(Patient.password),  # exclude password
-                defer(Patient.created_at),  # exclude created_at
-                defer(Patient.created_by),  # exclude created_by
-                defer(Patient.updated_at),  # exclude updated_at
-            )
-        )
-        result = await db.execute(query)
-        user = result.scalar_one_or_none()
-
-    if user.role == "doctor":
-        query = select(Doctor).where(Doctor.id == user.id)
-        result = await db.execute(query)
-        user = result.scalar_one_or_none()
-
-    if not user:
-        raise ResponseHandler.invalid_token()
+    # the token has usually been decoded by the rate limiter already
+    claims = request_claims(request, credentials.credentials)
+    user_id = verify_claims(claims, security_scopes.scopes)
+
+    # the user is loaded by a single query, only when it is not cached yet
+    snapshot = await load_principal(user_id, redis)
 
-    return user
+    return principal_from_snapshot(snapshot)
 
 
 # def include_admin(
-#     db: Session = Depends(get_db),
+#     db: AsyncSession = Depends(db),
 #     credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
 # ):
 #     if credentials.scheme != "Bearer":
@@ -0,0 +1,211 @@
+import json
+import base64
+from uuid import UUID
+from decimal import Decimal
+from datetime import date, datetime
+from typing import Iterable, Literal
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, func, or_, select, tuple_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ClauseElement, UnaryExpression
+from sqlalchemy.sql.expression import Executable
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import Cache
+from app.core.config import settings
+from app.core.security import base64_to_uuid, uuid_to_base64
+
+
+# How the total of a listing is computed
+# - exact: COUNT of the filtered rows on every request
+# - estimated: the row estimate of the query planner, exact for small results
+# - cached: the exact COUNT kept in redis (estimated when the listing is not cacheable)
+# - none: no total at all
+Total = Literal["exact", "estimated", "cached", "none"]
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    order_by: list,
+    limit: int,
+    page: int = 1,
+    cursor: str | None = None,
+):
+    """
+    Retrieve a page of a listing, either by page number or by cursor.
+    ------------------------------------------------------------------
+
+    The rows are ordered by the `order_by` clauses, whose last clause must be a
+    unique column (the primary key) so every row has a distinct position. Their
+    values are selected along with the rows and the position of the last row is
+    returned as an opaque cursor.
+
+    Given a cursor, the page starts right after that position (keyset/seek
+    pagination), so every page costs the same index range scan no matter how deep
+    it is and rows inserted meanwhile never shift or repeat entries across pages.
+    Without a cursor the page number is applied as an `OFFSET`, kept for the
+    clients jumping to arbitrary pages.
+
+    Parameters:
+    -----------
+    - db (AsyncSession): The asynchronous database session used for the query.
+    - query (Select): The filtered query of the rows to paginate.
+    - order_by (list): The ordering columns or expressions (`.asc()`/`.desc()`),
+      none of them nullable, the last one unique.
+    - limit (int): The maximum amount of rows of the page.
+    - page (int): The page number, ignored when a cursor is provided | default=1
+    - cursor (str | None): The `next_cursor` of the previous page | default=None
+
+    Returns:
+    --------
+    - The rows of the page and the cursor of the next page (None on the last page).
+
+    """
+
+    keys = [ordering_key(clause) for clause in order_by]
+    expressions = [expression for expression, _ in keys]
+
+    if cursor:
+        query = query.where(seek(keys, decode_cursor(cursor, len(keys))))
+    elif page > 1:
+        query = query.offset((page - 1) * limit)
+
+    # select the ordering values along w the rows and a single extra row to know
+    # whether another page follows
+    query = (
+        query.add_columns(*expressions)
+        .order_by(*[e.desc() if desc else e.asc() for e, desc in keys])
+        .limit(limit + 1)
+    )
+    result = (await db.execute(query)).all()
+
+    rows = [row[0] for row in result[:limit]]
+    if len(result) <= limit:
+        return rows, None
+
+    return rows, encode_cursor(result[limit - 1][1:])
+
+
+# Total amount of rows of a listing (None when not asked for)
+async def count_total(
+    db: AsyncSession,
+    query: Select,
+    mode: Total,
+    redis: Cache | None = None,
+    key: str | None = None,
+    expire: int = 3600,
+    tags: Iterable[str] = (),
+) -> int | None:
+    query = query.order_by(None).limit(None).offset(None)
+
+    if mode == "none":
+        return None
+    if mode == "cached" and key is not None:
+        return await redis.fetch(
+            key, lambda session: exact_count(session, query), expire, tags
+        )
+    if mode == "exact":
+        return await exact_count(db, query)
+
+    # the planner only estimates, small results are cheap enough to count exactly
+    estimate = await estimated_count(db, query)
+    if estimate < settings.pagination_exact_count_below:
+        return await exact_count(db, query)
+    return estimate
+
+
+# Exact amount of rows of a query
+async def exact_count(db: AsyncSession, query: Select) -> int:
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
+
+
+# Amount of rows the query planner expects a query to return (w/o running it)
+async def estimated_count(db: AsyncSession, query: Select) -> int:
+    plan = await db.scalar(Explain(query))
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a statement, w its parameters bound as usual"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def compile_explain(element: Explain, compiler, **kw):
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+# Expression and direction (descending or not) of an ordering clause
+def ordering_key(clause) -> tuple:
+    if isinstance(clause, UnaryExpression) and clause.modifier in (
+        operators.asc_op,
+        operators.desc_op,
+    ):
+        return clause.element, clause.modifier is operators.desc_op
+    return clause, False
+
+
+# Condition selecting the rows positioned after the values of the keys
+def seek(keys: list, values: list):
+    # a row value comparison can walk a single index when the directions agree
+    if len({desc for _, desc in keys}) == 1:
+        row = tuple_(*[expression for expression, _ in keys])
+        return row < tuple_(*values) if keys[0][1] else row > tuple_(*values)
+
+    # otherwise: after on the first key, or equal on it and after on the next ...
+    clauses = []
+    for i, ((expression, desc), value) in enumerate(zip(keys, values)):
+        equal = [e == v for (e, _), v in zip(keys[:i], values[:i])]
+        clauses.append(and_(*equal, expression < value if desc else expression > value))
+    return or_(*clauses)
+
+
+# Encode the ordering values of a row as an opaque url safe cursor
+def encode_cursor(values: Iterable) -> str:
+    payload = json.dumps([dump_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode("ascii")
+
+
+# Decode a cursor generated by `encode_cursor` back into the ordering values
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("cursor of another listing")
+        return [load_value(value) for value in values]
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid pagination cursor!")
+
+
+# Json representation of an ordering value, tagged when json has no such type
+def dump_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"u": uuid_to_base64(value)}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+
+def load_value(value):
+    if not isinstance(value, dict):
+        return value
+    (tag, raw), *_ = value.items()
+    return {
+        "dt": datetime.fromisoformat,
+        "d": date.fromisoformat,
+        "u": base64_to_uuid,
+        "n": Decimal,
+    }[tag](raw)
@@ -0,0 +1,178 @@
+import time
+import asyncio
+from uuid import uuid4
+from collections import Counter
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.cache import redis_cache
+
+
+class Presence:
+    """
+    Online status of the users, shared by every worker.
+    ---------------------------------------------------
+
+    Every worker counts the connections of each user it serves (a user w several
+    tabs or sockets has several), and only its first and last connection of a user
+    reach redis. There every user has a hash w a field per worker serving them,
+    holding the time (ms) the worker's claim expires at. A user is online while any
+    field has not expired.
+
+    The workers refresh the claims of their users on every heartbeat, so the users
+    of a crashed worker go offline by themselves once its claims expire (their hash
+    altogether once no worker refreshes it anymore). Expired claims are pruned
+    whenever the user connects again.
+
+    Connecting returns whether the user just came online (was offline on every
+    worker) and disconnecting whether they just went offline, so the presence
+    changes can be pushed to the admins.
+    """
+
+    def __init__(self, client: Redis, heartbeat: float = 30):
+        self.client = client
+        self.heartbeat = heartbeat
+        self.ttl = int(heartbeat * 3 * 1000)  # Claims outlive two missed heartbeats
+        self.local: Counter[str] = Counter()  # Connections of the users on this worker
+        self._connect = client.register_script(CONNECT_SCRIPT)
+        self._disconnect = client.register_script(DISCONNECT_SCRIPT)
+        self._heartbeat: asyncio.Task | None = None
+        self._node = uuid4().hex  # Identifies the claims of this worker
+
+    # Count a connection of a user, returns whether they just came online
+    async def connect(self, user_id: str) -> bool:
+        self.local[user_id] += 1
+        if self.local[user_id] > 1:
+            return False
+
+        now = now_ms()
+        try:
+            return bool(
+                await self._connect(
+                    keys=[presence_key(user_id)],
+                    args=[self._node, now, now + self.ttl, self.ttl],
+                )
+            )
+        except RedisError as e:
+            print(f"Presence update failed: {e}", flush=True)
+            return False
+
+    # Discount a connection of a user, returns whether they just went offline
+    async def disconnect(self, user_id: str) -> bool:
+        self.local[user_id] -= 1
+        if self.local[user_id] > 0:
+            return False
+        del self.local[user_id]
+
+        try:
+            return bool(
+                await self._disconnect(
+                    keys=[presence_key(user_id)], args=[self._node, now_ms()]
+                )
+            )
+        except RedisError as e:
+            print(f"Presence update failed: {e}", flush=True)
+            return False
+
+    # Online users among the given users, in a single round trip
+    async def online(self, user_ids: list[str]) -> set[str]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.hvals(presence_key(user_id))
+            claims = await pipe.execute()
+
+        now = now_ms()
+        return {
+            user_id
+            for user_id, expiries in zip(user_ids, claims)
+            if any(int(expiry) > now for expiry in expiries)
+        }
+
+    async def is_online(self, user_id: str) -> bool:
+        return bool(await self.online([user_id]))
+
+    # Start refreshing the claims of the users on this worker
+    def listen(self):
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._beat())
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            try:
+                expires_at = now_ms() + self.ttl
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for user_id in list(self.local):
+                        pipe.hset(presence_key(user_id), self._node, expires_at)
+                        pipe.pexpire(presence_key(user_id), self.ttl)
+                    await pipe.execute()
+            except RedisError as e:
+                print(f"Presence heartbeat failed: {e}", flush=True)
+
+    # Stop the heartbeat n withdraw the claims of this worker
+    async def close(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for user_id in list(self.local):
+                    pipe.hdel(presence_key(user_id), self._node)
+                await pipe.execute()
+        except RedisError:
+            pass  # The claims expire by themselves
+        self.local.clear()
+
+
+# Redis key of the claims of the workers serving a user
+def presence_key(user_id: str) -> str:
+    return f"presence:users:{user_id}"
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# Claim a user for a worker, pruning the expired claims (of crashed workers)
+# KEYS: claims of the user
+# ARGV: worker, now (ms), expiry of the claim (ms), ttl of the claims (ms)
+# Returns 1 if no other worker claimed the user (they just came online)
+CONNECT_SCRIPT = """
+local came_online = 1
+local claims = redis.call('HGETALL', KEYS[1])
+
+for i = 1, #claims, 2 do
+    if tonumber(claims[i + 1]) <= tonumber(ARGV[2]) then
+        redis.call('HDEL', KEYS[1], claims[i])
+    elseif claims[i] ~= ARGV[1] then
+        came_online = 0
+    end
+end
+
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[3])
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return came_online
+"""
+
+
+# Withdraw the claim of a worker on a user
+# KEYS: claims of the user
+# ARGV: worker, now (ms)
+# Returns 1 if no other worker claims the user (they just went offline)
+DISCONNECT_SCRIPT = """
+redis.call('HDEL', KEYS[1], ARGV[1])
+
+for _, expiry in ipairs(redis.call('HVALS', KEYS[1])) do
+    if tonumber(expiry) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+return 1
+"""
+
+
+presence = Presence(redis_cache.client, settings.presence_heartbeat)
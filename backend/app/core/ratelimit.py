@@ -0,0 +1,148 @@
+import math
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import redis_cache
+
+
+# Configuration for public and autheticated users
+RATE_LIMIT_CONFIG = {
+    "public": {"rate_limit": 60, "time_window": 60},  # 60 requests per 60 seconds
+    "user": {"rate_limit": 200, "time_window": 60},  # 200 requests per 60 seconds
+}
+
+BURST_LIMIT = 20  # Allow up to 20 requests within a short burst
+BURST_WINDOW = 5  # Burst period of 5 seconds
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    detail: str | None = None
+    retry_after: int = 0  # Seconds until the client may retry
+
+
+class RateLimiter:
+    """
+    Distributed sliding window rate limiter.
+    ----------------------------------------
+
+    Every worker shares the counters stored in redis, so the limits hold no matter
+    how many uvicorn workers serve the requests. Each window is approximated from
+    two fixed window counters (current and previous, weighted by the overlap),
+    which costs two integers per client and window instead of a list of timestamps.
+    The burst and tiered limits are checked and counted atomically by a lua script.
+
+    A local token bucket per client (bounded LRU) rejects clients that already
+    exhausted their allowance on this worker, along with clients redis recently
+    rejected, without a round trip. It holds the whole tier limit n refills at the
+    fastest rate of the shared windows, so it never rejects a request the shared
+    limits would allow (it only bounds the clients on its own while redis is down).
+    """
+
+    def __init__(self, client: Redis, local_size: int = 10_000):
+        self.client = client
+        self.local_size = local_size
+        self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+        # identity -> [tokens, last refill, blocked until]
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    # Record a request of the client, returns whether it is allowed
+    async def hit(self, identity: str, tier: str) -> RateLimitDecision:
+        config = RATE_LIMIT_CONFIG[tier]
+        now = time.time()
+
+        if decision := self._take_local(identity, config, now):
+            return decision
+
+        windows = [
+            (BURST_LIMIT, BURST_WINDOW),
+            (config["rate_limit"], config["time_window"]),
+        ]
+        now_ms = int(now * 1000)
+
+        keys, args = [], [now_ms]
+        for limit, window in windows:
+            index = now_ms // (window * 1000)
+            prefix = f"ratelimit:{{{identity}}}:{window}"
+            keys += [f"{prefix}:{index}", f"{prefix}:{index - 1}"]
+            args += [limit, window * 1000]
+
+        try:
+            exceeded, retry_after_ms = await self._script(keys=keys, args=args)
+        except RedisError:
+            # Fail open, the local bucket still bounds the client on this worker
+            return RateLimitDecision(True)
+
+        if not exceeded:
+            return RateLimitDecision(True)
+
+        retry_after = math.ceil(retry_after_ms / 1000)
+        # The bucket may have been evicted while waiting for redis
+        if (bucket := self._buckets.get(identity)) is not None:
+            bucket[2] = now + retry_after
+        detail = "Burst limit exceeded." if exceeded == 1 else "Rate limit exceeded."
+        return RateLimitDecision(False, detail, retry_after)
+
+    # Local fast path, returns a decision only when the request is rejected locally
+    def _take_local(self, identity: str, config: dict, now: float):
+        # Sized n refilled from the loosest shared window
+        capacity = max(BURST_LIMIT, config["rate_limit"])
+        rate = max(  # Refill per second
+            BURST_LIMIT / BURST_WINDOW, config["rate_limit"] / config["time_window"]
+        )
+
+        if (bucket := self._buckets.get(identity)) is None:
+            bucket = self._buckets[identity] = [capacity, now, 0]
+            # Evict the least recently seen client
+            if len(self._buckets) > self.local_size:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(identity)
+
+        tokens, updated, blocked_until = bucket
+        if blocked_until > now:
+            retry_after = math.ceil(blocked_until - now)
+            return RateLimitDecision(False, "Rate limit exceeded.", retry_after)
+
+        # The bucket is never stricter than the shared limits, so an empty bucket
+        # means this worker alone has already seen more than the client is allowed
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens < 1:
+            bucket[:2] = tokens, now
+            retry_after = math.ceil((1 - tokens) / rate)
+            return RateLimitDecision(False, "Rate limit exceeded.", retry_after)
+
+        bucket[:2] = tokens - 1, now
+
+
+# Sliding window counters (burst window first, then the tier window)
+# KEYS: current and previous counter of every window
+# ARGV: now (ms), then the limit and length (ms) of every window
+# Returns the position of the exceeded window (0 if allowed) and the ms to wait
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+
+for i = 1, #KEYS, 2 do
+    local limit = tonumber(ARGV[i + 1])
+    local window = tonumber(ARGV[i + 2])
+    local elapsed = now % window
+    local previous = tonumber(redis.call('GET', KEYS[i + 1]) or 0)
+    local current = tonumber(redis.call('GET', KEYS[i]) or 0)
+
+    if previous * (window - elapsed) / window + current >= limit then
+        return {(i + 1) / 2, window - elapsed}
+    end
+end
+
+for i = 1, #KEYS, 2 do
+    redis.call('INCR', KEYS[i])
+    redis.call('PEXPIRE', KEYS[i], tonumber(ARGV[i + 2]) * 2)
+end
+return {0, 0}
+"""
+
+
+limiter = RateLimiter(redis_cache.client)
@@ -1,10 +1,12 @@
 import jwt
+import time
 import bcrypt
 import base64
+import hashlib
 from uuid import UUID
 from typing import List, Callable, Type
 from Crypto.Cipher import AES
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 from sqlalchemy.orm import Session, defer
 from sqlalchemy import select
 from Crypto.Random import get_random_bytes
@@ -12,14 +14,35 @@ from datetime import datetime, timedelta, timezone
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.security import SecurityScopes
 from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.cache import Cache, LocalCache
 from app.models import User, Patient, Doctor
 from app.core.utils import ResponseHandler, scopes
 
 
 origins = [origin.strip() for origin in settings.frontend_origins.split(",")]
 
+# claims of recently verified tokens, keyed by the sha256 digest of the token
+verified_tokens = LocalCache(settings.auth_cache_size)
+
+VERIFIED_TOKEN_TTL = 300  # seconds a verified token is trusted from memory
+PRINCIPAL_TTL = 30  # seconds a principal snapshot is reused from memory
+PRINCIPAL_EXPIRE = 300  # seconds a principal snapshot is kept in redis
+
+# columns of the principal snapshots (password n timestamps excluded)
+users, patients, doctors = User.__table__, Patient.__table__, Doctor.__table__
+PRINCIPAL_COLUMNS = {
+    "users": [
+        column
+        for column in users.c
+        if column.name not in {"password", "created_by", "created_at", "updated_at"}
+    ],
+    "user": [column for column in patients.c if column.name != "id"],
+    "doctor": [column for column in doctors.c if column.name != "id"],
+}
+
 
 # generate a hashed password
 def generate_hash(text: str) -> str:
@@ -107,10 +130,14 @@ def create_access_token(data: dict, expires_delta: datetime) -> str:
     return jwt.encode(payload, settings.jwt_secret_key)
 
 
-# decode the token
+# decode the token (reusing the claims of a recently verified token)
 def decode_token(token: str):
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    if (payload := verified_tokens.get(digest)) is not None:
+        return payload
+
     try:
-        return jwt.decode(
+        payload = jwt.decode(
             token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm]
         )
     except InvalidTokenError:
@@ -118,10 +145,27 @@ def decode_token(token: str):
     except ExpiredSignatureError:
         raise ResponseHandler.invalid_token()
 
+    # never trust the claims past the expiry of the token
+    ttl = min(VERIFIED_TOKEN_TTL, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        verified_tokens.set(digest, payload, ttl)
+
+    return payload
+
+
+# decode the bearer token once per request (shared by the middleware n dependencies)
+def request_claims(request: Request, token: str) -> dict:
+    cached = getattr(request.state, "token_claims", None)
+    if cached is not None and cached[0] == token:
+        return cached[1]
 
-# verify is the token is valid
-async def verify_token(token: str, db: AsyncSession, required_scopes: list[str]):
     payload = decode_token(token)
+    request.state.token_claims = (token, payload)
+    return payload
+
+
+# check the token claims against the required scopes, returns the user id
+def verify_claims(payload: dict, required_scopes: list[str]) -> str:
     user_id = payload.get("sub", None)
     token_scopes = payload.get("scopes", [])
 
@@ -133,6 +177,18 @@ async def verify_token(token: str, db: AsyncSession, required_scopes: list[str])
     if not set(required_scopes).issubset(set(token_scopes)):
         raise ResponseHandler.no_permission(f"user doesn't have enough permission.")
 
+    return user_id
+
+
+# verify is the token is valid
+async def verify_token(
+    token: str,
+    db: AsyncSession,
+    required_scopes: list[str],
+    payload: dict | None = None,
+):
+    user_id = verify_claims(payload or decode_token(token), required_scopes)
+
     query = (
         select(User)
         .where(User.id == user_id)
@@ -153,6 +209,71 @@ async def verify_token(token: str, db: AsyncSession, required_scopes: list[str])
     return user_info
 
 
+# redis key of the principal snapshot of a user
+def principal_key(user_id: str | UUID) -> str:
+    return f"users:principal:{user_id}"
+
+
+# query the principal snapshot of a user along w its patient or doctor columns
+async def query_principal(user_id: str, db: AsyncSession) -> dict | None:
+    query = (
+        select(
+            *PRINCIPAL_COLUMNS["users"],
+            *PRINCIPAL_COLUMNS["user"],
+            *PRINCIPAL_COLUMNS["doctor"],
+            patients.c.id.label("patient_id"),
+            doctors.c.id.label("doctor_id"),
+        )
+        .select_from(
+            users.outerjoin(patients, patients.c.id == users.c.id).outerjoin(
+                doctors, doctors.c.id == users.c.id
+            )
+        )
+        .where(users.c.id == user_id)
+    )
+    result = await db.execute(query)
+    row = result.mappings().one_or_none()
+
+    # patients n doctors must have their own records as well
+    if (
+        not row
+        or (row["role"] == "user" and not row["patient_id"])
+        or (row["role"] == "doctor" and not row["doctor_id"])
+    ):
+        return None
+
+    columns = PRINCIPAL_COLUMNS["users"] + PRINCIPAL_COLUMNS.get(row["role"], [])
+    return jsonable_encoder({column.name: row[column.name] for column in columns})
+
+
+# retrieve the principal snapshot of a user (from memory, then redis, then the db)
+async def load_principal(user_id: str, redis: Cache) -> dict:
+    async def loader(db: AsyncSession):
+        if (snapshot := await query_principal(user_id, db)) is None:
+            raise ResponseHandler.invalid_token("invalid token or expired token.")
+        return snapshot
+
+    return await redis.fetch(
+        principal_key(user_id), loader, PRINCIPAL_EXPIRE, local_ttl=PRINCIPAL_TTL
+    )
+
+
+# rebuild a transient user object from a principal snapshot
+def principal_from_snapshot(snapshot: dict) -> User | Patient | Doctor:
+    model = {"user": Patient, "doctor": Doctor}.get(snapshot["role"], User)
+    return model(
+        **{
+            key: UUID(val) if key in {"id", "hospital_id"} and val else val
+            for key, val in snapshot.items()
+        }
+    )
+
+
+# drop the principal snapshots of changed accounts (on every worker)
+async def forget_principal(redis: Cache, *user_ids: str | UUID):
+    await redis.invalidate(keys=[principal_key(user_id) for user_id in user_ids])
+
+
 # get user access token
 async def get_user_token(
     user: User | Patient | Doctor,
@@ -1,13 +1,54 @@
-from fastapi import WebSocket
-from fastapi.encoders import jsonable_encoder
 import json
+import asyncio
+from uuid import uuid4
+
+from fastapi import WebSocket, status
+from fastapi.encoders import jsonable_encoder
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.cache import redis_cache
+from app.core.presence import Presence, presence
+
+
+SOCKET_CHANNEL = "sockets:events"  # Pub/sub channel of the socket events
+
+# What can happen to a message pushed to an outbox
+PUSH_RESULTS = ("queued", "dropped", "coalesced", "overflow")
+
+LATEST_STATE = object()  # Queued in place of the state messages of an outbox
 
 
 class WebSocketManager:
-    def __init__(self):
+    """
+    Registry of the websocket connections of this worker.
+    ------------------------------------------------------
+
+    Every worker only knows the connections it accepted itself. Messages sent to a
+    room (or to the admins) are delivered to the local connections right away and
+    handed to the broker, which fans them out to every other worker (and node),
+    where they are delivered to the local connections of that room. So a booking
+    handled by one worker reaches a doctor connected to another one.
+
+    A message is serialized once and queued on the outbox of every connection of
+    the room, each drained by its own writer task, so broadcasting never waits on
+    a socket and a slow client never adds to the latency of the request that
+    triggered the message. A connection whose send fails or stalls (longer than
+    `socket_send_timeout`) is dropped from the registry and closed in the
+    background.
+
+    The connections of the users are counted by the presence service, and the
+    admins are notified whenever a user comes online or goes offline.
+    """
+
+    def __init__(self, broker: "LocalBroker | RedisBroker", presence: Presence):
         self.rooms: dict[str, list[WebSocket]] = {}
         self.admin_connections: list[WebSocket] = []
-        self.online: list[str] = []
+        self.outboxes: dict[WebSocket, Outbox] = {}
+        self.broker = broker
+        self.presence = presence
+        self._tasks: set[asyncio.Task] = set()  # Background closes n presence updates
 
     # Connect a User from a specific room
     async def connect(self, websocket: WebSocket, user_id: str | None = None):
@@ -16,43 +57,131 @@ class WebSocketManager:
             if user_id not in self.rooms:
                 self.rooms[user_id] = []
             self.rooms[user_id].append(websocket)
-            self.online.append(user_id)
         else:
             self.admin_connections.append(websocket)
 
+        # Start writing the messages queued for the connection
+        self.outboxes[websocket] = Outbox(
+            websocket,
+            overflow_policy(user_id),
+            lambda: self.drop(websocket, user_id),
+        )
+
+        if user_id and await self.presence.connect(room_user(user_id)):
+            await self.broadcast_presence(room_user(user_id), True)
+
         print(f"User #{user_id} connected to room.")
 
     # Diconnect a User from a specific room
     def disconnect(self, websocket: WebSocket, user_id: str | None = None):
+        self.unregister(websocket, user_id)
+        print(f"User #{user_id} left the room.")
+
+    # Remove a connection from the registry (no-op when dropped already)
+    def unregister(self, websocket: WebSocket, user_id: str | None = None):
         if user_id:
-            if user_id in self.rooms:
+            if websocket in self.rooms.get(user_id, []):
                 self.rooms[user_id].remove(websocket)
                 if not self.rooms[user_id]:
                     # Delete dict key of the user
                     del self.rooms[user_id]
-                # Remove the user id from the online list
-                self.online.remove(user_id)
-        else:
+                # Discount the connection from the presence of the user
+                self.spawn(self.leave(room_user(user_id)))
+        elif websocket in self.admin_connections:
             self.admin_connections.remove(websocket)
 
-        print(f"User #{user_id} left the room.")
+        if outbox := self.outboxes.pop(websocket, None):
+            outbox.stop()
+
+    # Notify the admins when a user has no connection left on any worker
+    async def leave(self, user_id: str):
+        if await self.presence.disconnect(user_id):
+            await self.broadcast_presence(user_id, False)
 
-    # Broadcast text to a specific room
-    async def broadcast_to_room(self, room_id: str, message: str):
-        if room_id in self.rooms:
-            for connection in self.rooms[room_id]:
-                await connection.send_text(message)
+    # Push a presence change to the Admins
+    async def broadcast_presence(self, user_id: str, online: bool) -> dict:
+        return await self.broadcast_to_admins(
+            {"type": "presence", "user_id": user_id, "online": online}
+        )
+
+    # Broadcast text to a specific room (a state replaces the queued one, see Outbox)
+    async def broadcast_to_room(
+        self, room_id: str, message: str, state: bool = False
+    ) -> dict:
+        return await self.publish({"room": room_id, "text": message, "state": state})
 
     # Broadcast JSON data to a specific room
-    async def send_private_msg(self, room_id: str, msg: dict):
-        if room_id in self.rooms:
-            for ws in self.rooms[room_id]:
-                await ws.send_json(jsonable_encoder(msg))
+    async def send_private_msg(self, room_id: str, msg: dict) -> dict:
+        return await self.publish({"room": room_id, "text": json_text(msg)})
 
     # Broadcast JSON data to the Admins.
-    async def broadcast_to_admins(self, msg: dict):
-        for admin_ws in self.admin_connections:
-            await admin_ws.send_json(jsonable_encoder(msg))
+    async def broadcast_to_admins(self, msg: dict) -> dict:
+        return await self.publish({"room": None, "text": json_text(msg)})
+
+    # Send JSON data to a single connection of this worker
+    def send_personal_msg(self, websocket: WebSocket, msg: dict) -> str | None:
+        if (outbox := self.outboxes.get(websocket)) is None:
+            return None  # Disconnected meanwhile
+
+        result = outbox.push(json_text(msg))
+        if result == "overflow":
+            outbox.on_failure()
+        return result
+
+    # Deliver an event to the local connections n fan it out to the other workers
+    async def publish(self, event: dict) -> dict:
+        stats = self.deliver(event)
+        await self.broker.publish(event)
+        return stats
+
+    # Queue an event for the connections of its room (the admins w/o a room)
+    def deliver(self, event: dict) -> dict:
+        if event["room"] is None:
+            connections = list(self.admin_connections)
+        else:
+            connections = list(self.rooms.get(event["room"], []))
+
+        results = [
+            self.outboxes[ws].push(event["text"], event.get("state", False))
+            for ws in connections
+        ]
+
+        # Drop the slow consumers whose outbox overflowed
+        for ws, result in zip(connections, results):
+            if result == "overflow":
+                self.drop(ws, event["room"])
+
+        stats = {
+            "room": event["room"],
+            "recipients": len(connections),
+            **{result: results.count(result) for result in PUSH_RESULTS},
+        }
+        if stats["dropped"] or stats["overflow"]:
+            print(f"Socket delivery overflowed outboxes: {stats}", flush=True)
+
+        return stats
+
+    # Unregister a dead or stalled connection n close it w/o waiting on it
+    def drop(self, websocket: WebSocket, user_id: str | None = None):
+        self.unregister(websocket, user_id)
+        self.spawn(close_socket(websocket))
+
+    # Run a coroutine in the background, keeping a reference until it is done
+    def spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # Start receiving the events published by the other workers
+    def listen(self):
+        self.broker.listen(self.deliver)
+        self.presence.listen()
+
+    async def close(self):
+        await self.broker.close()
+        await self.presence.close()
+        for outbox in self.outboxes.values():
+            outbox.stop()
 
     #     self.online_users: set[str] = set()
     #     self.admin_connections: list[WebSocket] = []
@@ -125,4 +254,181 @@ class WebSocketManager:
     #             await connection.send_text(message)
 
 
-socket_manager = WebSocketManager()
+class Outbox:
+    """
+    Bounded queue of the messages to send to a connection, w its writer task.
+    --------------------------------------------------------------------------
+
+    What happens when a message is pushed while the queue is full depends on the
+    overflow policy of the connection:
+    - drop_oldest: the oldest queued message is discarded for the new one.
+    - coalesce: a state message (the whole latest health record of a monitoring
+      room) replaces the state still queued, so a state is never stale. Other
+      messages (e.g, new readings) are queued as usual and overflow like below.
+    - disconnect: the connection is a slow consumer and gets dropped, its client
+      reloads the missed data on reconnection.
+    """
+
+    def __init__(self, websocket: WebSocket, policy: str, on_failure):
+        self.websocket = websocket
+        self.policy = policy
+        self.queue: asyncio.Queue[str] = asyncio.Queue(settings.socket_queue_size)
+        self.state: str | None = None  # Latest state queued (coalescing outboxes)
+        self.on_failure = on_failure
+        self._writer = asyncio.create_task(self._write())
+
+    # Queue a message, returns what happened to it (one of `PUSH_RESULTS`)
+    def push(self, text: str, state: bool = False) -> str:
+        if state and self.policy == "coalesce":
+            coalesced = self.state is not None
+            self.state = text
+            if coalesced:
+                return "coalesced"
+            text = LATEST_STATE  # Sent as the latest state once dequeued
+
+        if self.queue.full():
+            if self.policy != "drop_oldest":
+                return "overflow"
+            if self.queue.get_nowait() is LATEST_STATE:
+                self.state = None
+            self.queue.put_nowait(text)
+            return "dropped"
+
+        self.queue.put_nowait(text)
+        return "queued"
+
+    # Discard the queued messages, returns their amount
+    def clear(self) -> int:
+        amount = self.queue.qsize()
+        for _ in range(amount):
+            self.queue.get_nowait()
+        self.state = None
+        return amount
+
+    def stop(self):
+        self.clear()
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    # Send the queued messages one after another, until a send fails or stalls
+    async def _write(self):
+        while True:
+            text = await self.queue.get()
+            if text is LATEST_STATE:
+                text, self.state = self.state, None
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(text), settings.socket_send_timeout
+                )
+            except Exception as e:
+                print(f"Socket send failed: {type(e).__name__} {e}", flush=True)
+                self.on_failure()
+                return
+
+
+class LocalBroker:
+    """
+    Broker of a single worker, every connection is local already.
+    --------------------------------------------------------------
+    """
+
+    async def publish(self, event: dict):
+        pass
+
+    def listen(self, deliver):
+        pass
+
+    async def close(self):
+        pass
+
+
+class RedisBroker:
+    """
+    Broker fanning the socket events out to every worker over redis pub/sub.
+    -------------------------------------------------------------------------
+
+    Events are published on a single channel every worker subscribes to, each
+    worker delivering them to its own connections of the room. Events published by
+    this worker are skipped, they have been delivered locally already. Pub/sub is
+    fire n forget: events published while a worker is disconnected from redis are
+    lost for its connections (the clients reload the data on reconnection).
+    """
+
+    def __init__(self, client: Redis, channel: str = SOCKET_CHANNEL):
+        self.client = client
+        self.channel = channel
+        self._listener: asyncio.Task | None = None
+        self._origin = uuid4().hex  # Identifies the events published by this worker
+
+    async def publish(self, event: dict):
+        try:
+            await self.client.publish(
+                self.channel, json.dumps({**event, "origin": self._origin})
+            )
+        except RedisError as e:
+            print(f"Socket event publishing failed: {e}", flush=True)
+
+    def listen(self, deliver):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver):
+        while True:
+            try:
+                async with self.client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        event = json.loads(message["data"])
+                        if event.pop("origin") == self._origin:
+                            continue
+                        try:
+                            deliver(event)
+                        except Exception as e:
+                            # A closing connection must not stop the delivery
+                            print(f"Socket event delivery failed: {e}", flush=True)
+            except RedisError:
+                await asyncio.sleep(1)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+
+# Close a dropped connection, giving up on clients that do not read anymore
+async def close_socket(websocket: WebSocket):
+    try:
+        await asyncio.wait_for(
+            websocket.close(code=status.WS_1011_INTERNAL_ERROR),
+            settings.socket_send_timeout,
+        )
+    except Exception:
+        pass
+
+
+# Overflow policy of the outboxes of a room (the admins w/o a room)
+def overflow_policy(room_id: str | None) -> str:
+    if room_id and room_id.endswith("_MONITORING"):
+        return "coalesce"
+    return settings.socket_overflow_policy
+
+
+# User of a room (the rooms are named `{user_id}_{PURPOSE}`)
+def room_user(room_id: str) -> str:
+    return room_id.rsplit("_", 1)[0]
+
+
+# Text frame of a JSON message (serialized like `WebSocket.send_json`)
+def json_text(msg: dict) -> str:
+    return json.dumps(jsonable_encoder(msg), separators=(",", ":"), ensure_ascii=False)
+
+
+# Fan the events out over redis unless a single worker serves every connection
+def socket_broker():
+    if settings.socket_broker == "local":
+        return LocalBroker()
+    return RedisBroker(redis_cache.client)
+
+
+socket_manager = WebSocketManager(socket_broker(), presence)
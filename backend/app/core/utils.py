@@ -49,6 +49,7 @@ scopes = {
         "monitoring:delete",
         "medication:read",
         "medication:delete",
+        "system:stats",
     ],
 }
 
@@ -1,32 +1,62 @@
-from sqlalchemy import create_engine
+import asyncio
+from contextlib import asynccontextmanager
+
+from starlette.requests import HTTPConnection
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from typing import Generator
 from app.core.config import settings
+from app.db.pool import InstrumentedPool, checkout_holder
 
 
-DATABASE_URL = f"postgresql://{settings.postgres_user}:{settings.postgres_pass}@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_database_name}"
 ASYNC_DATABASE_URL = f"postgresql+asyncpg://{settings.postgres_user}:{settings.postgres_pass}@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_database_name}"
 
-engine = create_engine(DATABASE_URL)
-async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+async_engine = create_async_engine(
+    f"{ASYNC_DATABASE_URL}?prepared_statement_cache_size={settings.db_statement_cache_size}",
+    echo=False,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args={"statement_cache_size": settings.db_statement_cache_size},
+)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 AsyncSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=async_engine, class_=AsyncSession
 )
 
 
-# connect the database using the local session
-def get_db() -> Generator:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # connect the database using the local async session
-async def get_async_db():
+async def get_async_db(connection: HTTPConnection = None):
+    if connection is not None:
+        # Name the holder of the connections in the pool reports
+        checkout_holder.set(f"{connection.scope['type']} {connection.url.path}")
     async with AsyncSessionLocal() as session:
         yield session
+
+
+# Session of a single unit of work (e.g, a websocket message), committed when the
+# block succeeds n closed right after, so long lived handlers (websockets) only
+# hold a pooled connection while they actually use it
+@asynccontextmanager
+async def unit_of_work(holder: str, session_factory: sessionmaker = AsyncSessionLocal):
+    token = checkout_holder.set(holder)
+    try:
+        async with session_factory() as session:
+            yield session
+            await session.commit()
+    finally:
+        checkout_holder.reset(token)
+
+
+# Report the connections held for longer than `db_hold_warning` seconds
+async def watch_connection_holds(interval: float | None = None):
+    interval = interval or settings.db_hold_warning
+    while True:
+        await asyncio.sleep(interval)
+        for hold in async_engine.pool.held_over(settings.db_hold_warning):
+            print(
+                f"Database connection held for {hold['held_s']:.0f}s by {hold['holder']}",
+                flush=True,
+            )
@@ -0,0 +1,105 @@
+import time
+import asyncio
+from contextvars import ContextVar
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+# What the connections checked out by the current task are used for
+checkout_holder: ContextVar[str | None] = ContextVar("checkout_holder", default=None)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Connection pool of the async engine reporting its own metrics.
+    ---------------------------------------------------------------
+
+    Measures how long each checkout waits for a connection and counts the
+    checkouts that had to open an overflow connection or timed out, so pool
+    starvation can be told apart from slow queries.
+
+    Every checked out connection is also tracked along w its holder (the
+    `checkout_holder` of the task, else the task name) until it is returned, so
+    connections held for long (e.g, by a session kept open across the idle
+    periods of a websocket) can be reported while they are still held.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.overflows = 0  # Checkouts served by a connection beyond pool_size
+        self.timeouts = 0  # Checkouts that gave up after pool_timeout
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.holds: dict[int, dict] = {}  # Checked out connections by record
+        self.hold_max = 0.0
+        self.long_holds = 0  # Checkouts reported as held for too long
+
+    # Checkout of a pooled connection (waits when the pool is exhausted)
+    def _do_get(self):
+        overflow = self._overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+        self.checkouts += 1
+        if self._overflow > overflow and self._overflow > 0:
+            self.overflows += 1
+
+        self.holds[id(connection)] = {
+            "holder": holder_name(),
+            "since": time.monotonic(),
+            "reported": False,
+        }
+        return connection
+
+    # Checkin of a connection
+    def _do_return_conn(self, record):
+        if hold := self.holds.pop(id(record), None):
+            self.hold_max = max(self.hold_max, time.monotonic() - hold["since"])
+        super()._do_return_conn(record)
+
+    # Connections checked out for longer than the limit (seconds), each reported once
+    def held_over(self, limit: float) -> list[dict]:
+        now, held = time.monotonic(), []
+        for hold in list(self.holds.values()):
+            if not hold["reported"] and now - hold["since"] > limit:
+                hold["reported"] = True
+                self.long_holds += 1
+                held.append({"holder": hold["holder"], "held_s": now - hold["since"]})
+        return held
+
+    # Current usage of the pool along with the checkout metrics
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "checkouts": self.checkouts,
+            "overflows": self.overflows,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / max(1, self.checkouts) * 1000, 3),
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "hold_max_s": round(self.hold_max, 3),
+            "long_holds": self.long_holds,
+        }
+
+
+# Holder of the connections checked out by the current task
+def holder_name() -> str:
+    if holder := checkout_holder.get():
+        return holder
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None  # Checked out outside of the event loop
+    return task.get_name() if task else "sync"
@@ -1,15 +1,24 @@
+import asyncio
+
 from fastapi import (
     FastAPI,
     HTTPException,
     Request,
     APIRouter,
+    Security,
 )
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from time import time
+from contextlib import asynccontextmanager
 
-from app.core.security import origins, decode_token
+from app.core.security import origins, request_claims
 from app.core.config import settings
+from app.core.cache import redis_cache
+from app.core.dependecies import include_auth
+from app.core.ratelimit import limiter
+from app.core.socket import socket_manager
+from app.services.message_writer import message_writer
+from app.db import async_engine, watch_connection_holds
 
 from app.routers import (
     auth,
@@ -43,8 +52,29 @@ from app.workers.tasks import send_email_task
 version = "v1"
 
 
+# Startup and shutdown of the shared resources
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Keep the in-process cache coherent with the other workers
+    redis_cache.listen()
+    # Deliver the socket events published by the other workers
+    socket_manager.listen()
+    # Store the chat messages in the background
+    message_writer.listen()
+    # Report the database connections held for too long
+    holds_watcher = asyncio.create_task(watch_connection_holds())
+    yield
+    holds_watcher.cancel()
+    await socket_manager.close()
+    await message_writer.close()
+    # Release the pooled redis n database connections
+    await redis_cache.close()
+    await async_engine.dispose()
+
+
 # Initialize FastAPI Server
 app = FastAPI(
+    lifespan=lifespan,
     root_path=f"/api/{version}",
     docs_url=f"/docs",
     openapi_url=f"/openapi.json",
@@ -76,77 +106,31 @@ async def custom_http_exception_handler(_: Request, exc: HTTPException):
     )
 
 
-rate_limit_data = {}
-burst_control_data = {}
-
-# Default Rate Limits
-RATE_LIMIT = 50
-TIME_WINDOW = 60
-BURST_LIMIT = 20  # Allow up to 20 extra requests within a short burst
-BURST_WINDOW = 5  # Burst period of 5 seconds
-
-# Configuration for public and autheticated users
-RATE_LIMIT_CONFIG = {
-    "public": {"rate_limit": 60, "time_window": 60},  # 60 requests per 60 seconds
-    "user": {"rate_limit": 200, "time_window": 60},  # 200 requests per 60 seconds
-}
-
-
-# Custom rate limiter middleware
+# Distributed rate limiter middleware (limits are shared by every worker)
 @app.middleware("http")
 async def rate_limiter(request: Request, next):
     client_ip = request.client.host
-    current_time = time()
 
     # Indetify is the user is autheticated
     bearer = request.headers.get("authorization")
 
-    # Define the configuration of the Rate Limiter
-    if bearer:
-        token = bearer.split("Bearer ")[1].strip()
-        decode_token(token)
-        # Update the default configuration
-        config = RATE_LIMIT_CONFIG.get("user")
-    else:
-        config = RATE_LIMIT_CONFIG.get("public")
-
-    # Get the limits
-    rate_limit = config["rate_limit"]
-    time_window = config["time_window"]
-
-    # Initialize data for the client if not present
-    if client_ip not in rate_limit_data:
-        rate_limit_data[client_ip] = []
-    if client_ip not in burst_control_data:
-        burst_control_data[client_ip] = []
-
-    # Handle Burst Control
-    burst_control_data[client_ip] = [
-        timestamp
-        for timestamp in burst_control_data[client_ip]
-        if current_time - timestamp < BURST_WINDOW
-    ]
-
-    # Check if the burst amount is within the limit
-    if len(burst_control_data[client_ip]) > BURST_LIMIT:
-        raise HTTPException(status_code=429, detail="Burst limit exceeded.")
-
-    # Add burst request within burst window
-    burst_control_data[client_ip].append(current_time)
-
-    # Handle Tiered Rate Limits
-    rate_limit_data[client_ip] = [
-        timestamp
-        for timestamp in rate_limit_data[client_ip]
-        if current_time - timestamp < time_window
-    ]
-
-    # Check if the client is within the limit
-    if len(rate_limit_data[client_ip]) >= rate_limit:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded.")
-
-    # Record the current requests' timestamp
-    rate_limit_data[client_ip].append(current_time)
+    # Autheticated users are limited per account, public users per ip address
+    identity, tier = f"ip:{client_ip}", "public"
+    if bearer and bearer.startswith("Bearer "):
+        try:
+            token = bearer.split("Bearer ")[1].strip()
+            payload = request_claims(request, token)
+            identity, tier = f"user:{payload.get('sub', client_ip)}", "user"
+        except HTTPException:
+            pass  # Invalid tokens are rejected by the authentication dependencies
+
+    decision = await limiter.hit(identity, tier)
+    if not decision.allowed:
+        return JSONResponse(
+            status_code=429,
+            content={"status": "unsuccessful", "message": decision.detail},
+            headers={"Retry-After": str(decision.retry_after)},
+        )
 
     # Proceed to the next middleware or endpoint
     response = await next(request)
@@ -188,6 +172,18 @@ async def get_task_status(task_id: str):
     return {"task_id": task_id, "status": task.status, "result": task.result}
 
 
+# Hit/miss counters of the in-process (l1) and redis (l2) caches (admins only)
+@app.get("/cache/stats")
+async def get_cache_stats(_=Security(include_auth, scopes=["system:stats"])):
+    return redis_cache.stats()
+
+
+# Usage n checkout metrics of the database connection pool (admins only)
+@app.get("/db/pool/stats")
+async def get_db_pool_stats(_=Security(include_auth, scopes=["system:stats"])):
+    return async_engine.pool.stats()
+
+
 # General routes (authentication not required)
 app.include_router(auth.router, prefix=f"/auth", tags=["Users / Authentication"])
 app.include_router(public.router1, prefix=f"/doctors", tags=["General / Doctors"])
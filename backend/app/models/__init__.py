@@ -8,7 +8,11 @@ from sqlalchemy import (
     String,
     Boolean,
     DateTime,
+    Index,
     func,
+    or_,
+    event,
+    DDL,
 )
 from sqlalchemy.orm import relationship, DeclarativeBase
 from sqlalchemy.dialects.postgresql import UUID
@@ -73,6 +77,8 @@ class Doctor(User):
     appointments = relationship("Appointment", back_populates="doctor")
     medications = relationship("Medication", back_populates="doctor")
 
+    __table_args__ = (Index("ix_doctors_hospital_id", "hospital_id"),)
+
 
 class HealthRecord(Base):
     __tablename__ = "health_records"
@@ -100,6 +106,62 @@ class HealthRecord(Base):
     # relationships w other entities
     patient = relationship("Patient", back_populates="health_records")
 
+    __table_args__ = (Index("ix_health_records_patient_id", "patient_id"),)
+
+
+class HealthReading(Base):
+    __tablename__ = "health_readings"
+
+    # a single timestamped reading of a patient (e.g, a cgm glucose value), one row
+    # per kind n time, partitioned by month of the measurement
+    patient_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("patients.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    kind = Column(String, primary_key=True)  # 'glucose', 'systolic', 'diastolic'
+    measured_at = Column(DateTime(timezone=True), primary_key=True)
+    value = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # time range scans of the rollups n retention, tiny as readings arrive in
+        # time order
+        Index("ix_health_readings_measured_brin", measured_at, postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (measured_at)"},
+    )
+
+
+class HealthReadingRollup(Base):
+    __tablename__ = "health_reading_rollups"
+
+    # aggregated readings of a patient per kind n time bucket, at 5 minute ('5m'),
+    # hourly ('1h') n daily ('1d') resolution
+    patient_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("patients.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    kind = Column(String, primary_key=True)
+    resolution = Column(String, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # start of the bucket
+
+    minimum = Column(Float, nullable=False)
+    maximum = Column(Float, nullable=False)
+    total = Column(Float, nullable=False)  # sum of the values, mean = total / count
+    count = Column(Integer, nullable=False)
+
+
+# readings w/o a monthly partition (yet) land in the default one
+event.listen(
+    HealthReading.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS health_readings_default "
+        "PARTITION OF health_readings DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
+
 
 class Appointment(Base):
     __tablename__ = "appointments"
@@ -137,6 +199,72 @@ class Appointment(Base):
     doctor = relationship("Doctor", back_populates="appointments")
     medication = relationship("Medication", back_populates="appointment")
 
+    __table_args__ = (
+        # serial numbers are allocated per doctor n day (see AppointmentSerial)
+        Index(
+            "ix_appointments_doctor_date_serial",
+            "doctor_id",
+            "appointment_date",
+            "serial_number",
+            unique=True,
+        ),
+        # appointment lists n counts of a doctor filtered by status
+        Index(
+            "ix_appointments_doctor_status_date",
+            "doctor_id",
+            "status",
+            "appointment_date",
+        ),
+        # pending appointment requests of a doctor, latest first
+        Index(
+            "ix_appointments_doctor_requested",
+            "doctor_id",
+            appointment_date.desc(),
+            postgresql_where=status == "requested",
+        ),
+        # patients of a doctor n their first visits
+        Index(
+            "ix_appointments_doctor_patient_date",
+            "doctor_id",
+            "patient_id",
+            "appointment_date",
+        ),
+        # appointment lists of a patient filtered by status
+        Index("ix_appointments_patient_status", "patient_id", "status"),
+    )
+
+
+class AppointmentSerial(Base):
+    __tablename__ = "appointment_serials"
+
+    # last serial number handed out for the appointments of a doctor on a day
+    doctor_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("doctors.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = Column(Date, primary_key=True)
+    last_serial = Column(Integer, nullable=False, default=0)
+
+
+class DoctorAnalyticsDaily(Base):
+    __tablename__ = "doctor_analytics_daily"
+
+    # counted appointments of a doctor per day n patient gender
+    doctor_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("doctors.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = Column(Date, primary_key=True)
+    gender = Column(String, primary_key=True)
+
+    appointments = Column(Integer, nullable=False, default=0)
+    patients = Column(Integer, nullable=False, default=0)  # distinct patients
+    first_visits = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
 
 class Medication(Base):
     __tablename__ = "medications"
@@ -183,6 +311,19 @@ class Medication(Base):
     patient = relationship("Patient", back_populates="medication")
     appointment = relationship("Appointment", back_populates="medication")
 
+    __table_args__ = (
+        # latest medication record of a patient
+        Index("ix_medications_patient_updated", "patient_id", updated_at.desc()),
+        # latest record of a patient that suggests medications or exercises
+        Index(
+            "ix_medications_patient_active",
+            "patient_id",
+            updated_at.desc(),
+            postgresql_where=or_(medications.isnot(None), exercises.isnot(None)),
+        ),
+        Index("ix_medications_appointment_id", "appointment_id"),
+    )
+
 
 class Hospital(Base):
     __tablename__ = "hospitals"
@@ -224,6 +365,11 @@ class Meal(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # catalogue order, walked page by page w the keyset cursors
+        Index("ix_meals_updated_id", "updated_at", "id"),
+    )
+
 
 class Message(Base):
     __tablename__ = "messages"
@@ -244,3 +390,25 @@ class Message(Base):
     # relationships w other entities
     sender = relationship("User", foreign_keys=[sender_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
+
+    __table_args__ = (
+        # help n reply messages of a user, latest first
+        Index(
+            "ix_messages_sender_type_created", "sender_id", "type", created_at.desc()
+        ),
+        # direct conversations, latest first (queried in both directions)
+        Index(
+            "ix_messages_direct",
+            "sender_id",
+            "receiver_id",
+            created_at.desc(),
+            postgresql_where=type == "direct",
+        ),
+        # direct messages received by a user (inbox rebuilds, unread counters)
+        Index(
+            "ix_messages_direct_receiver",
+            "receiver_id",
+            created_at.desc(),
+            postgresql_where=type == "direct",
+        ),
+    )
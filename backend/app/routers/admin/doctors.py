@@ -1,7 +1,9 @@
-from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Query
 
-from app.db import get_db as db
+from app.db import get_async_db as db
+from app.core.cache import Cache
+from app.core.dependecies import cache
 from app.schemas.doctor import DoctorCreateAdmin, DoctorUpdateAdmin
 from app.services.admin.doctor import DoctorServiceAdmin
 
@@ -12,38 +14,48 @@ router = APIRouter()
 # get all the doctors
 @router.get("/all")
 async def get_all_doctors(
-    offset: int = None, limit: int = None, db: Session = Depends(db)
+    page: int = 1,
+    limit: int = Query(default=25, le=100),
+    db: AsyncSession = Depends(db),
 ):
-    return await DoctorServiceAdmin.retrieve_all_doctors_admin(db, offset, limit)
+    return await DoctorServiceAdmin.retrieve_all_doctors_admin(db, page, limit)
 
 
 # create a new doctor account /admin
 @router.post("/{hospital_id}/new", status_code=201)
 async def create_new_doctor(
-    details: DoctorCreateAdmin, hospital_id: str, db: Session = Depends(db)
+    details: DoctorCreateAdmin, hospital_id: str, db: AsyncSession = Depends(db)
 ):
     return await DoctorServiceAdmin.new_doctor_account_admin(details, hospital_id, db)
 
 
 # retrive the doctor account informations /admin
 @router.get("/profile")
-async def get_doctor_informations(id: str, db: Session = Depends(db)):
+async def get_doctor_informations(id: str, db: AsyncSession = Depends(db)):
     return await DoctorServiceAdmin.get_doctor_information_admin(id, db)
 
 
 # update the doctor account informations /admin
 @router.put("/profile")
 async def update_doctor_informations(
-    id: str, details: DoctorUpdateAdmin, db: Session = Depends(db)
+    id: str,
+    details: DoctorUpdateAdmin,
+    db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
 ):
-    return await DoctorServiceAdmin.update_doctor_information_admin(id, details, db)
+    return await DoctorServiceAdmin.update_doctor_information_admin(
+        id, details, db, redis
+    )
 
 
 # retrive all doctors informations of a specific hospital
 @router.get("/{hospital_id}/all")
 async def get_all_doctor_of_hospital(
-    hospital_id: str, offset: int = None, limit: int = None, db: Session = Depends(db)
+    hospital_id: str,
+    page: int = 1,
+    limit: int = Query(default=25, le=100),
+    db: AsyncSession = Depends(db),
 ):
     return await DoctorServiceAdmin.retrieve_doctors_by_hospital_admin(
-        hospital_id, db, offset, limit
+        hospital_id, db, page, limit
     )
@@ -1,8 +1,10 @@
 from typing import List
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db as db
+from app.db import get_async_db as db
+from app.core.cache import Cache
+from app.core.dependecies import cache
 from app.core.utils import ResponseHandler
 from app.services.admin.hospital import HospitalServiceAdmin
 from app.schemas.hospital import HospitalCreateAdmin, HospitalUpdateAdmin
@@ -14,35 +16,49 @@ router = APIRouter()
 # get all the hospital informations
 @router.get("/all")
 async def get_all_hospitals(
-    offset: int = None, limit: int = None, db: Session = Depends(db)
+    page: int = 1,
+    limit: int = Query(default=25, le=100),
+    db: AsyncSession = Depends(db),
 ):
-    return await HospitalServiceAdmin.retrieve_all_hospitals_admin(db, offset, limit)
+    return await HospitalServiceAdmin.retrieve_all_hospitals_admin(db, page, limit)
 
 
 # create a new hospital account /admin
 @router.post("/new", status_code=201)
-async def create_new_hospital(details: HospitalCreateAdmin, db: Session = Depends(db)):
-    return await HospitalServiceAdmin.create_hospital_account_admin(details, db)
+async def create_new_hospital(
+    details: HospitalCreateAdmin,
+    db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
+):
+    return await HospitalServiceAdmin.create_hospital_account_admin(details, db, redis)
 
 
 # retrive a hospital information /admin
 @router.get("/profile")
-async def get_hospital_informations(id: str, db: Session = Depends(db)):
+async def get_hospital_informations(id: str, db: AsyncSession = Depends(db)):
     return await HospitalServiceAdmin.get_hospital_information_admin(id, db)
 
 
 # update a hospital information /admin
 @router.put("/profile")
 async def update_hospital_informations(
-    id: str, details: HospitalUpdateAdmin, db: Session = Depends(db)
+    id: str,
+    details: HospitalUpdateAdmin,
+    db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
 ):
-    return await HospitalServiceAdmin.update_hospital_information_admin(id, details, db)
+    return await HospitalServiceAdmin.update_hospital_information_admin(
+        id, details, db, redis
+    )
 
 
 # delete hopitals using a single record id or multiple record ids
 @router.delete("/profile")
 async def delete_hospital(
-    id: str | None = None, ids: List[str] | None = None, db: Session = Depends(db)
+    id: str | None = None,
+    ids: List[str] | None = None,
+    db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
 ):
     if id and ids:
         raise ResponseHandler.no_permission(
@@ -51,8 +67,8 @@ async def delete_hospital(
 
     # delete a single health record using record id
     if id:
-        return await HospitalServiceAdmin.delete_hospital_admin(id, db)
+        return await HospitalServiceAdmin.delete_hospital_admin(id, db, redis)
 
     # delete a batch of health records using multiple ids
     if ids:
-        return await HospitalServiceAdmin.delete_hospital_batch_admin(ids, db)
+        return await HospitalServiceAdmin.delete_hospital_batch_admin(ids, db, redis)
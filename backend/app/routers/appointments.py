@@ -1,4 +1,4 @@
-from redis import Redis
+from app.core.cache import Cache
 
 from fastapi import APIRouter, Depends, Security, Query
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -23,7 +23,7 @@ async def retrieve_patient_appointments(
         scopes=["appointment:read"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve a list of appointments for the currently authenticated patient.
@@ -36,7 +36,7 @@ async def retrieve_patient_appointments(
     - limit (int): The maximum number of appointments to retrieve per page | default=10, with a maximum of 100.
     - session_user (Patient): The currently autheticated patient user with the required security scopes.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
@@ -58,7 +58,7 @@ async def create_patient_appointment(
         scopes=["appointment:write"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Create a new appointment for the currently authenticated patient.
@@ -69,7 +69,7 @@ async def create_patient_appointment(
     - appointment (AppointmentCreate): The details of the appointment to be created.
     - session_user (Patient): The currently authenticated patient user with the required security scopes.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
@@ -91,7 +91,7 @@ async def retrieve_patient_appointment_info(
         scopes=["appointment:read"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve detailed information for a specific appointment for the currently authenticated patient.
@@ -102,7 +102,7 @@ async def retrieve_patient_appointment_info(
     - id (str): The ID of the appointment to be retrieved.
     - session_user (Patient): The currently authenticated patient user with the required security scopes.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
@@ -123,7 +123,7 @@ async def update_patient_appointment_info(
         scopes=["appointment:update"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Update the information of a specific appointment for the currently authenticated patient.
@@ -135,7 +135,7 @@ async def update_patient_appointment_info(
     - payload : The details of the appointment to be updated.
     - _ (Patient): The currently authenticated patient user with the required security scopes.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
@@ -154,7 +154,7 @@ async def retrieve_patient_upcoming_appointments(
         scopes=["appointment:read"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve a list of upcoming appointments for the currently authenticated patient.
@@ -164,7 +164,7 @@ async def retrieve_patient_upcoming_appointments(
     -----------
     - session_user (Patient): The currently authenticated patient user with the required security scopes.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
@@ -1,22 +1,60 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi import APIRouter, Depends, Query, Security
+from fastapi import APIRouter, Depends, HTTPException, Query, Security
 
 from app.db import get_async_db as db
+from app.models import User
+from app.core.cache import Cache
+from app.core.security import uuid_to_base64
 from app.services.chat import ChatService
-from app.core.dependecies import include_auth
+from app.services.conversation import ConversationService
+from app.core.dependecies import cache, include_auth
 
 
 router = APIRouter()
 
 
+@router.get("/inbox")
+async def retrieve_inbox(
+    session_user: User = Security(include_auth, scopes=["users:chat"]),
+    db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
+    limit: int = Query(default=20, le=100),
+    cursor: str | None = None,
+):
+    """
+    Retrieve the direct conversations of the logged-in user, latest activity first.
+    --------------------------------------------------------------------------------
+
+    Parameters:
+    -----------
+    - session_user (User): The authenticated user, with the required scope ["users:chat"].
+    - db (AsyncSession): The asynchronous database session used for rebuilding the conversations.
+    - redis (Cache): The cache holding the inbox and the counters of the conversations.
+    - limit (int): The maximum number of conversations to retrieve per page, up to 100. Default is 20.
+    - cursor (str | None): The `next_cursor` of the previous page, omitted for the latest conversations.
+
+    Returns:
+    --------
+    - conversations: The other user, the amount of messages, the unread ones and the last message of every conversation.
+    - next_cursor: The cursor of the following page (null on the last page).
+
+    """
+
+    return await ConversationService.get_inbox(
+        db, redis, session_user.id, limit, cursor
+    )
+
+
 @router.get("/user/{user_id}")
 async def retrieve_user_help_chats(
     user_id: str,
     _=Security(include_auth, scopes=["users:chat"]),
     db: AsyncSession = Depends(db),
-    page: int = 1,
+    redis: Cache = Depends(cache),
     limit: int = Query(default=10, le=100),
+    cursor: str | None = None,
+    total: bool = False,
 ):
     """
     Retrieve help chat messages for a specific user.
@@ -27,16 +65,21 @@ async def retrieve_user_help_chats(
     - user_id (str): The unique identifier of the user whose help chat messages are to be retrieved.
     - _ (Security): The security context for the authenticated user, with the required scope ["users:chat"].
     - db (AsyncSession): The asynchronous database session used for querying the help chat messages.
-    - page (int): The page number for paginated results. Default is 1.
+    - redis (Cache): The cache holding the total amount of help chat messages.
     - limit (int): The maximum number of chat messages to retrieve per page, up to 100. Default is 10.
+    - cursor (str | None): The `next_cursor` of the previous page, omitted for the latest messages.
+    - total (bool): Whether to include the total amount of help chat messages. Default is False.
 
     Returns:
     --------
-    - A paginated list of help chat messages associated with the specified user.
+    - A page of help chat messages associated with the specified user (latest first), along w
+      the `next_cursor` of the following page (null on the last page).
 
     """
 
-    return await ChatService.get_user_help_messages(db, page, limit, user_id)
+    return await ChatService.get_user_help_messages(
+        db, redis, limit, user_id, cursor, total
+    )
 
 
 @router.get("/{user_id}/{receiver_id}")
@@ -45,8 +88,10 @@ async def retrieve_user_direct_chats(
     receiver_id: str,
     _=Security(include_auth, scopes=["users:chat"]),
     db: AsyncSession = Depends(db),
-    page: int = 1,
+    redis: Cache = Depends(cache),
     limit: int = Query(default=10, le=100),
+    cursor: str | None = None,
+    total: bool = False,
 ):
     """
     Retrieve direct chat messages between two users.
@@ -58,15 +103,55 @@ async def retrieve_user_direct_chats(
     - receiver_id (str): The unique identifier of the other user involved in the direct chat.
     - _ (Security): The security context for the authenticated user, with the required scope ["users:chat"].
     - db (AsyncSession): The asynchronous database session used for querying the direct chat messages.
-    - page (int): The page number for paginated results. Default is 1.
+    - redis (Cache): The cache holding the counters of the conversation.
     - limit (int): The maximum number of chat messages to retrieve per page, up to 100. Default is 10.
+    - cursor (str | None): The `next_cursor` of the previous page, omitted for the latest messages.
+    - total (bool): Whether to include the total amount of direct chat messages and the unread ones. Default is False.
 
     Returns:
     --------
-    - A paginated list of direct chat messages exchanged between the two users, retrieved using the `ChatService`.
+    - A page of direct chat messages exchanged between the two users (latest first), along w
+      the `next_cursor` of the following page (null on the last page).
 
     """
 
     return await ChatService.get_user_direct_messages(
-        db, page, limit, user_id, receiver_id
+        db, redis, limit, user_id, receiver_id, cursor, total
+    )
+
+
+@router.put("/{user_id}/{receiver_id}/seen")
+async def mark_direct_chats_seen(
+    user_id: str,
+    receiver_id: str,
+    session_user: User = Security(include_auth, scopes=["users:chat"]),
+    db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
+):
+    """
+    Mark the direct chat messages a user received from another user as seen.
+    -------------------------------------------------------------------------
+
+    Parameters:
+    -----------
+    - user_id (str): The unique identifier of the user who read the messages, the logged-in user only.
+    - receiver_id (str): The unique identifier of the other user involved in the direct chat.
+    - session_user (User): The authenticated user, with the required scope ["users:chat"].
+    - db (AsyncSession): The asynchronous database session used for updating the direct chat messages.
+    - redis (Cache): The cache holding the counters of the conversation.
+
+    Returns:
+    --------
+    - seen: The amount of messages marked as seen.
+
+    """
+
+    # only the receiver of the messages marks them as seen
+    if uuid_to_base64(session_user.id) != user_id:
+        raise HTTPException(
+            status_code=403, detail="messages of other users cannot be marked as seen."
+        )
+
+    return await ConversationService.mark_seen(
+        db, redis, uuid_to_base64(session_user.id), receiver_id
     )
@@ -1,4 +1,4 @@
-from redis import Redis
+from app.core.cache import Cache
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,6 +9,7 @@ from app.services.doctor.appointments import AppointmentService
 from app.services.doctor.patients import PatientService
 
 from app.core.dependecies import include_auth, cache
+from app.core.pagination import Total
 from app.db import get_async_db as db
 from app.models import Doctor
 from app.schemas.doctor import UpdateAppointment
@@ -23,12 +24,14 @@ async def retrieve_appointments(
         include_auth, scopes=["doctor:read", "doctor:update", "patient:read"]
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
     date: str | None = "latest",
     status: int = 1,
     q: str | None = None,
     page: int = 1,
     limit: int = Query(default=10, le=100),
+    cursor: str | None = None,
+    total: Total | None = None,
 ):
     """
     Retrieve a list of appointments for a specific doctor.
@@ -39,22 +42,25 @@ async def retrieve_appointments(
     - doctor_id (str): The ID of the doctor whose appointments are to be retrieved.
     - session_user (Doctor): The currently logged-in doctor (session user) with the required security scopes.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
     - date (str): The date filter to sort appointments by date | "latest" | "old" | default="None"
     - status (int): The status filter to filter appointments by their status | 1 | 2 | 3 | 4 | 5 | default=1
     - q (str): The search query to filter appointments by patient name or other criteria (case-insensitive) | default=None
     - page (int): The page number for pagination | default=1
     - limit (int): The maximum number of appointments to retrieve per page. Must be less than or equal to 100 | default=10
+    - cursor (str): The `next_cursor` of the previous page, replaces the page number | default=None
+    - total (str): How the total is computed | "exact" | "estimated" | "cached" | "none" | default=None (cached, estimated when searching)
 
     Returns:
     --------
     - total: The total number of retrieved data.
     - appointments: A list containing the retrieved appointment information.
+    - next_cursor: The cursor of the following page (null on the last page).
 
     """
 
     return await AppointmentService.get_appointments(
-        session_user, db, redis, status, date, q, page, limit
+        session_user, db, redis, status, date, q, page, limit, cursor, total
     )
 
 
@@ -65,7 +71,7 @@ async def retrieve_appointment_info(
         include_auth, scopes=["doctor:read", "doctor:update", "patient:read"]
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve detailed information for a specific appointment by its ID.
@@ -77,7 +83,7 @@ async def retrieve_appointment_info(
     - session_user (Doctor): The authenticated doctor performing the request.
       Scoped permissions ensure the user has proper access rights.
     - db (AsyncSession): The asynchronous database session for executing queries.
-    - redis (Redis): A Redis instance used for caching and optimized data retrieval.
+    - redis (Cache): A Redis cache used for caching and optimized data retrieval.
 
     Returns:
     --------
@@ -103,7 +109,7 @@ async def update_appointment_info(
         ],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     return await AppointmentService.update_info(id, session_user, db, payload, redis)
 
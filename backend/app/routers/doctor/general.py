@@ -1,4 +1,4 @@
-from redis import Redis
+from app.core.cache import Cache
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,6 +9,7 @@ from app.db import get_async_db as db
 from app.services.doctor.general import DoctorService
 from app.services.doctor.patients import PatientService
 from app.core.dependecies import include_auth, cache
+from app.core.pagination import Total
 
 
 router = APIRouter()
@@ -20,7 +21,7 @@ async def retrieve_info(
         include_auth, scopes=["doctor:read", "doctor:update"]
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve information of a specific doctor based on the current session.
@@ -30,7 +31,7 @@ async def retrieve_info(
     -----------
     - session_user (Doctor): The currently logged-in doctor (session user).
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
 
     Returns:
@@ -49,12 +50,14 @@ async def retrieve_patients(
         include_auth, scopes=["doctor:read", "doctor:update", "patient:read"]
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
     q: str | None = None,
     age: str | None = None,
     gender: str | None = None,
     page: int = 1,
     limit: int = Query(default=10, le=100),
+    cursor: str | None = None,
+    total: Total | None = None,
 ):
     """
     Retrieve a list of patients appiointed to a doctor by doctor_id.
@@ -65,22 +68,25 @@ async def retrieve_patients(
     - doctor_id (str): The ID of the doctor for whom the appointments are to be retrieved.
     - session_user (Doctor): The currently logged-in doctor (session user).
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
     - q (str): The search query to filter patients by name (case-insensitive) | default=None
     - age (str): The age filter to sort patients by age | "young" | "old" | None | default=None
     - gender (str): The gender filter to sort patients by gender | "male" | "female" | None | default=None
     - page (int): The page number for pagination.
     - limit (int): The maximum number of patients to retrieve per page.
+    - cursor (str): The `next_cursor` of the previous page, replaces the page number | default=None
+    - total (str): How the total is computed | "exact" | "estimated" | "cached" | "none" | default=None (cached, estimated when searching)
 
     Returns:
     --------
     - total: The total number of retrieved data.
-    - patients: A list containing the patient information and appointment details.
+    - patients: A list containing the patient information and appointment details (w whether they are online).
+    - next_cursor: The cursor of the following page (null on the last page).
 
     """
 
     return await PatientService.get_patients(
-        doctor_id, session_user, db, redis, q, age, gender, page, limit
+        doctor_id, session_user, db, redis, q, age, gender, page, limit, cursor, total
     )
 
 
@@ -92,6 +98,7 @@ async def retrieve_analytics(
         scopes=["doctor:read", "doctor:analytics", "doctor:update", "patient:read"],
     ),
     db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
     type: str = "week",
 ):
     """
@@ -103,6 +110,7 @@ async def retrieve_analytics(
     - doctor_id (str): The ID of the doctor whose analytics are to be retrieved.
     - session_user (Doctor): The currently logged-in doctor (session user) with the required security scopes.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
+    - redis (Cache): The Redis cache holding the analytics of each doctor and period.
     - type (str): The period type for which to retrieve the analytics ('week', 'month') | deafult='week'.
 
     Returns:
@@ -111,4 +119,4 @@ async def retrieve_analytics(
 
     """
 
-    return await DoctorService.get_analytics(doctor_id, session_user, db, type)
+    return await DoctorService.get_analytics(doctor_id, session_user, db, redis, type)
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, Security
-from redis import Redis
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Security
+from app.core.cache import Cache
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -10,6 +11,7 @@ from app.services.health import (
     HealthMonitorings,
     HealthRecordUpdate,
 )
+from app.services.readings import HealthReadings
 
 
 router = APIRouter()
@@ -22,7 +24,7 @@ async def retrieve_patient_health_record(
         scopes=["patient:read", "monitoring:read"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve the health record of the logged-in patient.
@@ -32,7 +34,7 @@ async def retrieve_patient_health_record(
     -----------
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "monitoring:read"].
     - db (AsyncSession): The asynchronous database session used for querying health record data.
-    - redis (Redis): The Redis instance used for caching to enhance performance and reduce database load.
+    - redis (Cache): The Redis cache used for caching to enhance performance and reduce database load.
 
     Returns:
     --------
@@ -51,7 +53,7 @@ async def create_patient_health_record(
         scopes=["patient:read", "monitoring:write"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Create a new health record for the logged-in patient.
@@ -62,7 +64,7 @@ async def create_patient_health_record(
     - health_records (HealthRecordUpdate): The input payload containing the details of the health record to be created.
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "monitoring:write"].
     - db (AsyncSession): The asynchronous database session used for inserting the health record into the database.
-    - redis (Redis): The Redis instance used for caching to enhance performance and synchronize data.
+    - redis (Cache): The Redis cache used for caching to enhance performance and synchronize data.
 
     Returns:
     --------
@@ -84,7 +86,7 @@ async def update_patient_health_records(
         scopes=["patient:read", "monitoring:read", "monitoring:update"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Update an existing health record for the logged-in patient.
@@ -96,7 +98,7 @@ async def update_patient_health_records(
     - id (str): The unique identifier of the health record to be updated.
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "monitoring:read", "monitoring:update"].
     - db (AsyncSession): The asynchronous database session used for updating the health record in the database.
-    - redis (Redis): The Redis instance used for caching to enhance performance and synchronize data.
+    - redis (Cache): The Redis cache used for caching to enhance performance and synchronize data.
 
     Returns:
     --------
@@ -107,3 +109,75 @@ async def update_patient_health_records(
     return await HealthMonitorings.update_health_record_by_id(
         updated_data, id, session_user, db, redis
     )
+
+
+@router.post("/readings", status_code=201)
+async def ingest_patient_health_readings(
+    request: Request,
+    session_user: Patient = Security(
+        include_auth,
+        scopes=["patient:read", "monitoring:write"],
+    ),
+    db: AsyncSession = Depends(db),
+):
+    """
+    Store a batch of timestamped readings (e.g, from a glucose sensor) of the logged-in patient.
+    -------------------------------------------------------------------------------------------
+
+    Parameters:
+    -----------
+    - request (Request): The streamed body, newline delimited json (application/x-ndjson) w one reading per line, e.g,
+      {"type": "glucose", "value": 104, "time": "2026-10-18T07:30:00Z"} or
+      {"type": "blood_pressure", "systolic": 121, "diastolic": 79, "time": 1792308600}
+    - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "monitoring:write"].
+    - db (AsyncSession): The asynchronous database session used for storing the readings.
+
+    Returns:
+    --------
+    - received: The amount of readings of the batch.
+    - stored: The amount of new readings stored (and pushed to the monitoring room).
+    - duplicates: The amount of readings that were stored already.
+
+    """
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in ("application/x-ndjson", "application/jsonl"):
+        raise HTTPException(
+            status_code=415,
+            detail="readings must be sent as newline delimited json (application/x-ndjson).",
+        )
+
+    return await HealthReadings.ingest(request.stream(), session_user, db)
+
+
+@router.get("/readings")
+async def retrieve_patient_health_readings(
+    kind: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    session_user: Patient = Security(
+        include_auth,
+        scopes=["patient:read", "monitoring:read"],
+    ),
+    db: AsyncSession = Depends(db),
+):
+    """
+    Retrieve the readings of the logged-in patient for a chart.
+    -----------------------------------------------------------
+
+    Parameters:
+    -----------
+    - kind (str): The kind of the readings, "glucose", "systolic" or "diastolic".
+    - start (datetime, optional): The start of the chart, a day before the end by default, at most `readings_chart_points` days before it.
+    - end (datetime, optional): The end of the chart (excluded), now by default.
+    - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "monitoring:read"].
+    - db (AsyncSession): The asynchronous database session used for querying the readings.
+
+    Returns:
+    --------
+    - resolution: "raw" for the readings themselves (a day at most), else the bucket size of the rollups, "5m", "1h" or "1d", the finest one keeping the chart within `readings_chart_points` points.
+    - points: The points of the chart, oldest first, each w the time (start of the bucket), mean, min, max n count of its readings.
+
+    """
+
+    return await HealthReadings.chart(session_user, db, kind, start, end)
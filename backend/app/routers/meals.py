@@ -1,4 +1,4 @@
-from redis import Redis
+from app.core.cache import Cache
 
 from fastapi import Depends, APIRouter, Query, Security
 
@@ -9,6 +9,7 @@ from app.core.dependecies import include_auth
 from app.db import get_async_db as db
 from app.core.dependecies import cache
 from app.services.meal import MealService
+from app.core.pagination import Total
 
 
 router = APIRouter()
@@ -21,11 +22,13 @@ async def retrieve_all_meals(
         scopes=["patient:read"],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
     q: str | None = None,
     page: int = 1,
     limit: int = Query(default=10, le=100),
     category: str | None = None,
+    cursor: str | None = None,
+    total: Total | None = None,
 ):
     """
     Retrieve all available meals for the logged-in patient.
@@ -35,18 +38,21 @@ async def retrieve_all_meals(
     -----------
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scope ["patient:read"].
     - db (AsyncSession): The asynchronous database session used for querying meal data.
-    - redis (Redis): The Redis instance used for caching to enhance performance and reduce database load.
+    - redis (Cache): The Redis cache used for caching to enhance performance and reduce database load.
     - q (str | None): The optional search query to filter meals by name or other criteria. Default is None.
     - page (int): The page number for paginated results. Default is 1.
     - limit (int): The maximum number of meals to retrieve per page, up to 100. Default is 10.
     - category (str | None): The optional category to filter meals by specific types. Default is None.
+    - cursor (str | None): The `next_cursor` of the previous page, replaces the page number. Default is None.
+    - total (str | None): How the total is computed, "exact", "estimated", "cached" or "none". Default is None (cached, estimated when filtering).
 
     Returns:
     --------
-    - A paginated list of meals matching the specified criteria, retrieved and processed using the appropriate services.
+    - A paginated list of meals matching the specified criteria, retrieved and processed using the appropriate services,
+      along w the `next_cursor` of the following page (null on the last page).
 
     """
 
     return await MealService.retrieve_all(
-        session_user, db, redis, q, page, limit, category
+        session_user, db, redis, q, page, limit, category, cursor, total
     )
@@ -1,4 +1,4 @@
-from redis import Redis
+from app.core.cache import Cache
 
 from fastapi import APIRouter, Depends, Security
 
@@ -23,7 +23,7 @@ async def retrieve_patient_medications(
         include_auth, scopes=["patient:read", "medication:read"]
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve a list of medications for the currently logged-in patient.
@@ -33,7 +33,7 @@ async def retrieve_patient_medications(
     -----------
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "medication:read"].
     - db (AsyncSession): The asynchronous database session used for querying and retrieving medication data.
-    - redis (Redis): The Redis instance used for caching to optimize performance and reduce database load.
+    - redis (Cache): The Redis cache used for caching to optimize performance and reduce database load.
 
     Returns:
     --------
@@ -56,7 +56,7 @@ async def generate_suggestions(
         ],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Generate medication suggestions for the logged-in patient.
@@ -67,7 +67,7 @@ async def generate_suggestions(
     - payload (GenerateMedication): The input payload containing the required data for generating medication suggestions.
     - session_user (Patient): The authenticated patient initiating the request, authorized with the required security scopes ["patient:read", "medication:read", "medication:write"].
     - db (AsyncSession): The asynchronous database session used for executing database operations.
-    - redis (Redis): The Redis instance used for caching to improve performance and reduce database load.
+    - redis (Cache): The Redis cache used for caching to improve performance and reduce database load.
 
     Returns:
     --------
@@ -85,7 +85,7 @@ async def retrieve_apponintment_medications(
         include_auth, scopes=["patient:read", "appointment:read", "medication:read"]
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve medications associated with a specific appointment ID.
@@ -96,7 +96,7 @@ async def retrieve_apponintment_medications(
     - id (str): The unique identifier of the appointment for which medications are to be retrieved.
     - _ (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "appointment:read", "medication:read"].
     - db (AsyncSession): The asynchronous database session used for executing database queries.
-    - redis (Redis): The Redis instance used for caching to enhance performance and reduce database load.
+    - redis (Cache): The Redis cache used for caching to enhance performance and reduce database load.
 
     Returns:
     --------
@@ -120,7 +120,7 @@ async def update_patient_medication(
         ],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Update medication details for the logged-in patient.
@@ -132,7 +132,7 @@ async def update_patient_medication(
     - id (str | None): The unique identifier of the medication to be updated. If not provided, a default behavior must be handled by the service.
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "medication:read", "medication:update"].
     - db (AsyncSession): The asynchronous database session used for executing update operations.
-    - redis (Redis): The Redis instance used for caching to optimize performance and reduce database load.
+    - redis (Cache): The Redis cache used for caching to optimize performance and reduce database load.
 
     Returns:
     --------
@@ -158,7 +158,7 @@ async def delete_appointment_medications(
         ],
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Delete medications associated with a specific appointment ID.
@@ -169,7 +169,7 @@ async def delete_appointment_medications(
     - id (str): The unique identifier of the appointment whose medications are to be deleted.
     - session (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "appointment:read", "medication:read", "medication:delete"].
     - db (AsyncSession): The asynchronous database session used for executing delete operations.
-    - redis (Redis): The Redis instance used for caching to improve performance and synchronize data.
+    - redis (Cache): The Redis cache used for caching to improve performance and synchronize data.
 
     Returns:
     --------
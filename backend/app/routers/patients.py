@@ -1,4 +1,4 @@
-from redis import Redis
+from app.core.cache import Cache
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, APIRouter, Depends, Security
 
@@ -17,7 +17,7 @@ router = APIRouter()
 async def retrieve_patient_profile(
     session_user: Patient = Security(include_auth, scopes=["patient:read"]),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve the profile information of the logged-in patient.
@@ -27,7 +27,7 @@ async def retrieve_patient_profile(
     -----------
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scope ["patient:read"].
     - db (AsyncSession): The asynchronous database session used for querying the patient's profile information.
-    - redis (Redis): The Redis instance used for caching to enhance performance and reduce database load.
+    - redis (Cache): The Redis cache used for caching to enhance performance and reduce database load.
 
     Returns:
     --------
@@ -45,7 +45,7 @@ async def update_patient_account_information(
         include_auth, scopes=["patient:read", "patient:update"]
     ),
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Update the account information of the logged-in patient.
@@ -56,7 +56,7 @@ async def update_patient_account_information(
     - updated_data (UserUpdate): The input payload containing the updated account information for the patient.
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "patient:update"].
     - db (AsyncSession): The asynchronous database session used for updating the patient's information in the database.
-    - redis (Redis): The Redis instance used for caching to enhance performance and synchronize data.
+    - redis (Cache): The Redis cache used for caching to enhance performance and synchronize data.
 
     Returns:
     --------
@@ -76,6 +76,7 @@ async def change_patient_account_password(
         include_auth, scopes=["patient:read", "patient:update"]
     ),
     db: AsyncSession = Depends(db),
+    redis: Cache = Depends(cache),
 ):
     """
     Change the account password for the logged-in patient.
@@ -86,6 +87,7 @@ async def change_patient_account_password(
     - updated_data (UserPasswordChange): The input payload containing the current password and the new password to be updated.
     - session_user (Patient): The authenticated patient making the request, authorized with the required security scopes ["patient:read", "patient:update"].
     - db (AsyncSession): The asynchronous database session used for updating the password in the database.
+    - redis (Cache): The Redis cache used to drop the cached session of the patient.
 
     Returns:
     --------
@@ -94,7 +96,9 @@ async def change_patient_account_password(
     """
 
     try:
-        return await PatientService.change_user_password(updated_data, session_user, db)
+        return await PatientService.change_user_password(
+            updated_data, session_user, db, redis
+        )
     except Exception:
         raise HTTPException(
             status_code=403, detail="something went wrong while changing the password."
@@ -1,10 +1,11 @@
-from redis import Redis
+from app.core.cache import Cache
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, Depends, Query
 
 from app.db import get_async_db as db
 from app.core.dependecies import cache
+from app.core.pagination import Total
 from app.services.public import DoctorService, HospitalService
 
 
@@ -15,13 +16,15 @@ router2 = APIRouter()
 @router1.get("/info")
 async def retrieve_all_doctors(
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
     q: str | None = None,
     page: int = 1,
     limit: int = Query(default=10, le=100),
     hospitals: list[str] = Query(None),
     locations: list[str] = Query(None),
     experience: int = Query(None),
+    cursor: str | None = None,
+    total: Total | None = None,
 ):
     """
     Retrieve a list of doctors with optional filters.
@@ -30,29 +33,32 @@ async def retrieve_all_doctors(
     Parameters:
     -----------
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
     - q (Optional[str]): The search query to filter doctors by name or other criteria (case-insensitive) | default=None
     - page (int): The page number for pagination | default=1
     - limit (int): The maximum number of doctors to retrieve per page. Must be less than or equal to 100 | default=10
     - hospitals (list[str]): A list of hospital names to filter doctors by their associated hospitals | default=None
     - locations (list[str]): A list of location names to filter doctors by their working locations | default=None
     - experience (int): The minimum number of years of experience to filter doctors | default=None
+    - cursor (Optional[str]): The `next_cursor` of the previous page, replaces the page number | default=None
+    - total (Optional[str]): How the total is computed | "exact" | "estimated" | "cached" | "none" | default=None (cached, estimated when filtering)
 
     Returns:
     --------
     - total: The total number of retrieved data.
     - patients: A list containing containing the retrieved doctors information.
+    - next_cursor: The cursor of the following page (null on the last page).
 
     """
 
     return await DoctorService.get_all_doctors(
-        db, redis, q, page, limit, hospitals, locations, experience
+        db, redis, q, page, limit, hospitals, locations, experience, cursor, total
     )
 
 
 @router1.get("/{id}/info")
 async def retrieve_doctor_information(
-    id: str, db: AsyncSession = Depends(db), redis: Redis = Depends(cache)
+    id: str, db: AsyncSession = Depends(db), redis: Cache = Depends(cache)
 ):
     """
     Retrieve a specific doctor information using doctor id.
@@ -62,7 +68,7 @@ async def retrieve_doctor_information(
     -----------
     - id (str): The ID of the doctor whose information is to be retrieved.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
@@ -78,8 +84,10 @@ async def retrieve_all_doctor_from_hospital(
     id: str,
     page: int = 1,
     limit: int = Query(default=10, le=100),
+    cursor: str | None = None,
+    total: Total | None = None,
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve all doctor informations of a specific hospital using hospital id.
@@ -90,13 +98,16 @@ async def retrieve_all_doctor_from_hospital(
     - id (str): The ID of the hospital whose doctors' information is to be retrieved.
     - page (int): The page number for pagination | default=1
     - limit (int): The maximum number of doctors to retrieve per page. Must be less than or equal to 100 | default=10
+    - cursor (Optional[str]): The `next_cursor` of the previous page, replaces the page number | default=None
+    - total (Optional[str]): How the total is computed | "exact" | "estimated" | "cached" | "none" | default=None (cached)
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
     - total: The total number of retrieved data.
     - doctors: A list containing the retrieved doctor information.
+    - next_cursor: The cursor of the following page (null on the last page).
 
     """
 
@@ -106,13 +117,15 @@ async def retrieve_all_doctor_from_hospital(
         redis,
         page,
         limit,
+        cursor,
+        total,
     )
 
 
 @router2.get("/tags/names")
 async def retrieve_all_names(
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve a list containing all the hospital names.
@@ -121,7 +134,7 @@ async def retrieve_all_names(
     Parameters:
     -----------
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
@@ -135,7 +148,7 @@ async def retrieve_all_names(
 @router2.get("/tags/cities")
 async def retrieve_all_locations(
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
 ):
     """
     Retrieve a list containing all the hospital locations.
@@ -144,7 +157,7 @@ async def retrieve_all_locations(
     Parameters:
     -----------
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
@@ -158,11 +171,13 @@ async def retrieve_all_locations(
 @router2.get("/info")
 async def retrieve_all_hospitals(
     db: AsyncSession = Depends(db),
-    redis: Redis = Depends(cache),
+    redis: Cache = Depends(cache),
     q: str | None = None,
     page: int = 1,
     limit: int = Query(default=10, le=100),
     locations: list[str] = Query(None),
+    cursor: str | None = None,
+    total: Total | None = None,
 ):
     """
     Retrieve a list of hospitals based on various optional search criteria.
@@ -171,25 +186,30 @@ async def retrieve_all_hospitals(
     Parameters:
     -----------
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
     - q (Optional[str]): The search query to filter hospitals by name or other criteria (case-insensitive) | default=None
     - page (int): The page number for pagination | default=1
     - limit (int): The maximum number of hospitals to retrieve per page. Must be less than or equal to 100 | default=10
     - locations (list[str]): A list of location names to filter hospitals by their locations | default=None
+    - cursor (Optional[str]): The `next_cursor` of the previous page, replaces the page number | default=None
+    - total (Optional[str]): How the total is computed | "exact" | "estimated" | "cached" | "none" | default=None (cached, estimated when filtering)
 
     Returns:
     --------
     - total: The total number of retrieved data.
     - hospitals: A list containing the retrieved hospital information.
+    - next_cursor: The cursor of the following page (null on the last page).
 
     """
 
-    return await HospitalService.get_all_hospitals(db, redis, q, page, limit, locations)
+    return await HospitalService.get_all_hospitals(
+        db, redis, q, page, limit, locations, cursor, total
+    )
 
 
 @router2.get("/{id}/info")
 async def retrieve_hospital_information(
-    id: str, db: AsyncSession = Depends(db), redis: Redis = Depends(cache)
+    id: str, db: AsyncSession = Depends(db), redis: Cache = Depends(cache)
 ):
     """
     Retrieve specific hospital information using hospital id.
@@ -199,7 +219,7 @@ async def retrieve_hospital_information(
     -----------
     - id (str): The ID of the hospital whose information is to be retrieved.
     - db (AsyncSession): The database session for executing SQL queries asynchronously.
-    - redis (Redis): The Redis instance for caching purposes.
+    - redis (Cache): The Redis cache for caching purposes.
 
     Returns:
     --------
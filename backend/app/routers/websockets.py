@@ -1,17 +1,20 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 
-from app.core.socket import WebSocketManager, socket_manager
+from app.core.cache import redis_cache
+from app.core.socket import socket_manager
 from app.core.security import base64_to_uuid, uuid_to_base64
 
 from app.models import Message
-from app.db import get_async_db as db
+from app.services.chat import help_total_key
+from app.services.conversation import ConversationService
+from app.services.message_writer import message_writer
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID, uuid4
+from functools import partial
 from datetime import datetime, timezone
 
 
 router = APIRouter()
-socket = WebSocketManager()
 
 
 @router.websocket("/monitoring/{user_id}")
@@ -33,7 +36,6 @@ async def websocket_monitoring(
 async def websocket_chatting(
     ws: WebSocket,
     user_id: str,
-    db: AsyncSession = Depends(db),
 ):
     await socket_manager.connect(ws, f"{user_id}_CHAT")
     try:
@@ -41,19 +43,22 @@ async def websocket_chatting(
             data = await ws.receive_json()
             # print(f"User Message -> , {data}", flush=True)
 
+            # Reject the messages w/o content before delivering or storing them
+            if not has_content(data):
+                reject(ws, data)
+                continue
+
             # Communication B/W Admins and Users through Help Section
             if data["type"] == "help":
                 new_help_msg_db = Message(
+                    id=message_id(data),
+                    type="help",
                     sender_id=base64_to_uuid(user_id),
                     content=data["content"],
+                    is_seen=False,
                     created_at=datetime.now(timezone.utc),
                 )
 
-                # Store messages to database
-                db.add(new_help_msg_db)
-                await db.commit()
-                await db.refresh(new_help_msg_db)
-
                 new_help_msg = serialized_data(new_help_msg_db)
 
                 # Broadcast the message data to the admins
@@ -61,25 +66,30 @@ async def websocket_chatting(
                 # Broadcast the message data to User as well
                 await socket_manager.send_private_msg(f"{user_id}_CHAT", new_help_msg)
 
+                # Store the message in the background, acknowledged once stored
+                await message_writer.submit(
+                    new_help_msg_db,
+                    acknowledgement(
+                        ws,
+                        new_help_msg,
+                        partial(redis_cache.delete, help_total_key(user_id)),
+                    ),
+                )
+
             # Communication B/W Patient and Doctor
             if data["type"] == "direct":
                 new_direct_msg_db = Message(
+                    id=message_id(data),
                     type="direct",
                     sender_id=base64_to_uuid(user_id),
                     receiver_id=base64_to_uuid(data["receiver_id"]),
                     content=data["content"],
+                    is_seen=False,
                     created_at=datetime.now(timezone.utc),
                 )
 
-                # Store messages to database
-                db.add(new_direct_msg_db)
-                await db.commit()
-                await db.refresh(new_direct_msg_db)
-
                 new_direct_msg = serialized_data(new_direct_msg_db)
 
-                print(f"User Message -> , {new_direct_msg}", flush=True)
-
                 # Broadcast the message data to the doctor (receiver)
                 await socket_manager.send_private_msg(
                     f"{data["receiver_id"]}_CHAT", new_direct_msg
@@ -87,6 +97,21 @@ async def websocket_chatting(
                 # Broadcast the message data to the User (sender) as well
                 await socket_manager.send_private_msg(f"{user_id}_CHAT", new_direct_msg)
 
+                # Store the message in the background, counted in the summary of the
+                # conversation n acknowledged once stored
+                await message_writer.submit(
+                    new_direct_msg_db,
+                    acknowledgement(
+                        ws,
+                        new_direct_msg,
+                        partial(
+                            ConversationService.record_message,
+                            redis_cache,
+                            new_direct_msg,
+                        ),
+                    ),
+                )
+
     except WebSocketDisconnect:
         socket_manager.disconnect(ws, f"{user_id}_CHAT")
         print(f"User #{user_id} left the help room.")
@@ -112,7 +137,6 @@ async def websocket_appoinment_requests(
 @router.websocket("/admin/help")
 async def admin_websocket(
     ws: WebSocket,
-    db: AsyncSession = Depends(db),
 ):
     await socket_manager.connect(ws)
     try:
@@ -120,20 +144,22 @@ async def admin_websocket(
             data = await ws.receive_json()
             # print(f"Admin Messages -> {data}", flush=True)
 
+            # Reject the messages w/o content before delivering or storing them
+            if not has_content(data):
+                reject(ws, data)
+                continue
+
             # handle admin replies
             if data["type"] == "reply":
                 new_reply_msg_db = Message(
+                    id=message_id(data),
                     type="reply",
                     sender_id=base64_to_uuid(data["user_id"]),
                     content=data["content"],
+                    is_seen=False,
                     created_at=datetime.now(timezone.utc),
                 )
 
-                # Store messages to database
-                db.add(new_reply_msg_db)
-                await db.commit()
-                await db.refresh(new_reply_msg_db)
-
                 new_reply_msg = serialized_data(new_reply_msg_db)
 
                 # Broadcast the message data to User
@@ -143,6 +169,16 @@ async def admin_websocket(
                 # Broadcast the message data to the admins as well
                 await socket_manager.broadcast_to_admins(new_reply_msg)
 
+                # Store the message in the background, acknowledged once stored
+                await message_writer.submit(
+                    new_reply_msg_db,
+                    acknowledgement(
+                        ws,
+                        new_reply_msg,
+                        partial(redis_cache.delete, help_total_key(data["user_id"])),
+                    ),
+                )
+
     except WebSocketDisconnect:
         socket_manager.disconnect(ws)
 
@@ -153,6 +189,44 @@ def get_original_room_id(room_id: str, suffix: str | None ="_CHAT") -> str:
     return ""
 
 
+# Id of a new message, generated by the client (uuid or base64 string) if sent
+def message_id(data: dict) -> UUID:
+    if client_id := data.get("id"):
+        try:
+            return UUID(client_id)
+        except (ValueError, TypeError, AttributeError):
+            pass
+        try:
+            return base64_to_uuid(client_id)
+        except HTTPException:
+            pass
+    return uuid4()
+
+
+def has_content(data: dict) -> bool:
+    return isinstance(data.get("content"), str) and bool(data["content"].strip())
+
+
+# Acknowledge a message to its sender as rejected (never delivered nor stored)
+def reject(ws: WebSocket, data: dict):
+    socket_manager.send_personal_msg(
+        ws,
+        {"type": "ack", "id": uuid_to_base64(message_id(data)), "status": "rejected"},
+    )
+
+
+# Acknowledge a message to its sender once stored, after updating the counters
+def acknowledgement(ws: WebSocket, msg: dict, on_stored=None):
+    async def acknowledge(status: str):
+        if status == "stored" and on_stored is not None:
+            await on_stored()
+        socket_manager.send_personal_msg(
+            ws, {"type": "ack", "id": msg["id"], "status": status}
+        )
+
+    return acknowledge
+
+
 def serialized_data(msg: Message):
     data = {
         "type": msg.type,
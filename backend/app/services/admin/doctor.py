@@ -1,25 +1,36 @@
-from fastapi import HTTPException, Query
-from sqlalchemy.orm import Session, joinedload, defer
-from sqlalchemy import func
+from fastapi import HTTPException
+from sqlalchemy.orm import joinedload, defer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
 
-from app.core.security import decrypt, generate_hash
+from app.core.security import decrypt, generate_hash, forget_principal
+from app.core.cache import Cache
 from app.models import User, Doctor, Hospital
 from app.core.utils import ResponseHandler
 from app.schemas.doctor import DoctorCreateAdmin, DoctorUpdateAdmin, DoctorResponse
 
 
+# exclude the password n eagerly load the essential hospital information
+doctor_options = [
+    defer(Doctor.password),
+    joinedload(Doctor.hospital).load_only(
+        Hospital.id, Hospital.name, Hospital.city, Hospital.address
+    ),
+]
+
+
 class DoctorServiceAdmin:
     # create a new doctor account /admin
     @staticmethod
     async def new_doctor_account_admin(
-        details: DoctorCreateAdmin, hospital_id: str, db: Session
+        details: DoctorCreateAdmin, hospital_id: str, db: AsyncSession
     ):
-        hospital = db.query(Hospital).where(Hospital.id == hospital_id).first()
+        hospital = await db.get(Hospital, hospital_id)
 
         if not hospital:
             raise ResponseHandler.not_found_error(f"hospital not found - {hospital_id}")
 
-        exits = db.query(Doctor).where(Doctor.email == details.email).first()
+        exits = await db.scalar(select(User.id).where(User.email == details.email))
 
         # check if the doctor account already exists
         if exits:
@@ -50,8 +61,8 @@ class DoctorServiceAdmin:
         new_doctor = Doctor(**payload)
 
         db.add(new_doctor)
-        db.commit()
-        db.refresh(new_doctor)
+        await db.commit()
+        await db.refresh(new_doctor)
 
         return {
             "status": "successful",
@@ -60,45 +71,31 @@ class DoctorServiceAdmin:
 
     # retrieve all doctor accounts  /admin
     @staticmethod
-    async def retrieve_all_doctors_admin(
-        db: Session,
-        offset: int = 0,
-        # this way it adds a layer of constraint, asking the parameter either be 100 or less than 100
-        limit: int = Query(default=100, le=100),
-    ):
-        doctors = (
-            db.query(Doctor)
+    async def retrieve_all_doctors_admin(db: AsyncSession, page: int, limit: int):
+        page = max(1, page)  # allow page only to be greater than 1
+        offset = (page - 1) * limit  # calcuate offset based on page and limit
+
+        total = await db.scalar(select(func.count(Doctor.id)))
+        result = await db.execute(
+            select(Doctor)
+            .options(*doctor_options)
+            .order_by(Doctor.name)
             .offset(offset)
             .limit(limit)
-            .options(
-                defer(Doctor.password),
-                joinedload(Doctor.hospital).load_only(
-                    Hospital.id, Hospital.name, Hospital.city, Hospital.address
-                ),
-            )
-            .all()
         )
+        doctors = result.scalars().all()
 
         return {
             "status": "successful",
             "message": "successfully fetched all doctors!",
+            "total": total,
             "data": doctors,
         }
 
     # get doctor information using doctor id /admin
     @staticmethod
-    async def get_doctor_information_admin(doctor_id: str, db: Session):
-        doctor = (
-            db.query(Doctor)
-            .where(Doctor.id == doctor_id)
-            .options(
-                defer(Doctor.password),
-                joinedload(Doctor.hospital).load_only(
-                    Hospital.id, Hospital.name, Hospital.city, Hospital.address
-                ),
-            )
-            .first()
-        )
+    async def get_doctor_information_admin(doctor_id: str, db: AsyncSession):
+        doctor = await db.get(Doctor, doctor_id, options=doctor_options)
 
         if not doctor:
             raise ResponseHandler.not_found_error(f"doctor not found - {doctor_id}")
@@ -112,9 +109,9 @@ class DoctorServiceAdmin:
     # update doctor information using doctor id /admin
     @staticmethod
     async def update_doctor_information_admin(
-        doctor_id: str, details: DoctorUpdateAdmin, db: Session
+        doctor_id: str, details: DoctorUpdateAdmin, db: AsyncSession, redis: Cache
     ):
-        doctor = db.query(Doctor).where(Doctor.id == doctor_id).first()
+        doctor = await db.get(Doctor, doctor_id, options=doctor_options)
 
         # check if the doctor exists
         if not doctor:
@@ -142,56 +139,58 @@ class DoctorServiceAdmin:
         }
 
         if user_payload:
-            db.query(User).where(User.id == doctor.id).update(user_payload)
+            await db.execute(
+                update(User).where(User.id == doctor.id).values(user_payload)
+            )
 
         if doctor_payload:
-            db.query(Doctor).where(Doctor.id == doctor.id).update(doctor_payload)
+            await db.execute(
+                update(Doctor).where(Doctor.id == doctor.id).values(doctor_payload)
+            )
 
-        db.commit()
-        db.refresh(doctor)
+        await db.commit()
 
-        doctor_informations = (
-            db.query(Doctor)
+        # drop the cached session snapshot of the doctor
+        await forget_principal(redis, doctor_id)
+
+        # reload the doctor along w the (possibly changed) hospital
+        doctor_informations = await db.scalar(
+            select(Doctor)
             .where(Doctor.id == doctor_id)
-            .options(
-                defer(Doctor.password),
-                joinedload(Doctor.hospital).load_only(
-                    Hospital.id, Hospital.name, Hospital.city, Hospital.address
-                ),
-            )
-            .first()
+            .options(*doctor_options)
+            .execution_options(populate_existing=True)
         )
 
         return {
             "status": "successful",
-            "message": f"successfully updated doctor information - {doctor.id}",
+            "message": f"successfully updated doctor information - {doctor_id}",
             "data": doctor_informations,
         }
 
     # retrieve doctor accounts by hospital id /admin
     @staticmethod
     async def retrieve_doctors_by_hospital_admin(
-        hospital_id: str,
-        db: Session,
-        offset: int = 0,
-        limit: int = Query(default=25, le=100),
+        hospital_id: str, db: AsyncSession, page: int, limit: int
     ):
-        doctors = (
-            db.query(Doctor)
+        page = max(1, page)  # allow page only to be greater than 1
+        offset = (page - 1) * limit  # calcuate offset based on page and limit
+
+        total = await db.scalar(
+            select(func.count(Doctor.id)).where(Doctor.hospital_id == hospital_id)
+        )
+        result = await db.execute(
+            select(Doctor)
             .where(Doctor.hospital_id == hospital_id)
+            .options(*doctor_options)
+            .order_by(Doctor.name)
             .offset(offset)
             .limit(limit)
-            .options(
-                defer(Doctor.password),
-                joinedload(Doctor.hospital).load_only(
-                    Hospital.id, Hospital.name, Hospital.city, Hospital.address
-                ),
-            )
-            .all()
         )
+        doctors = result.scalars().all()
 
         return {
             "status": "successful",
             "message": f"successfully fetched all doctors from hospital - {hospital_id}",
+            "total": total,
             "data": doctors,
         }
@@ -1,8 +1,8 @@
-from fastapi import HTTPException, Query
+from fastapi import HTTPException
 from typing import List
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update, delete
 
 from app.models import Patient, HealthRecord
 from app.core.utils import ResponseHandler
@@ -15,33 +15,36 @@ class HealthMonitoringsAdmin:
     # retrive all the patient health records /admin
     @staticmethod
     async def retrieve_all_health_records_admin(
-        db: Session,
-        offset: int = 0,
-        # this way it adds a layer of constraint, asking the parameter either be 100 or less than 100
-        limit: int = Query(default=25, le=100),
+        db: AsyncSession, page: int, limit: int
     ):
-        health_records = db.query(HealthRecord).offset(offset).limit(limit).all()
+        page = max(1, page)  # allow page only to be greater than 1
+        offset = (page - 1) * limit  # calcuate offset based on page and limit
+
+        total = await db.scalar(select(func.count(HealthRecord.id)))
+        result = await db.execute(
+            select(HealthRecord)
+            .order_by(HealthRecord.created_at.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        health_records = result.scalars().all()
 
         return {
             "status": "successful",
             "message": "successfully fetched all health records!",
+            "total": total,
             "data": health_records,
         }
 
     # retrive patient health record using patient id /admin
     @staticmethod
-    async def get_patient_health_record_admin(patient_id: str, db: Session):
-        patient = db.query(Patient).where(Patient.id == patient_id).first()
+    async def get_patient_health_record_admin(patient_id: str, db: AsyncSession):
+        await retrieve_patient_id(patient_id, db)
 
-        # check if the patient exists
-        if not patient:
-            raise ResponseHandler.not_found_error(
-                f"patient does not exists - {patient_id}"
-            )
-
-        health_records = (
-            db.query(HealthRecord).where(HealthRecord.patient_id == patient_id).all()
+        result = await db.execute(
+            select(HealthRecord).where(HealthRecord.patient_id == patient_id)
         )
+        health_records = result.scalars().all()
 
         return {
             "status": "successful",
@@ -52,15 +55,9 @@ class HealthMonitoringsAdmin:
     # create patient health record using patient id /admin
     @staticmethod
     async def create_patient_health_record_admin(
-        patient_id: str, details: HealthRecordUpdateAdmin, db: Session
+        patient_id: str, details: HealthRecordUpdateAdmin, db: AsyncSession
     ):
-        patient = db.query(Patient).where(Patient.id == patient_id).first()
-
-        # check if the patient exists
-        if not patient:
-            raise ResponseHandler.not_found_error(
-                f"patient does not exists - {patient_id}"
-            )
+        patient_uuid = await retrieve_patient_id(patient_id, db)
 
         # custom error for empty body
         if details.is_empty():
@@ -69,7 +66,7 @@ class HealthMonitoringsAdmin:
                 detail=f"creating health record failed, no field was provided - {patient_id}",
             )
 
-        payload = {"patient_id": patient.id, **details.none_excluded()}
+        payload = {"patient_id": patient_uuid, **details.none_excluded()}
 
         # calculate the bmi from with the weight n height
         if details.height and details.weight:
@@ -79,8 +76,8 @@ class HealthMonitoringsAdmin:
         db_health_record = HealthRecord(**payload)
 
         db.add(db_health_record)
-        db.commit()
-        db.refresh(db_health_record)
+        await db.commit()
+        await db.refresh(db_health_record)
 
         return {
             "status": "successful",
@@ -91,11 +88,9 @@ class HealthMonitoringsAdmin:
     # update patient health record using record id /admin
     @staticmethod
     async def update_patient_health_record_admin(
-        record_id: str, details: HealthRecordUpdateAdmin, db: Session
+        record_id: str, details: HealthRecordUpdateAdmin, db: AsyncSession
     ):
-        health_record = (
-            db.query(HealthRecord).where(HealthRecord.id == record_id).first()
-        )
+        health_record = await db.get(HealthRecord, record_id)
 
         # check if health record exists
         if not health_record:
@@ -118,11 +113,13 @@ class HealthMonitoringsAdmin:
             height_meters = details.height * 0.3048
             updated_payload["bmi"] = round(details.weight / (height_meters**2), 2)
 
-        db.query(HealthRecord).where(HealthRecord.id == health_record.id).update(
-            updated_payload
+        await db.execute(
+            update(HealthRecord)
+            .where(HealthRecord.id == health_record.id)
+            .values(updated_payload)
         )
-        db.commit()
-        db.refresh(health_record)
+        await db.commit()
+        await db.refresh(health_record)
 
         return {
             "status": "successful",
@@ -131,16 +128,21 @@ class HealthMonitoringsAdmin:
         }
 
     # delete patient health record using record id /admin
-    async def delete_patient_health_record_admin(record_id: str, db: Session):
-        targeted_health_record = (
-            db.query(HealthRecord).where(HealthRecord.id == record_id).first()
+    @staticmethod
+    async def delete_patient_health_record_admin(record_id: str, db: AsyncSession):
+        # delete the health record w a single statement
+        deleted = await db.scalar(
+            delete(HealthRecord)
+            .where(HealthRecord.id == record_id)
+            .returning(HealthRecord.id)
         )
 
-        if not targeted_health_record:
-            raise ResponseHandler.not_found_error(f"user-{id} not found!")
+        if not deleted:
+            raise ResponseHandler.not_found_error(
+                f"health record does not exists - {record_id}"
+            )
 
-        db.delete(targeted_health_record)
-        db.commit()
+        await db.commit()
 
         return {
             "status": "successful",
@@ -149,14 +151,18 @@ class HealthMonitoringsAdmin:
 
     # delete a batch of user accounts /admin
     @staticmethod
-    async def delete_patient_health_record_batch_admin(ids: List[str], db: Session):
-        # get the target health records
-        targeted_health_records = (
-            db.query(HealthRecord).filter(HealthRecord.id.in_(ids)).all()
+    async def delete_patient_health_record_batch_admin(
+        ids: List[str], db: AsyncSession
+    ):
+        # delete the targeted health records w a single statement
+        result = await db.execute(
+            delete(HealthRecord)
+            .where(HealthRecord.id.in_(ids))
+            .returning(HealthRecord.id)
         )
 
         # get the missing ids if there is any
-        existing_ids = [str(user.id) for user in targeted_health_records]
+        existing_ids = [str(record_id) for record_id in result.scalars().all()]
         missing_ids = list(set(ids) - set(existing_ids))
         missing_message = None
 
@@ -166,11 +172,7 @@ class HealthMonitoringsAdmin:
                 "health record " + ", ".join(missing_ids) + " has not been found!"
             )
 
-        # delete the targeted health records
-        db.query(HealthRecord).filter(HealthRecord.id.in_(ids)).delete(
-            synchronize_session=False
-        )
-        db.commit()
+        await db.commit()
 
         # custom message when some of the ids are missing
         if len(missing_ids) > 0:
@@ -185,3 +187,13 @@ class HealthMonitoringsAdmin:
         )
 
         return {"status": "successful", "message": custom_message}
+
+
+# check if the patient exists (without loading the whole patient)
+async def retrieve_patient_id(patient_id: str, db: AsyncSession):
+    patient_uuid = await db.scalar(select(Patient.id).where(Patient.id == patient_id))
+
+    if not patient_uuid:
+        raise ResponseHandler.not_found_error(f"patient does not exists - {patient_id}")
+
+    return patient_uuid
@@ -1,8 +1,9 @@
 from typing import List
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from fastapi import Query, HTTPException
+from sqlalchemy import func, select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
 from app.core.utils import ResponseHandler
+from app.core.cache import Cache
 from app.schemas.hospital import HospitalCreateAdmin, HospitalUpdateAdmin
 
 
@@ -12,12 +13,17 @@ from app.models import Hospital
 class HospitalServiceAdmin:
     # create a new patient account /admin
     @staticmethod
-    async def create_hospital_account_admin(details: HospitalCreateAdmin, db: Session):
+    async def create_hospital_account_admin(
+        details: HospitalCreateAdmin, db: AsyncSession, redis: Cache
+    ):
         new_hospital = Hospital(**details.model_dump())
 
         db.add(new_hospital)
-        db.commit()
-        db.refresh(new_hospital)
+        await db.commit()
+        await db.refresh(new_hospital)
+
+        # drop the cached hospital names, locations and pages of every worker
+        await redis.invalidate("hospitals")
 
         return {
             "status": "successful",
@@ -26,24 +32,27 @@ class HospitalServiceAdmin:
 
     # retrieve all hospital informations /admin
     @staticmethod
-    async def retrieve_all_hospitals_admin(
-        db: Session,
-        offset: int = 0,
-        # this way it adds a layer of constraint, asking the parameter either be 100 or less than 100
-        limit: int = Query(default=100, le=100),
-    ):
-        hospitals = db.query(Hospital).offset(offset).limit(limit).all()
+    async def retrieve_all_hospitals_admin(db: AsyncSession, page: int, limit: int):
+        page = max(1, page)  # allow page only to be greater than 1
+        offset = (page - 1) * limit  # calcuate offset based on page and limit
+
+        total = await db.scalar(select(func.count(Hospital.id)))
+        result = await db.execute(
+            select(Hospital).order_by(Hospital.name).offset(offset).limit(limit)
+        )
+        hospitals = result.scalars().all()
 
         return {
             "status": "successful",
             "message": "successfully fetched all hospitals!",
+            "total": total,
             "data": hospitals,
         }
 
     # get hospital information using id /admin
     @staticmethod
-    async def get_hospital_information_admin(id: str, db: Session):
-        hospital = db.query(Hospital).where(Hospital.id == id).first()
+    async def get_hospital_information_admin(id: str, db: AsyncSession):
+        hospital = await db.get(Hospital, id)
 
         if not hospital:
             raise ResponseHandler.not_found_error(f"hospital not found - {id}")
@@ -57,9 +66,9 @@ class HospitalServiceAdmin:
     # update hospital information using id /admin
     @staticmethod
     async def update_hospital_information_admin(
-        id: str, details: HospitalUpdateAdmin, db: Session
+        id: str, details: HospitalUpdateAdmin, db: AsyncSession, redis: Cache
     ):
-        hospital = db.query(Hospital).where(Hospital.id == id).first()
+        hospital = await db.get(Hospital, id)
 
         # if no patient found
         if not hospital:
@@ -74,10 +83,13 @@ class HospitalServiceAdmin:
 
         # update the hospital information
         payload = {"updated_at": func.now(), **details.none_excluded()}
-        db.query(Hospital).where(Hospital.id == id).update(payload)
+        await db.execute(update(Hospital).where(Hospital.id == id).values(payload))
+
+        await db.commit()
+        await db.refresh(hospital)
 
-        db.commit()
-        db.refresh(hospital)
+        # drop the cached hospital names, locations and pages of every worker
+        await redis.invalidate("hospitals")
 
         return {
             "status": "successful",
@@ -87,14 +99,19 @@ class HospitalServiceAdmin:
 
     # delete hospital using hospital id /admin
     @staticmethod
-    async def delete_hospital_admin(id: str, db: Session):
-        targeted_hospital = db.query(Hospital).where(Hospital.id == id).first()
+    async def delete_hospital_admin(id: str, db: AsyncSession, redis: Cache):
+        # delete the hospital w a single statement
+        deleted = await db.scalar(
+            delete(Hospital).where(Hospital.id == id).returning(Hospital.id)
+        )
 
-        if not targeted_hospital:
+        if not deleted:
             raise ResponseHandler.not_found_error(f"hospital not found - {id}")
 
-        db.delete(targeted_hospital)
-        db.commit()
+        await db.commit()
+
+        # drop the cached hospital names, locations and pages of every worker
+        await redis.invalidate("hospitals")
 
         return {
             "status": "successful",
@@ -103,11 +120,16 @@ class HospitalServiceAdmin:
 
     # delete a batch of user accounts /admin
     @staticmethod
-    async def delete_hospital_batch_admin(ids: List[str], db: Session):
-        targeted_hospitals = db.query(Hospital).filter(Hospital.id.in_(ids)).all()
+    async def delete_hospital_batch_admin(
+        ids: List[str], db: AsyncSession, redis: Cache
+    ):
+        # delete the targeted hospitals w a single statement
+        result = await db.execute(
+            delete(Hospital).where(Hospital.id.in_(ids)).returning(Hospital.id)
+        )
 
         # get the missing ids if there is any
-        existing_ids = [str(hospital.id) for hospital in targeted_hospitals]
+        existing_ids = [str(hospital_id) for hospital_id in result.scalars().all()]
         missing_ids = list(set(ids) - set(existing_ids))
         missing_message = None
 
@@ -117,11 +139,10 @@ class HospitalServiceAdmin:
                 "hospital " + ", ".join(missing_ids) + " has not been found!"
             )
 
-        # delete the targeted hospitals
-        db.query(Hospital).filter(Hospital.id.in_(ids)).delete(
-            synchronize_session=False
-        )
-        db.commit()
+        await db.commit()
+
+        # drop the cached hospital names, locations and pages of every worker
+        await redis.invalidate("hospitals")
 
         # custom message when some of the ids are missing
         if len(missing_ids) > 0:
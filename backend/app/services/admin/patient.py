@@ -1,13 +1,16 @@
-from sqlalchemy.orm import Session, defer
-from fastapi import HTTPException, Query
-from sqlalchemy import func
+from sqlalchemy.orm import defer
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
 from app.core.utils import ResponseHandler
+from app.core.cache import Cache
 
 
 from app.models import User, Patient
 from app.core.security import (
     decrypt,
     generate_hash,
+    forget_principal,
 )
 from app.schemas.users import (
     PatientCreateAdmin,
@@ -19,32 +22,33 @@ from app.schemas.users import (
 class PatientServiceAdmin:
     # retrieve all patient informations
     @staticmethod
-    async def retrieve_all_patients_admin(
-        db: Session,
-        offset: int = 0,
-        # this way it adds a layer of constraint, asking the parameter either be 100 or less than 100
-        limit: int = Query(default=100, le=100),
-    ):
-        patients = (
-            db.query(Patient)
+    async def retrieve_all_patients_admin(db: AsyncSession, page: int, limit: int):
+        page = max(1, page)  # allow page only to be greater than 1
+        offset = (page - 1) * limit  # calcuate offset based on page and limit
+
+        total = await db.scalar(select(func.count(Patient.id)))
+        result = await db.execute(
+            select(Patient)
+            .options(defer(Patient.password))
+            .order_by(Patient.created_at.desc())
             .offset(offset)
             .limit(limit)
-            .options(defer(Patient.password))
-            .all()
         )
+        patients = result.scalars().all()
 
         return {
             "status": "successful",
             "message": "successfully fetched all patients!",
+            "total": total,
             "data": patients,
         }
 
     # create a new patient account /admin
     @staticmethod
     async def create_patient_account_admin(
-        patient_data: PatientCreateAdmin, db: Session
+        patient_data: PatientCreateAdmin, db: AsyncSession
     ):
-        exits = db.query(User).where(User.email == patient_data.email).first()
+        exits = await db.scalar(select(User.id).where(User.email == patient_data.email))
 
         # check if the user exists
         if exits:
@@ -66,8 +70,8 @@ class PatientServiceAdmin:
         new_patient = Patient(**payload)
 
         db.add(new_patient)
-        db.commit()
-        db.refresh(new_patient)
+        await db.commit()
+        await db.refresh(new_patient)
 
         return {
             "status": "successful",
@@ -76,8 +80,8 @@ class PatientServiceAdmin:
 
     # get patient information using id /admin
     @staticmethod
-    async def get_patient_information_admin(id: str, db: Session):
-        patient = db.query(Patient).where(Patient.id == id).first()
+    async def get_patient_information_admin(id: str, db: AsyncSession):
+        patient = await db.get(Patient, id, options=[defer(Patient.password)])
 
         if not patient:
             raise ResponseHandler.not_found_error(f"patient not found - {id}")
@@ -103,9 +107,9 @@ class PatientServiceAdmin:
     # update patient information using id /admin
     @staticmethod
     async def update_patient_information_admin(
-        id: str, details: PatientUpdateAdmin, db: Session
+        id: str, details: PatientUpdateAdmin, db: AsyncSession, redis: Cache
     ):
-        patient = db.query(Patient).where(Patient.id == id).first()
+        patient = await db.get(Patient, id, options=[defer(Patient.password)])
 
         # if no patient found
         if not patient:
@@ -133,13 +137,18 @@ class PatientServiceAdmin:
         }
 
         if user_payload:
-            db.query(User).where(User.id == id).update(user_payload)
+            await db.execute(update(User).where(User.id == id).values(user_payload))
 
         if patient_payload:
-            db.query(Patient).where(Patient.id == id).update(patient_payload)
+            await db.execute(
+                update(Patient).where(Patient.id == id).values(patient_payload)
+            )
+
+        await db.commit()
+        await db.refresh(patient)
 
-        db.commit()
-        db.refresh(patient)
+        # drop the cached session snapshot of the patient
+        await forget_principal(redis, patient.id)
 
         return {
             "status": "successful",
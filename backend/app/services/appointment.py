@@ -1,7 +1,3 @@
-import json
-
-from redis import Redis
-
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import HTTPException
 
@@ -13,14 +9,11 @@ from app.models import Patient, Appointment, Doctor, Hospital
 from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
 
 from app.core.security import base64_to_uuid, uuid_to_base64
+from app.core.cache import Cache
 from app.core.utils import ResponseHandler
 from app.core.socket import socket_manager
-
-
-# Upcoming appointment function helper for redis (DRY)
-def get_data_from_redis(redis: Redis, redis_key: str):
-    if cached_result := redis.get(redis_key):
-        return json.loads(cached_result)
+from app.services.serial import SerialService
+from app.services.doctor.analytics import DoctorAnalytics, stale_analytics_keys
 
 
 class AppointmentService:
@@ -30,19 +23,19 @@ class AppointmentService:
         appointment: AppointmentCreate,
         session_user: Patient,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
     ):
         request_room_id = f"{appointment.doctor_id}_RA"
         appointment.doctor_id = base64_to_uuid(appointment.doctor_id)
 
-        # get the next serial number
-        serial_number = (
-            await db.execute(select(func.max(Appointment.serial_number)))
-        ).scalar()
+        # allocate the next serial number of the doctor on that day
+        serial_number = await SerialService.next_serial(
+            appointment.doctor_id, appointment.appointment_date, db
+        )
 
         payload = {
             "patient_id": session_user.id,
-            "serial_number": (serial_number or 0) + 1,
+            "serial_number": serial_number,
             **appointment.none_excluded(),
         }
 
@@ -81,35 +74,30 @@ class AppointmentService:
         )
 
         # store the appointment information into redis caching
-        appointment_data_json = json.dumps(jsonable_encoder(new_appointment_data))
-        redis.set(
+        await redis.set(
             f"{patient_appointments_key}:{uuid_to_base64(appointment_info.id)}",
-            appointment_data_json,
+            jsonable_encoder(new_appointment_data),
             3600,
         )
 
         # delete previous stored appointment records from the cache
-        count_key = f"{patient_appointments_key}:total"
-        upcoming_key = f"{patient_appointments_key}:upcoming"
-        redis_keys = redis.keys(f"{patient_appointments_key}:page:*")
-        redis_keys.extend([count_key, upcoming_key])
-
-        if redis_keys:
-            redis.delete(*redis_keys)
+        await redis.invalidate(
+            f"patient:{uuid_to_base64(appointment_info.patient_id)}"
+        )
 
         return new_appointment_data
 
     # Retrieve detailed information for a specific appointment for the currently authenticated patient.
     @staticmethod
     async def get_appointment_by_id(
-        id: str, session_user: Patient, db: AsyncSession, redis: Redis
+        id: str, session_user: Patient, db: AsyncSession, redis: Cache
     ):
         appointment_id = base64_to_uuid(id)
         redis_key = f"patients:appointments:{uuid_to_base64(session_user.id)}:{id}"
 
         # retrieve appointment information from redis if exists
-        if cached_appointment_info := redis.get(redis_key):
-            return json.loads(cached_appointment_info)
+        if (cached_appointment_info := await redis.get(redis_key)) is not None:
+            return cached_appointment_info
 
         # query the appointment data w specific info
         query = (
@@ -134,24 +122,18 @@ class AppointmentService:
         appointment_info_data = appointment_data(appointment_info)
 
         # convert the data into json and set the data into redis caching
-        appointment_data_json = json.dumps(jsonable_encoder(appointment_info_data))
-        redis.set(
-            redis_key,
-            appointment_data_json,
-            3600,
-        )
+        await redis.set(redis_key, jsonable_encoder(appointment_info_data), 3600)
 
         return appointment_info_data
 
     # Retrieve a list of upcoming appointments for the currently authenticated patient.
     @staticmethod
     async def get_upcoming_appointments(
-        session_user: Patient, db: AsyncSession, redis: Redis
+        session_user: Patient, db: AsyncSession, redis: Cache
     ):
-        upcoming_key = (
-            f"patients:appointments:{uuid_to_base64(session_user.id)}:upcoming"
-        )
-        cached_upcoming_appointments = get_data_from_redis(redis, upcoming_key)
+        patient_id = uuid_to_base64(session_user.id)
+        upcoming_key = f"patients:appointments:{patient_id}:upcoming"
+        cached_upcoming_appointments = await redis.get(upcoming_key)
         if cached_upcoming_appointments:
             return cached_upcoming_appointments
 
@@ -182,10 +164,12 @@ class AppointmentService:
         ]
 
         # store upcoming appointments into redis
-        upcoming_appointments_json = json.dumps(
-            jsonable_encoder(upcoming_appointments_data)
+        await redis.set(
+            upcoming_key,
+            jsonable_encoder(upcoming_appointments_data),
+            3600,
+            tags=[f"patient:{patient_id}"],
         )
-        redis.set(upcoming_key, upcoming_appointments_json, 3600)
 
         return upcoming_appointments_data
 
@@ -197,7 +181,7 @@ class AppointmentService:
         limit: int,
         patient: Patient,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
     ):
         query = select(Appointment)
         count = (
@@ -212,18 +196,17 @@ class AppointmentService:
 
         filter_args = []
 
-        patient_appointments_key = f"patients:appointments:{uuid_to_base64(patient.id)}"
+        patient_id = uuid_to_base64(patient.id)
+        patient_appointments_key = f"patients:appointments:{patient_id}"
         redis_key = f"{patient_appointments_key}:page:{page}"
         redis_key_total = f"{patient_appointments_key}:total"
 
         # Load result from redis caching if already stored
         if (
-            (cached_appointments := redis.get(redis_key))
-            and (cached_appointments_total := redis.get(redis_key_total))
-            and (q is None)
+            (q is None)
+            and (appointments := await redis.get(redis_key)) is not None
+            and (total := await redis.get(redis_key_total)) is not None
         ):
-            total = json.loads(cached_appointments_total)
-            appointments = json.loads(cached_appointments)
             return {"total": total, "appointments": appointments}
 
         # Apply filtering arguments if provided (q, experience, hospitals, locations)
@@ -292,10 +275,10 @@ class AppointmentService:
         total = count_query.scalar()
 
         if not q:
-            total_appointment = json.dumps(total)
-            appointments_data_json = json.dumps(filtered_appointments)
-            redis.set(redis_key_total, total_appointment, 3600)
-            redis.set(redis_key, appointments_data_json, 3600)
+            # Register the pages under the patient tag for invalidation
+            tags = [f"patient:{patient_id}"]
+            await redis.set(redis_key_total, total, 3600, tags=tags)
+            await redis.set(redis_key, filtered_appointments, 3600, tags=tags)
 
         return {"total": total, "appointments": filtered_appointments}
 
@@ -305,7 +288,7 @@ class AppointmentService:
         appointment_id: str,
         updated_data: AppointmentUpdate,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
     ):
         appointment_id_uuid = base64_to_uuid(appointment_id)
 
@@ -333,9 +316,32 @@ class AppointmentService:
         updated_data = updated_data.model_dump(exclude_unset=True)
         updated_data["updated_at"] = func.now()
 
+        # Analytics of the doctor counting this appointment become stale
+        counted_changed = "status" in updated_data or "appointment_date" in updated_data
+        stale_keys, stale_days = [], []
+        if counted_changed:
+            stale_keys = stale_analytics_keys(
+                uuid_to_base64(db_appointment.doctor_id),
+                db_appointment.appointment_date,
+                updated_data.get("appointment_date") or db_appointment.appointment_date,
+            )
+            stale_days = await DoctorAnalytics.counted_days(db_appointment, db)
+
+        # a rescheduled appointment takes the next serial number of its new day,
+        # leaving a gap on the old one (the later serials of that day are kept)
+        new_date = updated_data.get("appointment_date")
+        if new_date and new_date != db_appointment.appointment_date:
+            updated_data["serial_number"] = await SerialService.next_serial(
+                db_appointment.doctor_id, new_date, db
+            )
+
         for key, value in updated_data.items():
             setattr(db_appointment, key, value)
 
+        # Recompute the analytics rollup of the affected days in the same transaction
+        if counted_changed:
+            await DoctorAnalytics.refresh(db_appointment, stale_days, db)
+
         await db.commit()
         await db.refresh(db_appointment)
 
@@ -366,24 +372,18 @@ class AppointmentService:
         )
 
         # store the appointment information into redis caching
-        appointment_data_json = json.dumps(jsonable_encoder(updated_appointment_data))
-        redis.set(
+        await redis.set(
             f"{patient_appointments_key}:{appointment_id}",
-            appointment_data_json,
+            jsonable_encoder(updated_appointment_data),
             3600,
         )
 
-        # Delete previous stored doctor appointment
-        doctor_id = uuid_to_base64(appointment_info.doctor_id)
-        doctor_keys = redis.keys(f"users:doctor:{doctor_id}:appointments:page:*")
-
-        # delete previous stored appointment records from the cache
-        count_key = f"{patient_appointments_key}:total"
-        upcoming_key = f"{patient_appointments_key}:upcoming"
-        redis_keys = redis.keys(f"{patient_appointments_key}:page:*")
-        redis_keys.extend([upcoming_key, count_key])
-
-        redis.delete(*redis_keys, *doctor_keys)
+        # delete previous stored appointment records of the patient and the doctor
+        await redis.invalidate(
+            f"patient:{uuid_to_base64(appointment_info.patient_id)}",
+            f"doctor:{uuid_to_base64(appointment_info.doctor_id)}",
+            keys=stale_keys,
+        )
 
         return updated_appointment_data
 
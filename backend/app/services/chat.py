@@ -1,100 +1,99 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select, desc, and_, or_
+from sqlalchemy import func, select, and_, or_
 
 from app.models import Message
+from app.core.cache import Cache
+from app.core.pagination import paginate
 from app.core.security import base64_to_uuid, uuid_to_base64
+from app.services.conversation import ConversationService
 
 
 class ChatService:
+    # Retrieve User's help Messages (latest first)
     @staticmethod
     async def get_user_help_messages(
         db: AsyncSession,
-        page: int,
+        redis: Cache,
         limit: int,
         user_id: str,
+        cursor: str | None = None,
+        include_total: bool = False,
     ):
-
-        page = max(1, page)  # allow page only to be greater than 1
-        offset = (page - 1) * limit  # calcuate offset based on page and limit
-
         # Retrieve the messages based on the specific criteria
-        query = (
-            select(Message)
-            .where(
-                Message.sender_id == base64_to_uuid(user_id),
-                Message.type.in_(["help", "reply"]),
-            )
-            .offset(offset)
-            .limit(limit)
-            .order_by(desc(Message.created_at))
-        )
-
-        # Count the amount of messages the user has
-        count = select(func.count(Message.id)).where(
+        conditions = [
             Message.sender_id == base64_to_uuid(user_id),
             Message.type.in_(["help", "reply"]),
+        ]
+        messages, next_cursor = await paginate(
+            db,
+            select(Message).where(*conditions),
+            [Message.created_at.desc(), Message.id.desc()],
+            limit,
+            cursor=cursor,
         )
 
-        result = await db.execute(query)
-        count_query = await db.execute(count)
-
-        messages = result.scalars().all()
-        total = count_query.scalar()
-
-        data = [serialized_msg(msg) for msg in messages]
+        data = {
+            "messages": [serialized_msg(msg) for msg in messages],
+            "next_cursor": next_cursor,
+        }
+
+        # Count the amount of messages the user has (only when asked for)
+        if include_total:
+            data["total"] = await redis.fetch(
+                help_total_key(user_id),
+                lambda session: count_messages(session, conditions),
+                expire=3600,
+            )
 
-        return {"total": total, "messages": data}
+        return data
 
-    # Retrieve User's direct Messages
+    # Retrieve User's direct Messages (latest first)
+    @staticmethod
     async def get_user_direct_messages(
         db: AsyncSession,
-        page: int,
+        redis: Cache,
         limit: int,
         user_id: str,
         receiver_id: str,
+        cursor: str | None = None,
+        include_total: bool = False,
     ):
-
-        page = max(1, page)  # allow page only to be greater than 1
-        offset = (page - 1) * limit  # calcuate offset based on page and limit
-
         # Retrieve the messages based on the specific criteria
-        query = (
-            select(Message)
-            .where(
-                or_(
-                    and_(
-                        Message.sender_id == base64_to_uuid(user_id),
-                        Message.receiver_id == base64_to_uuid(receiver_id),
-                        Message.type == "direct",
-                    ),
-                    and_(
-                        Message.sender_id == base64_to_uuid(receiver_id),
-                        Message.receiver_id == base64_to_uuid(user_id),
-                        Message.type == "direct",
-                    ),
-                )
+        query = select(Message).where(
+            or_(
+                and_(
+                    Message.sender_id == base64_to_uuid(user_id),
+                    Message.receiver_id == base64_to_uuid(receiver_id),
+                    Message.type == "direct",
+                ),
+                and_(
+                    Message.sender_id == base64_to_uuid(receiver_id),
+                    Message.receiver_id == base64_to_uuid(user_id),
+                    Message.type == "direct",
+                ),
             )
-            .offset(offset)
-            .limit(limit)
-            .order_by(desc(Message.created_at))
         )
-
-        # Count the amount of messages the user has
-        count = select(func.count(Message.id)).where(
-            Message.sender_id == base64_to_uuid(user_id),
-            Message.receiver_id == base64_to_uuid(receiver_id),
-            Message.type == "direct",
+        messages, next_cursor = await paginate(
+            db,
+            query,
+            [Message.created_at.desc(), Message.id.desc()],
+            limit,
+            cursor=cursor,
         )
 
-        result = await db.execute(query)
-        count_query = await db.execute(count)
+        data = {
+            "messages": [serialized_msg(msg) for msg in messages],
+            "next_cursor": next_cursor,
+        }
 
-        messages = result.scalars().all()
-        total = count_query.scalar()
-
-        data = [serialized_msg(msg) for msg in messages]
+        # Read the counters of the conversation (only when asked for)
+        if include_total:
+            summary = await ConversationService.get_summary(
+                db, redis, user_id, receiver_id
+            )
+            data["total"], data["unread"] = summary["count"], summary["unread"]
 
-        return {"total": total, "messages": data}
+        return data
 
 
 def serialized_msg(data: Message):
@@ -118,3 +117,13 @@ def serialized_msg(data: Message):
         result["receiver_id"] = uuid_to_base64(data.receiver_id)
 
     return result
+
+
+# Count the messages matching the conditions
+async def count_messages(db: AsyncSession, conditions: list) -> int:
+    return await db.scalar(select(func.count(Message.id)).where(*conditions))
+
+
+# Redis key of the cached amount of help messages of a user
+def help_total_key(user_id: str) -> str:
+    return f"chats:help:{user_id}:total"
@@ -0,0 +1,381 @@
+import json
+from uuid import UUID
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+from app.models import Message, User
+from app.core.cache import Cache, redis_cache
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.security import base64_to_uuid, uuid_to_base64
+
+
+class ConversationService:
+    """
+    Summary counters of the direct conversations.
+    ---------------------------------------------
+
+    Every pair of users has a redis hash holding the amount of messages, the last
+    message and the amount of unread messages of each participant. The websocket
+    handler updates it atomically (a lua script) whenever it stores a message, so
+    the chat history and the chat list read O(1) counters instead of counting the
+    `messages` table.
+
+    Every user also has an inbox: a sorted set of the users they talk to, scored
+    by the time of the last message (milliseconds), so the conversations are
+    listed by last activity w/o touching the `messages` table. Conversations w
+    the same score are listed by user id (descending, as redis does), so the
+    cursor holds both n pages never skip ties at their boundary.
+
+    A missing hash or inbox (never built, expired or evicted) is rebuilt from the
+    database on its next read. Both expire a while after they were built, so
+    updates missed while they were being rebuilt never drift for long.
+    """
+
+    # Retrieve the conversations of a user, latest activity first
+    @staticmethod
+    async def get_inbox(
+        db: AsyncSession,
+        redis: Cache,
+        user_id: UUID,
+        limit: int,
+        cursor: str | None = None,
+    ):
+        key = inbox_key(uuid_to_base64(user_id))
+        # score n user of the last conversation of the previous page
+        before = decode_cursor(cursor, 2) if cursor else None
+
+        # List the page of users (w the score of their conversation) from the inbox
+        if await redis.client.exists(key):
+            # resume inclusively on the score, skipping its users listed already
+            ties = await redis.client.zcount(key, before[0], before[0]) if before else 0
+            entries = await redis.client.zrevrangebyscore(
+                key,
+                before[0] if before else "+inf",
+                "-inf",
+                start=0,
+                num=limit + 1 + ties,
+                withscores=True,
+            )
+            entries = [(decode(member), int(score)) for member, score in entries]
+            entries = [entry for entry in entries if after_cursor(entry, before)]
+            conversations = await read_summaries(db, redis, user_id, entries[:limit])
+        else:
+            # Rebuild it by a single query, which already holds every summary
+            conversations = await inbox_summaries(db, user_id)
+            entries = await store_inbox(redis, key, conversations)
+            entries = [entry for entry in entries if after_cursor(entry, before)]
+
+        next_cursor = (
+            encode_cursor([entries[limit - 1][1], entries[limit - 1][0]])
+            if entries[limit:]
+            else None
+        )
+        partners = [partner for partner, _ in entries[:limit]]
+
+        profiles = await db.execute(
+            select(User.id, User.name, User.img_src, User.role).where(
+                User.id.in_([base64_to_uuid(partner) for partner in partners])
+            )
+        )
+        profiles = {
+            uuid_to_base64(id): {
+                "id": uuid_to_base64(id),
+                "name": name,
+                "img_src": img_src,
+                "role": role,
+            }
+            for id, name, img_src, role in profiles.all()
+        }
+
+        return {
+            "conversations": [
+                {"user": profiles.get(partner), **conversations[partner]}
+                for partner in partners
+                if partner in conversations
+            ],
+            "next_cursor": next_cursor,
+        }
+
+    # Retrieve the summary of the conversation of two users (from the users' view)
+    @staticmethod
+    async def get_summary(
+        db: AsyncSession, redis: Cache, user_id: str, receiver_id: str
+    ) -> dict:
+        key = conversation_key(user_id, receiver_id)
+
+        if not (summary := await redis.client.hgetall(key)):
+            summary = await build_summary(db, user_id, receiver_id)
+
+            # Store the rebuilt summary, updated by the websocket from now on
+            async with redis.client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=summary)
+                pipe.expire(key, CONVERSATION_TTL)
+                await pipe.execute()
+
+        return parse_summary(summary, user_id)
+
+    # Count a message stored by the websocket handler, moving it up both inboxes
+    @staticmethod
+    async def record_message(redis: Cache, message: dict):
+        sender_id, receiver_id = message["sender_id"], message["receiver_id"]
+
+        await record_message_script(
+            keys=[
+                conversation_key(sender_id, receiver_id),
+                inbox_key(sender_id),
+                inbox_key(receiver_id),
+            ],
+            args=[
+                json.dumps(jsonable_encoder(message)),
+                unread_field(receiver_id),
+                activity_score(message["created_at"]),
+                sender_id,
+                receiver_id,
+            ],
+            client=redis.client,
+        )
+
+    # Mark the messages the user received in the conversation as seen
+    @staticmethod
+    async def mark_seen(
+        db: AsyncSession, redis: Cache, user_id: str, receiver_id: str
+    ) -> dict:
+        result = await db.execute(
+            update(Message)
+            .where(
+                Message.sender_id == base64_to_uuid(receiver_id),
+                Message.receiver_id == base64_to_uuid(user_id),
+                Message.type == "direct",
+                Message.is_seen.is_(False),
+            )
+            .values(is_seen=True)
+        )
+        await db.commit()
+
+        await set_if_exists_script(
+            keys=[conversation_key(user_id, receiver_id)],
+            args=[unread_field(user_id), 0],
+            client=redis.client,
+        )
+
+        return {"seen": result.rowcount}
+
+
+# Summary hash of a conversation, computed from the database
+async def build_summary(db: AsyncSession, user_id: str, receiver_id: str) -> dict:
+    user_uuid, receiver_uuid = base64_to_uuid(user_id), base64_to_uuid(receiver_id)
+    conversation = and_(
+        Message.type == "direct",
+        or_(
+            and_(Message.sender_id == user_uuid, Message.receiver_id == receiver_uuid),
+            and_(Message.sender_id == receiver_uuid, Message.receiver_id == user_uuid),
+        ),
+    )
+
+    count = await db.scalar(select(func.count(Message.id)).where(conversation))
+    last_message = await db.scalar(
+        select(Message)
+        .where(conversation)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(1)
+    )
+    unread = await db.execute(
+        select(Message.receiver_id, func.count(Message.id))
+        .where(conversation, Message.is_seen.is_(False))
+        .group_by(Message.receiver_id)
+    )
+
+    summary = {
+        "count": count,
+        unread_field(user_id): 0,
+        unread_field(receiver_id): 0,
+        "last_message": json.dumps(
+            jsonable_encoder(serialized_message(last_message) if last_message else None)
+        ),
+    }
+    for participant, amount in unread.all():
+        summary[unread_field(uuid_to_base64(participant))] = amount
+
+    return summary
+
+
+# Summaries of the listed conversations, from their hashes or else the database
+async def read_summaries(
+    db: AsyncSession, redis: Cache, user_id: UUID, entries: list
+) -> dict:
+    async with redis.client.pipeline(transaction=False) as pipe:
+        for partner, _ in entries:
+            pipe.hgetall(conversation_key(uuid_to_base64(user_id), partner))
+        hashes = await pipe.execute()
+
+    conversations = {
+        partner: parse_summary(summary, uuid_to_base64(user_id))
+        for (partner, _), summary in zip(entries, hashes)
+        if summary
+    }
+
+    # The conversations w/o a summary hash are read at once from the database
+    if missing := [partner for partner, _ in entries if partner not in conversations]:
+        conversations |= await inbox_summaries(db, user_id, missing)
+
+    return conversations
+
+
+# Store the inbox of a user rebuilt from their conversations, latest activity first
+async def store_inbox(redis: Cache, key: str, conversations: dict) -> list:
+    entries = sorted(
+        (
+            (partner, activity_score(summary["last_message"]["created_at"]))
+            for partner, summary in conversations.items()
+        ),
+        key=lambda entry: (entry[1], entry[0]),  # the order of redis
+        reverse=True,
+    )
+
+    if entries:
+        async with redis.client.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, dict(entries))
+            pipe.expire(key, INBOX_TTL)
+            await pipe.execute()
+
+    return entries
+
+
+# Summaries of the conversations of a user (w the given users only), in one query
+async def inbox_summaries(
+    db: AsyncSession, user_id: UUID, partners: list[str] | None = None
+) -> dict:
+    partner = case(
+        (Message.sender_id == user_id, Message.receiver_id), else_=Message.sender_id
+    )
+    unread = and_(Message.receiver_id == user_id, Message.is_seen.is_(False))
+
+    if partners is None:
+        conversations = or_(
+            Message.sender_id == user_id, Message.receiver_id == user_id
+        )
+    else:
+        partner_ids = [base64_to_uuid(partner) for partner in partners]
+        conversations = or_(
+            and_(Message.sender_id == user_id, Message.receiver_id.in_(partner_ids)),
+            and_(Message.receiver_id == user_id, Message.sender_id.in_(partner_ids)),
+        )
+
+    # The latest message of every conversation along w the counters of the whole
+    # conversation (window functions run before DISTINCT ON keeps the first row)
+    query = (
+        select(
+            Message,
+            func.count(Message.id).over(partition_by=partner),
+            func.count(Message.id).filter(unread).over(partition_by=partner),
+        )
+        .where(Message.type == "direct", conversations)
+        .distinct(partner)
+        .order_by(partner, Message.created_at.desc(), Message.id.desc())
+    )
+
+    summaries = {}
+    for message, count, unread_count in (await db.execute(query)).all():
+        other = (
+            message.receiver_id if message.sender_id == user_id else message.sender_id
+        )
+        summaries[uuid_to_base64(other)] = {
+            "count": count,
+            "unread": unread_count,
+            "last_message": jsonable_encoder(serialized_message(message)),
+        }
+
+    return summaries
+
+
+# Counters of a summary hash from the view of one of the participants
+def parse_summary(summary: dict, user_id: str) -> dict:
+    summary = {decode(field): decode(value) for field, value in summary.items()}
+    return {
+        "count": int(summary.get("count", 0)),
+        "unread": int(summary.get(unread_field(user_id), 0)),
+        "last_message": json.loads(summary.get("last_message") or "null"),
+    }
+
+
+def serialized_message(msg: Message) -> dict:
+    return {
+        "type": msg.type,
+        "id": uuid_to_base64(msg.id),
+        "sender_id": uuid_to_base64(msg.sender_id),
+        "receiver_id": uuid_to_base64(msg.receiver_id),
+        "content": msg.content,
+        "is_seen": msg.is_seen,
+        "created_at": msg.created_at,
+    }
+
+
+# Redis key of the summary of a conversation (same for both participants)
+def conversation_key(user_id: str, receiver_id: str) -> str:
+    first, second = sorted((user_id, receiver_id))
+    return f"chats:conversations:{first}:{second}"
+
+
+# Redis key of the inbox of a user (the users they talk to by last activity)
+def inbox_key(user_id: str) -> str:
+    return f"chats:inbox:{user_id}"
+
+
+def unread_field(user_id: str) -> str:
+    return f"unread:{user_id}"
+
+
+# Score of a conversation in the inboxes, the time of its last message
+def activity_score(created_at: datetime | str) -> int:
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return int(created_at.timestamp() * 1000)
+
+
+# Whether an inbox entry comes after the cursor (score n user, both descending)
+def after_cursor(entry: tuple, before: list | None) -> bool:
+    return not before or (entry[1], entry[0]) < (before[0], before[1])
+
+
+def decode(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+CONVERSATION_TTL = 3600  # Seconds a rebuilt summary is kept
+INBOX_TTL = 3600  # Seconds a rebuilt inbox is kept
+
+
+# Count a new message n move the conversation up both inboxes, unless the summary
+# or an inbox has to be rebuilt anyway
+RECORD_MESSAGE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HINCRBY', KEYS[1], 'count', 1)
+    redis.call('HINCRBY', KEYS[1], ARGV[2], 1)
+    redis.call('HSET', KEYS[1], 'last_message', ARGV[1])
+end
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('ZADD', KEYS[2], ARGV[3], ARGV[5])
+end
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('ZADD', KEYS[3], ARGV[3], ARGV[4])
+end
+return 1
+"""
+
+
+# Set a field of a hash, unless the hash has to be rebuilt anyway
+SET_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+return redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+"""
+
+
+# Registered once, run on the client of the given cache
+record_message_script = redis_cache.client.register_script(RECORD_MESSAGE_SCRIPT)
+set_if_exists_script = redis_cache.client.register_script(SET_IF_EXISTS_SCRIPT)
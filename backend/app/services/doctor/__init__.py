@@ -1,7 +1,5 @@
-import json
 import calendar
 
-from redis import Redis
 from datetime import timedelta, datetime
 from fastapi.encoders import jsonable_encoder
 
@@ -10,6 +8,7 @@ from sqlalchemy import func, select, cast, distinct, Date, case, or_
 from sqlalchemy.orm import defer, joinedload, load_only
 
 from app.models import Doctor, Appointment, Patient, Hospital, HealthRecord, Medication
+from app.core.cache import Cache
 from app.core.security import uuid_to_base64, base64_to_uuid
 from app.core.utils import ResponseHandler, Custom, get_age_group
 from app.schemas.doctor import UpdateAppointment
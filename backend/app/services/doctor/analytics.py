@@ -0,0 +1,245 @@
+from uuid import UUID
+from datetime import date, timedelta
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import and_, delete, func, select, distinct, extract, tuple_
+
+
+from app.models import Appointment, Patient, DoctorAnalyticsDaily
+
+
+# Appointments in these states are not counted as visits
+EXCLUDED_STATUS = ["requested", "declined", "cancelled", "upcoming"]
+GENDERS = ["male", "female"]
+MONTHS = [date(2000, month, 1).strftime("%B") for month in range(1, 13)]
+
+
+class DoctorAnalytics:
+    """
+    Patient and appointment analytics of a doctor, categorized by gender.
+    ---------------------------------------------------------------------
+
+    Reads the `doctor_analytics_daily` rollup, so a period costs one row per
+    day and gender however long the appointment history of the doctor is.
+    The rollup is refreshed for the affected days whenever the status of an
+    appointment changes and reconciled periodically by the celery beat.
+    """
+
+    # Distinct patients n appointments of each day of the week starting at `start`
+    @staticmethod
+    async def week(doctor_id: UUID, start: date, db: AsyncSession):
+        week_dates = [start + timedelta(days=i) for i in range(7)]
+        result = {
+            day.strftime("%A"): {
+                "patients": {gender: 0 for gender in GENDERS},
+                "appointments": {gender: 0 for gender in GENDERS},
+            }
+            for day in week_dates
+        }
+
+        query = select(
+            DoctorAnalyticsDaily.day,
+            DoctorAnalyticsDaily.gender,
+            DoctorAnalyticsDaily.patients,
+            DoctorAnalyticsDaily.appointments,
+        ).where(
+            DoctorAnalyticsDaily.doctor_id == doctor_id,
+            DoctorAnalyticsDaily.day.between(week_dates[0], week_dates[-1]),
+        )
+
+        for day, gender, patients, appointments in await db.execute(query):
+            result[day.strftime("%A")]["patients"][gender] = patients
+            result[day.strftime("%A")]["appointments"][gender] = appointments
+
+        return result
+
+    # First time visiting patients n appointments of each month of the `year`
+    @staticmethod
+    async def month(doctor_id: UUID, year: int, db: AsyncSession):
+        result = {
+            name: {
+                "patients": {gender: 0 for gender in GENDERS},
+                "appointments": {gender: 0 for gender in GENDERS},
+            }
+            for name in MONTHS
+        }
+
+        month = extract("month", DoctorAnalyticsDaily.day)
+        query = (
+            select(
+                month,
+                DoctorAnalyticsDaily.gender,
+                func.sum(DoctorAnalyticsDaily.first_visits),
+                func.sum(DoctorAnalyticsDaily.appointments),
+            )
+            .where(
+                DoctorAnalyticsDaily.doctor_id == doctor_id,
+                DoctorAnalyticsDaily.day.between(date(year, 1, 1), date(year, 12, 31)),
+            )
+            .group_by(month, DoctorAnalyticsDaily.gender)
+        )
+
+        for number, gender, patients, appointments in await db.execute(query):
+            result[MONTHS[int(number) - 1]]["patients"][gender] = patients
+            result[MONTHS[int(number) - 1]]["appointments"][gender] = appointments
+
+        return result
+
+    # Rollup days counting the appointment (call before changing its status or date)
+    @staticmethod
+    async def counted_days(appointment: Appointment, db: AsyncSession) -> list[date]:
+        first_visit = await first_visit_of(
+            appointment.doctor_id, appointment.patient_id, db
+        )
+
+        return [appointment.appointment_date, first_visit]
+
+    # Recompute the rollup of the changed appointment (committed by the caller)
+    @staticmethod
+    async def refresh(
+        appointment: Appointment, stale_days: Iterable[date], db: AsyncSession
+    ):
+        await db.flush()  # the recomputation has to see the pending changes
+
+        # the first visit of the patient might have moved to another day
+        first_visit = await first_visit_of(
+            appointment.doctor_id, appointment.patient_id, db
+        )
+        days = sorted({appointment.appointment_date, first_visit, *stale_days} - {None})
+
+        await store_rollup(
+            db,
+            [
+                DoctorAnalyticsDaily.doctor_id == appointment.doctor_id,
+                DoctorAnalyticsDaily.day.in_(days),
+            ],
+            [
+                Appointment.doctor_id == appointment.doctor_id,
+                Appointment.appointment_date.in_(days),
+            ],
+        )
+
+    # Rebuild the rollup of every doctor from `since` (or the whole history)
+    @staticmethod
+    async def rebuild(db: AsyncSession, since: date | None = None):
+        if since is None:
+            await store_rollup(db, [], [])
+        else:
+            await store_rollup(
+                db,
+                [DoctorAnalyticsDaily.day >= since],
+                [Appointment.appointment_date >= since],
+            )
+
+        await db.commit()
+
+
+# First counted visit of a patient to the doctor
+async def first_visit_of(doctor_id: UUID, patient_id: UUID, db: AsyncSession):
+    return await db.scalar(
+        select(func.min(Appointment.appointment_date)).where(
+            Appointment.doctor_id == doctor_id,
+            Appointment.patient_id == patient_id,
+            Appointment.status.not_in(EXCLUDED_STATUS),
+        )
+    )
+
+
+# Daily rollup rows of the counted appointments matching the conditions
+def rollup_query(*conditions):
+    counted = Appointment.status.not_in(EXCLUDED_STATUS)
+
+    # first visit of the patients seen on those days (over the whole history)
+    seen = (
+        select(Appointment.doctor_id, Appointment.patient_id)
+        .where(counted, *conditions)
+        .correlate(None)
+    )
+    first_visits = (
+        select(
+            Appointment.doctor_id,
+            Appointment.patient_id,
+            func.min(Appointment.appointment_date).label("first_visit"),
+        )
+        .where(counted, tuple_(Appointment.doctor_id, Appointment.patient_id).in_(seen))
+        .group_by(Appointment.doctor_id, Appointment.patient_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            Appointment.doctor_id,
+            Appointment.appointment_date,
+            Patient.gender,
+            func.count(Appointment.id),
+            func.count(distinct(Appointment.patient_id)),
+            func.count(distinct(Appointment.patient_id)).filter(
+                Appointment.appointment_date == first_visits.c.first_visit
+            ),
+        )
+        .join(Appointment.patient)
+        .join(
+            first_visits,
+            and_(
+                first_visits.c.doctor_id == Appointment.doctor_id,
+                first_visits.c.patient_id == Appointment.patient_id,
+            ),
+        )
+        .where(counted, Patient.gender.in_(GENDERS), *conditions)
+        .group_by(Appointment.doctor_id, Appointment.appointment_date, Patient.gender)
+    )
+
+
+# Replace the rollup rows in scope w the ones recomputed from the appointments
+async def store_rollup(db: AsyncSession, rollup_scope: list, appointment_scope: list):
+    await db.execute(delete(DoctorAnalyticsDaily).where(*rollup_scope))
+
+    stmt = insert(DoctorAnalyticsDaily).from_select(
+        [
+            DoctorAnalyticsDaily.doctor_id,
+            DoctorAnalyticsDaily.day,
+            DoctorAnalyticsDaily.gender,
+            DoctorAnalyticsDaily.appointments,
+            DoctorAnalyticsDaily.patients,
+            DoctorAnalyticsDaily.first_visits,
+        ],
+        rollup_query(*appointment_scope),
+    )
+
+    # concurrent refreshes of the same day keep the latest recomputation
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["doctor_id", "day", "gender"],
+            set_={
+                "appointments": stmt.excluded.appointments,
+                "patients": stmt.excluded.patients,
+                "first_visits": stmt.excluded.first_visits,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+
+# Sunday starting the week shown on `today` (on sundays the previous week is shown)
+def week_start(today: date) -> date:
+    return today - timedelta(days=today.weekday() + 1)
+
+
+# Redis key of the cached analytics of a doctor (base64 id) for a week or year
+def analytics_key(doctor_id: str, period_type: str, anchor: date | int) -> str:
+    return f"users:doctor:{doctor_id}:analytics:{period_type}:{anchor}"
+
+
+# Cached analytics that count appointments on the given days
+def stale_analytics_keys(doctor_id: str, *days: date) -> list[str]:
+    keys = {analytics_key(doctor_id, "month", date.today().year)}
+
+    for day in days:
+        # the sunday on or before the day anchors the only week containing it
+        sunday = day - timedelta(days=(day.weekday() + 1) % 7)
+        keys.add(analytics_key(doctor_id, "week", sunday))
+        keys.add(analytics_key(doctor_id, "month", day.year))
+
+    return list(keys)
@@ -1,7 +1,6 @@
-import json
 import calendar
 
-from redis import Redis
+from typing import Iterable
 from datetime import timedelta, datetime
 from fastapi.encoders import jsonable_encoder
 
@@ -10,6 +9,8 @@ from sqlalchemy import func, select, cast, distinct, Date, case, or_
 from sqlalchemy.orm import defer, joinedload, load_only
 
 from app.models import Doctor, Appointment, Patient, Hospital, HealthRecord, Medication
+from app.core.cache import Cache
+from app.core.pagination import Total, count_total, paginate
 from app.core.security import uuid_to_base64, base64_to_uuid
 from app.core.utils import (
     ResponseHandler,
@@ -22,6 +23,7 @@ from app.schemas.doctor import UpdateAppointment
 from app.core.dummy import dummy_suggestions, exercises
 
 from app.services.serialization import DoctorSerialization
+from app.services.doctor.analytics import DoctorAnalytics, stale_analytics_keys
 
 
 class AppointmentService:
@@ -59,33 +61,26 @@ class AppointmentService:
     async def get_appointments(
         session_user: Doctor,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
         status: int,
         date: str | None,
         q: str | None,
         page: int,
         limit: int,
+        cursor: str | None = None,
+        total_mode: Total | None = None,
     ):
         doctor_id = uuid_to_base64(session_user.id)
 
-        redis_key = f"users:doctor:{doctor_id}:appointments:page:{page}"
+        page_key = f"page:{cursor or page}:{limit}"
+        redis_key = f"users:doctor:{doctor_id}:appointments:{page_key}"
         redis_key_total = f"users:doctor:{doctor_id}:appointments:total"
+        tags = [f"doctor:{doctor_id}"]  # Pages are invalidated along w the doctor
 
         cached_data_allowed = date != "old" and status == 1 and not q
-
-        # Retrieve doctor's appointments information from redis if exists
-        if (
-            (cached_appointments := redis.get(redis_key))
-            and (cached_total := redis.get(redis_key_total))
-            and cached_data_allowed
-        ):
-            return {
-                "total": json.loads(cached_total),
-                "appointments": json.loads(cached_appointments),
-            }
+        cached_data_allowed = cached_data_allowed and total_mode in (None, "cached")
 
         page = max(1, page)
-        offset = (page - 1) * limit
 
         query = select(Appointment)
 
@@ -95,13 +90,24 @@ class AppointmentService:
             Appointment.status.not_in(["requested"]),
         ]
 
-        # Query to get the total count of the doctors' appointment
-        count_query = select(func.count(Appointment.id)).where(*filter_args)
-
         # Handle searching by name of the patients
         if q:
             filter_args.append(Patient.name.ilike(f"%{q}%"))
 
+        # Get the total count of the doctors' appointment, cached w/o searching
+        total = await count_total(
+            db,
+            select(Appointment).join(Patient).where(*filter_args),
+            total_mode or "cached",
+            redis,
+            None if q else redis_key_total,
+            tags=tags,
+        )
+
+        # Retrieve doctor's appointments information from redis if exists
+        if cached_data_allowed and (cached_page := await redis.get(redis_key)):
+            return {"total": total, **cached_page}
+
         # Sort based on appointment date
         if date and date in ["latest", "old"]:
             if date == "latest":
@@ -112,12 +118,14 @@ class AppointmentService:
         # Sort based on appointment 'status'
         status_priority = status_priority_map[status - 1]
 
+        # The other statuses are listed last (like the NULLs they used to sort as)
         status_order = case(
             (Appointment.status == "upcoming", status_priority["upcoming"]),
             (Appointment.status == "resheduled", status_priority["resheduled"]),
             (Appointment.status == "missed", status_priority["missed"]),
             (Appointment.status == "completed", status_priority["completed"]),
             (Appointment.status == "cancelled", status_priority["cancelled"]),
+            else_=len(status_priority) + 1,
         )
 
         # Extract all the appointments from database
@@ -129,34 +137,35 @@ class AppointmentService:
                 defer(Appointment.created_at),  # Exclude created_at
                 defer(Appointment.updated_at),  # Exclude updated_at
             )
-            .order_by(status_order, *order_clauses)
-            .offset(offset)
-            .limit(limit)
         )
 
-        result = await db.execute(query)
-        total_result = await db.execute(count_query)
-
-        filtered_appointments = result.scalars().all()
-        total = total_result.scalar()
+        filtered_appointments, next_cursor = await paginate(
+            db,
+            query,
+            [status_order, *order_clauses, Appointment.id],
+            limit,
+            page,
+            cursor,
+        )
 
-        appointments = [
-            DoctorSerialization.appointment_info(info) for info in filtered_appointments
-        ]
+        data = {
+            "appointments": [
+                DoctorSerialization.appointment_info(info)
+                for info in filtered_appointments
+            ],
+            "next_cursor": next_cursor,
+        }
 
-        # Store caching into redis
+        # Store caching into redis (registered under the doctor tag for invalidation)
         if cached_data_allowed:
-            _total = json.dumps(total)
-            _appointments = json.dumps(jsonable_encoder(appointments))
-            redis.set(redis_key, _appointments, 3600)
-            redis.set(redis_key_total, _total, 3600)
+            await redis.set(redis_key, jsonable_encoder(data), 3600, tags=tags)
 
-        return {"total": total, "appointments": appointments}
+        return {"total": total, **data}
 
     # Retrieve a specific appointment information
     @staticmethod
     async def get_info(
-        appointment_id: str, doctor: Doctor, db: AsyncSession, redis: Redis
+        appointment_id: str, doctor: Doctor, db: AsyncSession, redis: Cache
     ):
         # Convert appointment_id from base64 string to UUID
         appointment_id = base64_to_uuid(appointment_id)
@@ -282,7 +291,7 @@ class AppointmentService:
         doctor: Doctor,
         db: AsyncSession,
         payload: UpdateAppointment,
-        redis: Redis,
+        redis: Cache,
     ):
         updated_data = {**payload.none_excluded(), "updated_at": func.now()}
         # Covert the ids to base64 and UUID
@@ -314,11 +323,26 @@ class AppointmentService:
 
         patient_id = uuid_to_base64(appointment_result.patient_id)
 
+        # Analytics counting this appointment become stale once its status changes
+        status_changed = (
+            payload.status is not None and payload.status != appointment_result.status
+        )
+        stale_keys, stale_days = [], []
+        if status_changed:
+            stale_keys = stale_analytics_keys(
+                doctor_id, appointment_result.appointment_date
+            )
+            stale_days = await DoctorAnalytics.counted_days(appointment_result, db)
+
         # Update the Appointment record
         for k, v in updated_data.items():
             if k in Appointment.__table__.columns:
                 setattr(appointment_result, k, v)
 
+        # Recompute the analytics rollup of the affected days in the same transaction
+        if status_changed:
+            await DoctorAnalytics.refresh(appointment_result, stale_days, db)
+
         # Check if the Medication record with the same appointment_id already exists
         medication_query = select(Medication).where(
             Medication.patient_id == appointment_result.patient_id,
@@ -334,8 +358,7 @@ class AppointmentService:
                 await db.delete(medication_result)
                 await db.commit()
                 # Deete the patients' existing medication cache
-                updating_info_redis_keys(redis, doctor_id, patient_id)
-                redis.delete(f"patients:medications:{patient_id}")
+                await updating_info_redis_keys(redis, doctor_id, patient_id, stale_keys)
                 # Return the delete success message
                 return {"message": "Successfully deleted medication record"}
 
@@ -380,7 +403,7 @@ class AppointmentService:
         await db.refresh(appointment_result)
 
         # Update the redis keys
-        updating_info_redis_keys(redis, doctor_id, patient_id)
+        await updating_info_redis_keys(redis, doctor_id, patient_id, stale_keys)
 
         # Retweak the Appointment info data
         appointment_data = DoctorSerialization.appointment_info(appointment_result)
@@ -417,27 +440,13 @@ class AppointmentService:
         return total_appointment
 
 
-def updating_info_redis_keys(redis: Redis, doctor_id: str, patient_id: str):
-    # Redis key for appointments of the doctor
-    doctor_appointment_key = f"users:doctor:{doctor_id}:appointments"
-    doctor_appointment_count_key = f"{doctor_appointment_key}:total"
-    doctor_keys = redis.keys(f"{doctor_appointment_key}:page:*")
-    doctor_keys.extend([doctor_appointment_count_key])
-
-    # Redis keys of the patient who consulted the appointment
-    patient_medication_key = f"patients:medications:{patient_id}"
-    patient_appointment_key = f"patients:appointments:{patient_id}"
-    upcoming_appointments_key = f"{patient_appointment_key}:upcoming"
-    patient_appointment_count_key = f"{patient_appointment_key}:total"
-
-    patient_keys = redis.keys(f"{patient_appointment_key}:page:*")
-    patient_keys.extend(
-        [
-            upcoming_appointments_key,
-            patient_medication_key,
-            patient_appointment_count_key,
-        ]
-    )
-
+async def updating_info_redis_keys(
+    redis: Cache, doctor_id: str, patient_id: str, stale_keys: Iterable[str] = ()
+):
     # Delete the appointments cache data of both the doctor and patient
-    redis.delete(*doctor_keys, *patient_keys)
+    # (pages, totals and upcoming lists are registered under their tags)
+    await redis.invalidate(
+        f"doctor:{doctor_id}",
+        f"patient:{patient_id}",
+        keys=[f"patients:medications:{patient_id}", *stale_keys],
+    )
@@ -1,7 +1,4 @@
-import json
-from redis import Redis
-
-from datetime import timedelta, datetime
+from datetime import date
 from fastapi.encoders import jsonable_encoder
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,22 +6,24 @@ from sqlalchemy import func, select, cast, distinct, Date, case, or_
 from sqlalchemy.orm import defer, joinedload, load_only
 
 from app.models import Doctor, Appointment, Patient, Hospital, HealthRecord, Medication
+from app.core.cache import Cache
 from app.core.security import uuid_to_base64, base64_to_uuid
 from app.core.utils import ResponseHandler, Custom, get_age_group
 from app.schemas.doctor import UpdateAppointment
 from app.core.dummy import dummy_suggestions, exercises
 from app.services.serialization import DoctorSerialization
+from app.services.doctor.analytics import DoctorAnalytics, analytics_key, week_start
 
 
 class DoctorService:
     @staticmethod
-    async def get_info(session_user: Doctor, db: AsyncSession, redis: Redis):
+    async def get_info(session_user: Doctor, db: AsyncSession, redis: Cache):
         doctor_id = uuid_to_base64(session_user.id)
         redis_key = f"users:doctor:{doctor_id}:info"
 
         # If doctors' profile info cache exists
-        if cached_doctor_info := redis.get(redis_key):
-            return json.loads(cached_doctor_info)
+        if (cached_doctor_info := await redis.get(redis_key)) is not None:
+            return cached_doctor_info
 
         query = (
             select(Doctor)
@@ -47,8 +46,7 @@ class DoctorService:
         profile_info = DoctorSerialization.profile_info(profile_result)
 
         # Convert the data into json and set the data into redis caching
-        profile_info_json = json.dumps(jsonable_encoder(profile_info))
-        redis.set(redis_key, profile_info_json, 3600)
+        await redis.set(redis_key, jsonable_encoder(profile_info), 3600)
 
         # Return doctors' profile information
         return profile_info
@@ -59,137 +57,29 @@ class DoctorService:
         doctor_id: str,
         session_user: Doctor,
         db: AsyncSession,
+        redis: Cache,
         period_type: str,
     ):
-        allowed_status = ["requested", "declined", "cancelled", "upcoming"]
-
         if period_type not in ["week", "month"]:
             raise ResponseHandler.no_permission("Invalid param value.")
 
         if session_user.id != base64_to_uuid(doctor_id):
             raise ResponseHandler.no_permission("Permission not granted.")
 
-        today = datetime.now()
-        current_year = datetime.now().year
-        start_of_week = today - timedelta(days=today.weekday() + 1)
-
-        # Get the current week day dates starting from Sunday
-        week_dates = [start_of_week + timedelta(days=i) for i in range(7)]
-        # Get all the day names starting from Sunday
-        week_days = [
-            (start_of_week + timedelta(days=i)).strftime("%A") for i in range(7)
-        ]
-        # Get all the month names of a year starting from January
-        months = [
-            (datetime(current_year, month, 1)).strftime("%B") for month in range(1, 13)
-        ]
-
-        # Week day results
-        week_result = {
-            day: {
-                "patients": {"male": 0, "female": 0},
-                "appointments": {"male": 0, "female": 0},
-            }
-            for day in week_days
-        }
-        # Months results
-        month_result = {
-            name: {
-                "patients": {"male": 0, "female": 0},
-                "appointments": {"male": 0, "female": 0},
-            }
-            for name in months
-        }
-
-        for gender in ["male", "female"]:
-            # Extract the patient and appointment analytics of current week
-            if period_type == "week":
-                # Iterate through each day of the current week
-                for i, day in enumerate(week_days):
-                    patient_query = (
-                        select(func.count(distinct(Appointment.patient_id)))
-                        .join(Appointment.patient)
-                        .where(
-                            Appointment.doctor_id == session_user.id,
-                            cast(Appointment.appointment_date, Date)
-                            == cast(week_dates[i], Date),
-                            Appointment.status.not_in(allowed_status),
-                            Patient.gender == gender,
-                        )
-                    )
-                    appointment_query = (
-                        select(func.count(Appointment.id))
-                        .join(Appointment.patient)
-                        .where(
-                            Appointment.doctor_id == session_user.id,
-                            cast(Appointment.appointment_date, Date)
-                            == cast(week_dates[i], Date),
-                            Appointment.status.not_in(allowed_status),
-                            Patient.gender == gender,
-                        )
-                    )
-
-                    # Update the week result to contain result details categorized by gender and week days
-                    week_result[day]["patients"][gender] = (
-                        await db.execute(patient_query)
-                    ).scalar()
-                    week_result[day]["appointments"][gender] = (
-                        await db.execute(appointment_query)
-                    ).scalar()
-
-            # Extract the patient and appointment analytics of the current year
-            elif period_type == "month":
-                # Iterate through each month of the current year
-                for i, name in enumerate(months):
-                    start_of_month = today.replace(month=i + 1, day=1)
-                    end_of_month = (start_of_month + timedelta(days=32)).replace(
-                        day=1
-                    ) - timedelta(days=1)
-
-                    # Subquery to get the first visit date for each patient
-                    first_visit_query = (
-                        select(
-                            Appointment.patient_id,
-                            func.min(Appointment.appointment_date).label("first_visit"),
-                        )
-                        .join(Appointment.patient)
-                        .where(
-                            Appointment.doctor_id == session_user.id,
-                            Appointment.status.not_in(allowed_status),
-                            Patient.gender == gender,
-                        )
-                        .group_by(Appointment.patient_id)
-                    )
-
-                    # Main query to count only the first time visits in the current month of that patient
-                    patient_query = select(
-                        func.count(first_visit_query.c.patient_id)
-                    ).where(
-                        cast(first_visit_query.c.first_visit, Date).between(
-                            cast(start_of_month, Date), cast(end_of_month, Date)
-                        ),
-                    )
-
-                    # Query to get the total appointment count of the gender
-                    appointment_query = (
-                        select(func.count(Appointment.id))
-                        .join(Appointment.patient)
-                        .where(
-                            Appointment.doctor_id == session_user.id,
-                            cast(Appointment.appointment_date, Date).between(
-                                cast(start_of_month, Date), cast(end_of_month, Date)
-                            ),
-                            Appointment.status.not_in(allowed_status),
-                            Patient.gender == gender,
-                        )
-                    )
-
-                    # Update the month result to contain result details categorized by gender and months
-                    month_result[name]["patients"][gender] = (
-                        await db.execute(patient_query)
-                    ).scalar()
-                    month_result[name]["appointments"][gender] = (
-                        await db.execute(appointment_query)
-                    ).scalar()
-
-        return week_result if period_type == "week" else month_result
+        today = date.today()
+
+        # Analytics of the current week starting from Sunday
+        if period_type == "week":
+            start = week_start(today)
+            return await redis.fetch(
+                analytics_key(doctor_id, period_type, start),
+                lambda session: DoctorAnalytics.week(session_user.id, start, session),
+                3600,
+            )
+
+        # Analytics of each month of the current year
+        return await redis.fetch(
+            analytics_key(doctor_id, period_type, today.year),
+            lambda session: DoctorAnalytics.month(session_user.id, today.year, session),
+            3600,
+        )
@@ -1,14 +1,14 @@
-import json
-from redis import Redis
-
 from datetime import timedelta, datetime
 from fastapi.encoders import jsonable_encoder
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select, cast, distinct, Date, case, or_
+from sqlalchemy import func, select, cast, Date, case, or_
 from sqlalchemy.orm import defer, joinedload, load_only
 
 from app.models import Doctor, Appointment, Patient, Hospital, HealthRecord, Medication
+from app.core.cache import Cache
+from app.core.presence import presence
+from app.core.pagination import Total, count_total, paginate
 from app.core.security import uuid_to_base64, base64_to_uuid
 from app.core.utils import ResponseHandler, Custom, get_age_group
 from app.schemas.doctor import UpdateAppointment
@@ -23,65 +23,67 @@ class PatientService:
         doctor_id: str,
         session_user: Doctor,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
         q: str | None,
         age: str | None,
         gender: str | None,
         page: int,
         limit: int,
+        cursor: str | None = None,
+        total_mode: Total | None = None,
     ):
-        redis_key = f"users:doctor:{doctor_id}:patients:page:{page}"
+        redis_key = f"users:doctor:{doctor_id}:patients:page:{cursor or page}:{limit}"
         redis_key_total = f"users:doctor:{doctor_id}:patients:total"
+        # Register the pages under the doctor tag for invalidation
+        tags = [f"doctor:{uuid_to_base64(session_user.id)}"]
 
         page = max(1, page)
-        offset = (page - 1) * limit
-
-        query = select(Patient)
 
         order_clauses = []
-        filter_args = [Appointment.doctor_id == session_user.id]
 
         # Extract all the patient ids associated with doctor
-        patient_ids = select(distinct(Appointment.patient_id)).where(*filter_args)
+        patient_ids = select(Appointment.patient_id).where(
+            Appointment.doctor_id == session_user.id
+        )
+        filter_args = [Patient.id.in_(patient_ids)]
 
         no_filter_applied = not q and not age and not gender
-
-        # Retrieve doctor's appointed patients information from redis if exists
-        if (
-            (cached_patients_info := redis.get(redis_key))
-            and (cached_total := redis.get(redis_key_total))
-            and no_filter_applied
-        ):
-            return {
-                "total": json.loads(cached_total),
-                "patients": json.loads(cached_patients_info),
-            }
+        no_filter_applied = no_filter_applied and total_mode in (None, "cached")
 
         # Apply searching filtering
         if q:
             filter_args.append(Patient.name.ilike(f"%{q}%"))
 
-        # Extract all the appointed patients informations
-        query = (
-            query.where(Patient.id.in_(patient_ids))
-            .options(
-                defer(Patient.role),  # Exclude updated_at)
-                defer(Patient.password),  # Exclude password
-                defer(Patient.created_by),  # Exclude created_by
-                defer(Patient.created_at),  # Exclude created_at
-                defer(Patient.updated_at),  # Exclude updated_at)
-            )
-            .offset(offset)
-            .limit(limit)
+        query = select(Patient).where(*filter_args)
+
+        # Count the appointed patients, cached w/o searching
+        total = await count_total(
+            db,
+            query,
+            total_mode or "cached",
+            redis,
+            None if q else redis_key_total,
+            tags=tags,
         )
 
-        # Count Statement for the distinct (no duplicate) ids of the patients
-        count = select(func.count(distinct(Appointment.patient_id))).where(*filter_args)
+        # Retrieve doctor's appointed patients information from redis if exists
+        if no_filter_applied and (cached_page := await redis.get(redis_key)):
+            return {"total": total, **(await with_presence(cached_page))}
 
-        # Sort the patients list based on age
+        # Extract all the appointed patients informations
+        query = query.options(
+            defer(Patient.role),  # Exclude updated_at)
+            defer(Patient.password),  # Exclude password
+            defer(Patient.created_by),  # Exclude created_by
+            defer(Patient.created_at),  # Exclude created_at
+            defer(Patient.updated_at),  # Exclude updated_at)
+        )
+
+        # Sort the patients list based on age (unknown ages first when young, else last)
         if age and age in ["young", "old"]:
-            calculated_age = func.date_part(
-                "year", func.age(cast(Patient.date_of_birth, Date))
+            calculated_age = func.coalesce(
+                func.date_part("year", func.age(cast(Patient.date_of_birth, Date))),
+                1000,
             )
 
             if age == "young":
@@ -89,29 +91,24 @@ class PatientService:
             elif age == "old":
                 order_clauses.append(calculated_age.asc())
 
-        # Sort the patients list based on gender
+        # Sort the patients list based on gender (the requested gender first)
         if gender and gender in ["male", "female"]:
-            order_clauses.append(
-                Patient.gender.desc() if gender == "male" else Patient.gender.asc(),
-            )
+            order_clauses.append(case((Patient.gender == gender, 0), else_=1))
 
-        # Sort the retrieved query based of provided orders
-        query = query.order_by(*order_clauses)
-
-        # Retrieve the Query result
-        result = (await db.execute(query)).scalars().all()
-        patients = [DoctorSerialization.patient_info(info) for info in result]
+        # Retrieve the Query result sorted based of provided orders
+        result, next_cursor = await paginate(
+            db, query, [*order_clauses, Patient.id], limit, page, cursor
+        )
 
-        count_query = await db.execute(count)
-        total = count_query.scalar()
+        data = {
+            "patients": [DoctorSerialization.patient_info(info) for info in result],
+            "next_cursor": next_cursor,
+        }
 
         if no_filter_applied:
-            _total = json.dumps(total)
-            _patients = json.dumps(jsonable_encoder(patients))
-            redis.set(redis_key, _patients, 3600)
-            redis.set(redis_key_total, _total, 3600)
+            await redis.set(redis_key, jsonable_encoder(data), 3600, tags=tags)
 
-        return {"total": total, "patients": patients}
+        return {"total": total, **(await with_presence(data))}
 
     # Retrieve a list of appointments of a specific patient
     @staticmethod
@@ -149,3 +146,15 @@ class PatientService:
         appointments = [DoctorSerialization.patient_appointment(v) for v in result]
 
         return appointments
+
+
+# Flag the patients of a page who are online right now (never cached)
+async def with_presence(data: dict) -> dict:
+    online = await presence.online([patient["id"] for patient in data["patients"]])
+    return {
+        **data,
+        "patients": [
+            {**patient, "online": patient["id"] in online}
+            for patient in data["patients"]
+        ],
+    }
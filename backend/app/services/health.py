@@ -2,9 +2,9 @@ import json
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
-from redis import Redis
 
 
+from app.core.cache import Cache
 from app.core.utils import ResponseHandler
 from app.models import Patient, HealthRecord
 from app.core.security import base64_to_uuid, uuid_to_base64
@@ -12,20 +12,21 @@ from app.schemas.health import (
     HealthRecordUpdate,
 )
 from app.core.socket import socket_manager
+from app.services.readings import latest_readings, merge_readings
 
 
 class HealthMonitorings:
     # get health record of patient by id
     @staticmethod
     async def get_health_record_info(
-        session_user: Patient, db: AsyncSession, redis: Redis
+        session_user: Patient, db: AsyncSession, redis: Cache
     ):
         patient_id = uuid_to_base64(session_user.id)  # get the original uuid
         redis_key = f"patients:monitorings:{patient_id}"
 
         # retrieve health record information from redis if exists
-        if cached_health_record := redis.get(redis_key):
-            return json.loads(cached_health_record)
+        if (cached_health_record := await redis.get(redis_key)) is not None:
+            return cached_health_record
 
         query = select(HealthRecord).where(HealthRecord.patient_id == session_user.id)
         result = await db.execute(query)
@@ -35,11 +36,14 @@ class HealthMonitorings:
             return []  # return empty array
 
         # restructure the result for general users (e.g, replace ids w base64 strings)
-        health_record_info = health_record_data(db_health_record)
+        # along w the latest ingested readings
+        health_record_info = merge_readings(
+            health_record_data(db_health_record),
+            await latest_readings(db, session_user.id),
+        )
 
         # convert the data into json and set the data into redis caching
-        health_record_json = json.dumps(health_record_info)
-        redis.set(redis_key, health_record_json, 3600)
+        await redis.set(redis_key, health_record_info, 3600)
 
         return health_record_info
 
@@ -49,7 +53,7 @@ class HealthMonitorings:
         new_data: HealthRecordUpdate,
         session_user: Patient,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
     ):
 
         # custom error for empty body
@@ -74,19 +78,23 @@ class HealthMonitorings:
         await db.refresh(new_health_record)
 
         # restructure the result for general users (e.g, replace ids w base64 strings)
-        health_record_info = health_record_data(new_health_record)
+        # along w the latest ingested readings
+        health_record_info = merge_readings(
+            health_record_data(new_health_record),
+            await latest_readings(db, session_user.id),
+        )
 
         # get the base64 string for patient uuid
         patient_id = uuid_to_base64(session_user.id)
 
-        # convert the data into json and store it into redis
+        # store the data into redis n convert it into json for the websocket
         redis_key = f"patients:monitorings:{patient_id}"
+        await redis.set(redis_key, health_record_info, 3600)
         health_record_json = json.dumps(health_record_info)
-        redis.set(redis_key, health_record_json, 3600)
 
         # expose the record to websocket room
         await socket_manager.broadcast_to_room(
-            f"{patient_id}_MONITORING", health_record_json
+            f"{patient_id}_MONITORING", health_record_json, state=True
         )
 
         return health_record_info
@@ -98,7 +106,7 @@ class HealthMonitorings:
         record_id: str,
         session_user: Patient,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
     ):
         health_record_id = base64_to_uuid(record_id)  # get the original uuid
 
@@ -138,19 +146,23 @@ class HealthMonitorings:
         await db.refresh(db_heath_record)
 
         # restructure the result for general users (e.g, replace ids w base64 strings)
-        health_record_info = health_record_data(db_heath_record)
+        # along w the latest ingested readings
+        health_record_info = merge_readings(
+            health_record_data(db_heath_record),
+            await latest_readings(db, db_heath_record.patient_id),
+        )
 
         # get the base64 string for patient uuid
         patient_id = uuid_to_base64(session_user.id)
 
-        # convert the data into json and store it into redis
+        # store the data into redis n convert it into json for the websocket
         redis_key = f"patients:monitorings:{patient_id}"
+        await redis.set(redis_key, health_record_info, 3600)
         health_record_json = json.dumps(health_record_info)
-        redis.set(redis_key, health_record_json, 3600)
 
         # expose the record to websocket room
         await socket_manager.broadcast_to_room(
-            f"{patient_id}_MONITORING", health_record_json
+            f"{patient_id}_MONITORING", health_record_json, state=True
         )
 
         return health_record_info
@@ -1,14 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_, not_, cast
+from sqlalchemy import select, or_, and_, not_, cast
 from sqlalchemy.orm import defer, load_only
 from sqlalchemy.dialects.postgresql import JSONB
 
-import json
-from redis import Redis
 from fastapi.encoders import jsonable_encoder
 
 
 from app.models import Meal, Patient, Medication
+from app.core.cache import Cache
+from app.core.pagination import Total, count_total, paginate
 from app.core.security import uuid_to_base64
 
 
@@ -17,11 +17,13 @@ class MealService:
     async def retrieve_all(
         session_user: Patient,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
         q: str | None,
         page: int,
         limit: int,
         category: str | None,
+        cursor: str | None = None,
+        total_mode: Total | None = None,
     ):
         """
         Retrieve a list of meals based on various optional search criteria.
@@ -30,19 +32,17 @@ class MealService:
         page: Pagination parameter to specify the starting index of the returned results.
         limit: Pagination parameter to specify the maximum number of results to return.
         category: Query parameter for filtering meals by categories.
+        cursor: Pagination parameter to continue after the previous page (replaces page).
+        total_mode: How the total is computed (exact, estimated, cached or none).
         """
-        query = select(Meal)
-        count = select(func.count(Meal.id))
         page = max(1, page)  # allow page only to be greater than 1
-        offset = (page - 1) * limit  # calcuate offset based on page and limit
         filter_args = []
 
         patient_id = uuid_to_base64(session_user.id)
         redis_medication_key = f"patients:medications:{patient_id}"
 
         # retrieve medications data if already cached
-        if cached_medication_details := redis.get(redis_medication_key):
-            medication_details = json.loads(cached_medication_details)
+        if medication_details := await redis.get(redis_medication_key):
             ingredients = medication_details.get("recommended_ingredients") or None
             allergies = medication_details.get("allergies") or None
             allergies = medication_details.get("allergies") or None
@@ -99,38 +99,65 @@ class MealService:
             if not preferred_cuisine == "All":
                 filter_args.append(Meal.cuisine == preferred_cuisine)
 
-        # get the result and the count of the query based on condition
+        # the unfiltered catalogue is shared by every patient, keep it in both caches
+        if not filter_args and total_mode in (None, "cached"):
+            return await redis.fetch(
+                f"meals:page:{cursor or page}:{limit}",
+                lambda session: MealService.retrieve_page(
+                    session, redis, filter_args, page, limit, cursor, total_mode
+                ),
+                3600,
+                ["meals"],
+                local_ttl=300,
+            )
+
+        return await MealService.retrieve_page(
+            db, redis, filter_args, page, limit, cursor, total_mode
+        )
+
+    # Retrieve a page of meals matching the filtering arguments along with the total.
+    @staticmethod
+    async def retrieve_page(
+        db: AsyncSession,
+        redis: Cache,
+        filter_args: list,
+        page: int,
+        limit: int,
+        cursor: str | None,
+        total_mode: Total | None,
+    ):
+        query = select(Meal)
+
+        # filter the query based on condition
         if filter_args:
             query = query.where(and_(*filter_args))
-            # get the total length of filtered records
-            count_query = count.where(and_(*filter_args))
-            count_result = await db.execute(count_query)
-        else:
-            count_result = await db.execute(count)
 
-        query = (
-            query.options(
-                defer(Meal.created_at),  # exclude created_at
-                defer(Meal.updated_at),  # exclude updated_at
-            )
-            .order_by(Meal.updated_at)
-            .offset(offset)
-            .limit(limit)
+        # get the total length of the (filtered) records, only the catalogue is cached
+        total = await count_total(
+            db,
+            query,
+            total_mode or "cached",
+            redis,
+            None if filter_args else "meals:total",
+            tags=["meals"],
+        )
+
+        query = query.options(
+            defer(Meal.created_at),  # exclude created_at
+            defer(Meal.updated_at),  # exclude updated_at
         )
 
         # retrieve all the meal informations
-        result = await db.execute(query)
-        filtered_meals = result.scalars().all()
+        filtered_meals, next_cursor = await paginate(
+            db, query, [Meal.updated_at, Meal.id], limit, page, cursor
+        )
 
         # restructure doctor data from the result
         filtered_meals = jsonable_encoder(
             [meal_data(meal_info) for meal_info in filtered_meals]
         )
 
-        # get the total length of the database
-        total = count_result.scalar()
-
-        return {"total": total, "meals": filtered_meals}
+        return {"total": total, "meals": filtered_meals, "next_cursor": next_cursor}
 
 
 def meal_data(meal_info: Meal):
@@ -1,5 +1,4 @@
 import json
-from redis import Redis
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import defer
@@ -14,6 +13,7 @@ from app.schemas.medication import (
     UpdateMedication,
     GenerateMedication,
 )
+from app.core.cache import Cache
 from app.core.utils import ResponseHandler, get_age_group
 from app.core.dummy import dummy_suggestions, exercises
 from app.services.serialization import PatientSerialization
@@ -25,7 +25,7 @@ class MedicationService:
         payload: GenerateMedication,
         session_user: Patient,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
     ):
         age = get_age_group(payload.age)
         suggestion_data = dummy_suggestions[age]
@@ -49,21 +49,20 @@ class MedicationService:
 
         # convert the data into json and set the data into redis caching
         redis_key = f"patients:medications:{uuid_to_base64(session_user.id)}"
-        medication_json = json.dumps(jsonable_encoder(medication_details))
-        redis.set(redis_key, medication_json, 3600)
+        await redis.set(redis_key, jsonable_encoder(medication_details), 3600)
 
         return medication_details
 
     @staticmethod
     async def get_patient_medications(
-        session_user: Patient, db: AsyncSession, redis: Redis
+        session_user: Patient, db: AsyncSession, redis: Cache
     ):
         patient_id = uuid_to_base64(session_user.id)
         redis_key = f"patients:medications:{patient_id}"
 
         # retrieve medications if data already cached
-        if cached_medication_details := redis.get(redis_key):
-            return json.loads(cached_medication_details)
+        if (cached_medication_details := await redis.get(redis_key)) is not None:
+            return cached_medication_details
 
         # Get the latest/active Medication record of the consulting patient
         query = (
@@ -95,21 +94,20 @@ class MedicationService:
         medication_details = PatientSerialization.suggestion(db_patient_medications)
 
         # convert the data into json and set the data into redis caching
-        medication_json = json.dumps(jsonable_encoder(medication_details))
-        redis.set(redis_key, medication_json, 3600)
+        await redis.set(redis_key, jsonable_encoder(medication_details), 3600)
 
         return medication_details
 
     @staticmethod
     async def appointment_medication_by_id(
-        appointment_id: str, db: AsyncSession, redis: Redis
+        appointment_id: str, db: AsyncSession, redis: Cache
     ):
         appointment_uid = base64_to_uuid(appointment_id)
         redis_key = f"patients:appointments:{appointment_id}:prescription"
 
         # retrieve medications if data already cached
-        if cached_medications := redis.get(redis_key):
-            return json.loads(cached_medications)
+        if (cached_medications := await redis.get(redis_key)) is not None:
+            return cached_medications
 
         query = (
             select(Medication)
@@ -131,10 +129,9 @@ class MedicationService:
         )
 
         # convert the data into json and set the data into redis caching
-        appointment_medication_json = json.dumps(
-            jsonable_encoder(appointment_medication_details)
+        await redis.set(
+            redis_key, jsonable_encoder(appointment_medication_details), 3600
         )
-        redis.set(redis_key, appointment_medication_json, 3600)
 
         return appointment_medication_details
 
@@ -144,7 +141,7 @@ class MedicationService:
         session_user: Patient | Doctor,
         patient_id: str | None,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
     ):
         if patient_id:
             decoded_patient_id = base64_to_uuid(patient_id)
@@ -195,14 +192,13 @@ class MedicationService:
         medication_record = PatientSerialization.suggestion(db_medications)
 
         # Convert the data into json and store it into redis
-        medication_record_json = json.dumps(jsonable_encoder(medication_record))
-        redis.set(redis_key, medication_record_json, 3600)
+        await redis.set(redis_key, jsonable_encoder(medication_record), 3600)
 
         return medication_record
 
     @staticmethod
     async def delete_patient_medications(
-        session_user: Patient, id: str, db: AsyncSession, redis: Redis
+        session_user: Patient, id: str, db: AsyncSession, redis: Cache
     ):
         patient_id = uuid_to_base64(session_user.id)
         appointment_id = base64_to_uuid(id)
@@ -222,7 +218,7 @@ class MedicationService:
         # Delete the existing redis cache
         medication_key = f"patients:medications:{patient_id}"
         upcoming_key = f"patients:appointments:{patient_id}:upcoming"
-        redis.delete(medication_key, upcoming_key)
+        await redis.delete(medication_key, upcoming_key)
 
         return {"message": f"Successfuly deleted medication record #{id}"}
 
@@ -231,7 +227,7 @@ class MedicationService:
     #     payload: GenerateMedicationAi,
     #     session_user: Patient,
     #     db: AsyncSession,
-    #     redis: Redis,
+    #     redis: Cache,
     # ):
     #     try:
     #         # prepare a prompt for OpenAI
@@ -0,0 +1,160 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Message
+from app.core.config import settings
+from app.db import AsyncSessionLocal, unit_of_work
+
+
+# Columns of the messages written by the websocket handlers
+COLUMNS = ("id", "sender_id", "receiver_id", "content", "type", "is_seen", "created_at")
+
+STOP = None  # Queued by `close` after the last message
+
+
+class MessageWriter:
+    """
+    Write-behind persistence of the chat messages.
+    ----------------------------------------------
+
+    The websocket handlers deliver a message right away and submit it here, where
+    it waits in a bounded queue (a full queue holds the submitting socket back).
+    A single background task drains the queue in micro-batches: the messages that
+    arrive within `chat_write_interval` (up to `chat_write_batch_size`) are stored
+    by one `INSERT ... RETURNING` in a short transaction of their own, instead of a
+    round trip n commit per message.
+
+    The ids are generated before the insert (by the client or the handler), so a
+    message resent after a failure is stored only once. Every message is then
+    acknowledged through its callback w its status:
+    - stored: inserted by this batch.
+    - duplicate: a message w the same id was stored already.
+    - failed: the message could not be stored, the client may resend it.
+
+    A message the database rejects (e.g, an unknown receiver) must not fail the
+    messages of the other users in its batch, so a rejected batch is split in
+    halves until the rejected messages are isolated.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        batch_size: int = 500,
+        interval: float = 0.05,
+        queue_size: int = 10_000,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.stats = {"batches": 0, "stored": 0, "duplicate": 0, "failed": 0}
+        self._writer: asyncio.Task | None = None
+
+    # Queue a message to be stored, `on_done` receives its status afterwards
+    async def submit(
+        self, message: Message, on_done: Callable[[str], Awaitable] | None = None
+    ):
+        await self.queue.put((message, on_done))
+
+    # Start storing the queued messages
+    def listen(self):
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write())
+
+    # Store the messages queued so far n stop
+    async def close(self):
+        if self._writer is not None:
+            await self.queue.put(STOP)
+            await self._writer
+            self._writer = None
+
+    async def _write(self):
+        while True:
+            batch = [await self.queue.get()]
+
+            # Give the batch some time to fill up, unless it is full already
+            if batch[0] is not STOP and self.queue.qsize() < self.batch_size:
+                await asyncio.sleep(self.interval)
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            stop = STOP in batch
+            if pending := [entry for entry in batch if entry is not STOP]:
+                await self.flush(pending)
+            if stop:
+                return
+
+    # Store a batch of messages in a single statement, then acknowledge them
+    async def flush(self, batch: list):
+        rows = [
+            {column: getattr(message, column) for column in COLUMNS}
+            for message, _ in batch
+        ]
+
+        failed = set()
+        try:
+            stored = await self.store(rows, failed)
+        except Exception as e:
+            # The writer must keep running for the following batches
+            print(f"Storing {len(batch)} chat messages failed: {e}", flush=True)
+            stored, failed = set(), {row["id"] for row in rows}
+
+        statuses = []
+        for message, _ in batch:
+            if message.id in failed:
+                statuses.append("failed")
+            elif message.id in stored:
+                stored.discard(message.id)  # A resend w/in the batch is a duplicate
+                statuses.append("stored")
+            else:
+                statuses.append("duplicate")
+        self.stats["batches"] += 1
+        for status in statuses:
+            self.stats[status] += 1
+
+        # A failing acknowledgement must not affect the others
+        results = await asyncio.gather(
+            *[
+                on_done(status)
+                for (_, on_done), status in zip(batch, statuses)
+                if on_done is not None
+            ],
+            return_exceptions=True,
+        )
+        for error in (r for r in results if isinstance(r, Exception)):
+            print(f"Chat message acknowledgement failed: {error}", flush=True)
+
+    # Store the rows, returns the ids of the inserted ones n adds the ids of the
+    # rejected ones to `failed`
+    async def store(self, rows: list[dict], failed: set) -> set:
+        try:
+            async with unit_of_work("chat message writer", self.session_factory) as db:
+                result = await db.execute(
+                    insert(Message)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=[Message.id])
+                    .returning(Message.id)
+                )
+                return set(result.scalars().all())
+        except (IntegrityError, DataError) as e:
+            if len(rows) == 1:
+                print(f"Chat message {rows[0]['id']} was rejected: {e}", flush=True)
+                failed.add(rows[0]["id"])
+                return set()
+
+            # Retry both halves on their own, isolating the rejected rows
+            middle = len(rows) // 2
+            stored = await self.store(rows[:middle], failed)
+            return stored | await self.store(rows[middle:], failed)
+
+
+message_writer = MessageWriter(
+    AsyncSessionLocal,
+    settings.chat_write_batch_size,
+    settings.chat_write_interval,
+    settings.chat_write_queue_size,
+)
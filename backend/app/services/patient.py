@@ -1,16 +1,16 @@
-import json
-from redis import Redis
 from sqlalchemy import func, select
 
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import User, Patient
+from app.core.cache import Cache
 from app.core.utils import ResponseHandler
 from app.core.security import (
     uuid_to_base64,
     decrypt,
     verify_password,
     generate_hash,
+    forget_principal,
 )
 from app.schemas.users import (
     UserUpdate,
@@ -22,12 +22,12 @@ from sqlalchemy.orm import defer
 
 class PatientService:
     @staticmethod
-    async def get_profile_info(session_user: Patient, db: AsyncSession, redis: Redis):
+    async def get_profile_info(session_user: Patient, db: AsyncSession, redis: Cache):
         patient_id = uuid_to_base64(session_user.id)
         redis_key = f"patients:info:{patient_id}"
 
-        if cached_patient_info := redis.get(redis_key):
-            return json.loads(cached_patient_info)
+        if (cached_patient_info := await redis.get(redis_key)) is not None:
+            return cached_patient_info
 
         query = (
             select(Patient)
@@ -50,15 +50,14 @@ class PatientService:
         patient_info_data = profile_data(db_patient_info)
 
         # convert the data into json and set the data into redis caching
-        patient_info_json = json.dumps(jsonable_encoder(patient_info_data))
-        redis.set(redis_key, patient_info_json, 3600)
+        await redis.set(redis_key, jsonable_encoder(patient_info_data), 3600)
 
         return patient_info_data
 
     # handle updating patient information /patient
     @staticmethod
     async def change_patient_information(
-        updated_data: UserUpdate, session_user: Patient, db: AsyncSession, redis: Redis
+        updated_data: UserUpdate, session_user: Patient, db: AsyncSession, redis: Cache
     ):
         result_user = await db.execute(select(User).where(User.id == session_user.id))
         db_user_info = result_user.scalar_one()
@@ -86,27 +85,36 @@ class PatientService:
         await db.commit()
         await db.refresh(db_patient_info)
 
+        # the cached session snapshot of the patient is outdated now
+        await forget_principal(redis, session_user.id)
+
         # restructure the result for general users (e.g, replace ids w base64 strings)
         appointment_info_data = profile_data(db_patient_info)
 
         # convert the data into json and set the data into redis caching
         redis_key = f"patients:info:{uuid_to_base64(session_user.id)}"
-        patient_info_json = json.dumps(jsonable_encoder(appointment_info_data))
-        redis.set(redis_key, patient_info_json, 3600)
+        await redis.set(redis_key, jsonable_encoder(appointment_info_data), 3600)
 
         return appointment_info_data
 
     # handle updating account password /default
     @staticmethod
     async def change_user_password(
-        updated_data: UserPasswordChange, session_user: Patient, db: AsyncSession
+        updated_data: UserPasswordChange,
+        session_user: Patient,
+        db: AsyncSession,
+        redis: Cache,
     ):
         # decrypt the passwords from the client
         decrypted_old_pass = await decrypt(updated_data.old_password)
         decrypted_new_pass = await decrypt(updated_data.new_password)
 
+        # the password is never part of the authenticated user snapshot
+        result_user = await db.execute(select(User).where(User.id == session_user.id))
+        db_patient = result_user.scalar_one()
+
         # verify user old password
-        if not verify_password(decrypted_old_pass, session_user.password):
+        if not verify_password(decrypted_old_pass, db_patient.password):
             raise HTTPException(
                 status_code=400, detail=f"old password is incorrect - {session_user.id}"
             )
@@ -117,15 +125,15 @@ class PatientService:
         # update the password
         updated_payload = {"password": new_hashed_pass, "updated_at": func.now()}
 
-        result_user = await db.execute(select(User).where(User.id == session_user.id))
-        db_patient = result_user.scalar_one()
-
         for key, value in updated_payload.items():
             setattr(db_patient, key, value)
 
         await db.commit()
         await db.refresh(db_patient)
 
+        # the cached session snapshot of the patient is outdated now
+        await forget_principal(redis, session_user.id)
+
         return ResponseHandler.fetch_successful(f"successfully changed user password.")
 
 
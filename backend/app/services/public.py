@@ -1,51 +1,60 @@
-from sqlalchemy import func, select, or_, and_, distinct
+from sqlalchemy import select, or_, and_, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import joinedload, defer
-from redis import Redis
-import json
 
+from app.core.cache import Cache, read_through
 from app.core.utils import ResponseHandler
+from app.core.pagination import Total, count_total, paginate
 from app.models import Doctor, Hospital
 from app.core.security import uuid_to_base64, base64_to_uuid
 
 
+# Redis key for individual pages of doctors (only when filtering is not being applied)
+def doctors_page_key(args: dict) -> str | None:
+    if args["q"] or args["hospitals"] or args["locations"] or args["experience"]:
+        return None
+    if args["total_mode"] not in (None, "cached"):
+        return None
+    return f"doctors:page:{args['cursor'] or args['page']}:{args['limit']}"
+
+
+# Redis key for individual pages of hospitals (only when filtering is not being applied)
+def hospitals_page_key(args: dict) -> str | None:
+    if args["q"] or args["locations"] or args["total_mode"] not in (None, "cached"):
+        return None
+    return f"hospitals:page:{args['cursor'] or args['page']}:{args['limit']}"
+
+
+# Redis key for individual pages of doctors of a hospital
+def hospital_doctors_page_key(args: dict) -> str | None:
+    if args["total_mode"] not in (None, "cached"):
+        return None
+    page = args["cursor"] or args["page"]
+    return f"doctors:hospital:{args['hospital_id']}:page:{page}:{args['limit']}"
+
+
 class DoctorService:
     # Retrieve a list of doctors based on various search criteria.
     @staticmethod
+    @read_through(doctors_page_key, 3600)
     async def get_all_doctors(
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
         q: str | None,
         page: int,
         limit: int,
         hospitals: list[str] | None,
         locations: list[str] | None,
         experience: int | None,
+        cursor: str | None = None,
+        total_mode: Total | None = None,
     ):
-        query = select(Doctor)
-        count = select(func.count(Doctor.id))
+        query = select(Doctor).join(Hospital)
 
         page = max(1, page)  # Allow page only to be greater than 1
-        offset = (page - 1) * limit  # Calcuate offset based on page and limit
         filter_args = []
 
-        redis_key = f"doctors:page:{page}"  # Redis key for individual pages
-        redis_key_total = f"doctors:total"  # Redis key for size of the database
-
-        # Load result from redis caching if already stored (only when filtering is not being applied)
-        if (
-            (cached_doctors_data := redis.get(redis_key))
-            and (cached_total_doctors := redis.get(redis_key_total))
-            and (q is None)
-            and (hospitals is None)
-            and (locations is None)
-            and (experience is None)
-        ):
-            total = json.loads(cached_total_doctors)
-            doctors = json.loads(cached_doctors_data)
-            return {"total": total, "doctors": doctors}
-
         # Apply filtering arguments if provided (q, experience, hospitals, locations)
         if q:
             filter_args.append(Doctor.name.ilike(f"%{q}%"))
@@ -56,63 +65,53 @@ class DoctorService:
         if locations:
             filter_args.append(Hospital.city.in_(locations))
 
-        # Filter out the query and the count of the query based on condition
+        # Filter out the query based on condition
         if filter_args:
             query = query.where(or_(*filter_args))
-            # Get the total length of filtered records
-            statement = count.where(or_(*filter_args)).join(Hospital)
-            count_query = await db.execute(statement)
-        else:
-            count_query = await db.execute(count)
 
-        query = (
-            query.join(Hospital)
-            .options(
-                defer(Doctor.password),  # Exclude password
-                defer(Doctor.created_at),  # Exclude created_at
-                defer(Doctor.updated_at),  # Exclude updated_at
-                defer(Doctor.role),  # Exclude user role
-                defer(Doctor.hospital_id),  # Exclude hospital_id
-                joinedload(Doctor.hospital).load_only(
-                    Hospital.name,  # Include name
-                    Hospital.city,  # Include city
-                    Hospital.address,  # Include address
-                ),
-            )
-            .offset(offset)
-            .limit(limit)
+        # Get the total length of the (filtered) records, only the whole list is cached
+        total = await count_total(
+            db,
+            query,
+            total_mode or "cached",
+            redis,
+            None if filter_args else "doctors:total",
+        )
+
+        query = query.options(
+            defer(Doctor.password),  # Exclude password
+            defer(Doctor.created_at),  # Exclude created_at
+            defer(Doctor.updated_at),  # Exclude updated_at
+            defer(Doctor.role),  # Exclude user role
+            defer(Doctor.hospital_id),  # Exclude hospital_id
+            joinedload(Doctor.hospital).load_only(
+                Hospital.name,  # Include name
+                Hospital.city,  # Include city
+                Hospital.address,  # Include address
+            ),
         )
 
         # Retrieve all the doctor informations
-        result = await db.execute(query)
-        filtered_doctors = result.scalars().all()
+        filtered_doctors, next_cursor = await paginate(
+            db, query, [Doctor.id], limit, page, cursor
+        )
 
         # Restructure doctor data from the result
         filtered_doctors = jsonable_encoder(
             [serialized_doctor(doctor) for doctor in filtered_doctors]
         )
 
-        # Get the total length of the database
-        total = count_query.scalar()
-
-        # Store doctors information into redis if no filtering args was applied
-        if not q and not hospitals and not locations and not experience:
-            total_doctors_json = json.dumps(total)
-            doctors_data_json = json.dumps(filtered_doctors)
-            redis.set(redis_key_total, total_doctors_json, 3600)
-            redis.set(redis_key, doctors_data_json, 3600)
-
-        return {"total": total, "doctors": filtered_doctors}
+        return {"total": total, "doctors": filtered_doctors, "next_cursor": next_cursor}
 
     # Retrieve a doctor's information by their ID.
     @staticmethod
-    async def get_doctor_by_id(doctor_id: str, db: AsyncSession, redis: Redis):
+    async def get_doctor_by_id(doctor_id: str, db: AsyncSession, redis: Cache):
         doctor_id_uuid = base64_to_uuid(doctor_id)  # covert base64 string to uuid
         redis_key = f"doctors:info:{doctor_id}"  # redis key for specific doctor
 
         # load result from redis caching if already stored
-        if cached_doctor_data := redis.get(redis_key):
-            return json.loads(cached_doctor_data)
+        if (cached_doctor_data := await redis.get(redis_key)) is not None:
+            return cached_doctor_data
 
         query = (
             select(Doctor)
@@ -143,150 +142,105 @@ class DoctorService:
         doctor_info = serialized_doctor(doctor_info_data)
 
         # Store doctor information into redis for caching
-        doctors_info_json = json.dumps(jsonable_encoder(doctor_info))
-        redis.set(redis_key, doctors_info_json, 3600)
+        await redis.set(redis_key, jsonable_encoder(doctor_info), 3600)
 
         return doctor_info
 
     # Retrieve a list of doctors associated with a specific hospital by hospital ID.
     @staticmethod
+    @read_through(hospital_doctors_page_key, 3600)
     async def get_doctors_by_hospital_id(
         hospital_id: str,
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
         page: int,
         limit: int,
+        cursor: str | None = None,
+        total_mode: Total | None = None,
     ):
         hospital_id_uuid = base64_to_uuid(hospital_id)
-        count = select(func.count(Doctor.id)).where(
-            Doctor.hospital_id == hospital_id_uuid
-        )
-
         page = max(1, page)  # Allow page only to be greater than 1
-        offset = (page - 1) * limit  # Calcuate offset based on page and limit
-
-        redis_key = f"doctors:hospital:{hospital_id}:page:{page}"  # Redis key for individual pages
-        redis_key_total = f"doctors:hospital:{hospital_id}:total"  # Redis key for size of the database
-
-        # Load result from redis caching if already stored
-        if (cached_doctors_data := redis.get(redis_key)) and (
-            (cached_total_doctors := redis.get(redis_key_total))
-        ):
-            total = json.loads(cached_total_doctors)
-            result = json.loads(cached_doctors_data)
-            return {"total": total, "doctors": result}
 
         query = (
-            select(Doctor)
-            .where(Doctor.hospital_id == hospital_id_uuid)
-            .join(Hospital)
-            .options(
-                defer(Doctor.password),  # Exclude password
-                defer(Doctor.created_at),  # Exclude created_at
-                defer(Doctor.updated_at),  # Exclude updated_at
-                defer(Doctor.role),  # Exclude user role
-                defer(Doctor.hospital_id),  # Exclude hospital_id
-                joinedload(Doctor.hospital).load_only(
-                    Hospital.name,  # Exclude name,
-                    Hospital.city,  # Exclude city
-                    Hospital.address,  # Exclude address
-                ),
-            )
-            .offset(offset)
-            .limit(limit)
+            select(Doctor).where(Doctor.hospital_id == hospital_id_uuid).join(Hospital)
         )
 
-        # Get the total length of the database
-        count_query = await db.execute(count)
-        total = count_query.scalar()
+        # Get the total length of the doctors of the hospital
+        total = await count_total(
+            db,
+            query,
+            total_mode or "cached",
+            redis,
+            f"doctors:hospital:{hospital_id}:total",
+        )
+
+        query = query.options(
+            defer(Doctor.password),  # Exclude password
+            defer(Doctor.created_at),  # Exclude created_at
+            defer(Doctor.updated_at),  # Exclude updated_at
+            defer(Doctor.role),  # Exclude user role
+            defer(Doctor.hospital_id),  # Exclude hospital_id
+            joinedload(Doctor.hospital).load_only(
+                Hospital.name,  # Exclude name,
+                Hospital.city,  # Exclude city
+                Hospital.address,  # Exclude address
+            ),
+        )
 
         # Retrieve all the doctor informations
-        result = await db.execute(query)
-        filtered_doctors = result.scalars().all()
+        filtered_doctors, next_cursor = await paginate(
+            db, query, [Doctor.id], limit, page, cursor
+        )
 
         # Restructure doctor data from the result
         filtered_doctors = jsonable_encoder(
             [serialized_doctor(doctor) for doctor in filtered_doctors]
         )
 
-        # Store doctors information into redis if no filtering args was applied
-        total_doctors_json = json.dumps(total)
-        doctors_data_json = json.dumps(filtered_doctors)
-        redis.set(redis_key_total, total_doctors_json, 3600)
-        redis.set(redis_key, doctors_data_json, 3600)
-
-        return {"total": total, "doctors": filtered_doctors}
+        return {"total": total, "doctors": filtered_doctors, "next_cursor": next_cursor}
 
 
 class HospitalService:
     @staticmethod
     # Retrieve the list of hospital names.
-    async def get_all_names(db: AsyncSession, redis: Redis):
-        redis_key = "hospitals:names"
-
-        if cached_hospital_names := redis.get(redis_key):
-            return json.loads(cached_hospital_names)
-
+    @read_through("hospitals:names", 3600, ["hospitals"], local_ttl=300)
+    async def get_all_names(db: AsyncSession, redis: Cache):
         # Get all the unique hospital names
         query = select(distinct(Hospital.name))
         result = await db.execute(query)
         filtered_names = result.scalars().all()
 
-        # Set the hospital names into redis
-        hospital_names_json = json.dumps(filtered_names)
-        redis.set(redis_key, hospital_names_json, 3600)
-
         return filtered_names
 
     # Retrieve the list of hospital locations.
     @staticmethod
-    async def get_all_locations(db: AsyncSession, redis: Redis):
-        redis_key = "hospitals:locations"
-        if cached_hospital_locations := redis.get(redis_key):
-            return json.loads(cached_hospital_locations)
-
+    @read_through("hospitals:locations", 3600, ["hospitals"], local_ttl=300)
+    async def get_all_locations(db: AsyncSession, redis: Cache):
         # get all the unique hospital loctions
         query = select(distinct(Hospital.city))
         result = await db.execute(query)
         filtered_locations = result.scalars().all()
 
-        # set the hospital locations into redis
-        hospital_locations_json = json.dumps(filtered_locations)
-        redis.set(redis_key, hospital_locations_json, 3600)
-
         return filtered_locations
 
     # Retrieve a list of hospitals based on various search criteria.
     @staticmethod
+    @read_through(hospitals_page_key, 3600, ["hospitals"])
     async def get_all_hospitals(
         db: AsyncSession,
-        redis: Redis,
+        redis: Cache,
         q: str | None,
         page: int,
         limit: int,
         locations: list[str] | None,
+        cursor: str | None = None,
+        total_mode: Total | None = None,
     ):
         query = select(Hospital)
-        count = select(func.count(Hospital.id))
 
         page = max(1, page)  # Allow page only to be greater than 1
-        offset = (page - 1) * limit  # Calcuate offset based on page and limit
         filter_args = []
 
-        redis_key = f"hospitals:page:{page}"  # Redis key for individual pages
-        redis_key_total = f"hospitals:total"  # Redis key for size of the database
-
-        # Load result from redis caching if already stored
-        if (
-            (cached_hospitals_data := redis.get(redis_key))
-            and (cached_total_hospitals := redis.get(redis_key_total))
-            and (q is None)
-            and (locations is None)
-        ):
-            total = json.loads(cached_total_hospitals)
-            hospitals = json.loads(cached_hospitals_data)
-            return {"total": total, "hospitals": hospitals}
-
         # Apply filtering arguments if provided
         if q:
             filter_args.append(Hospital.name.ilike(f"%{q}%"))
@@ -295,52 +249,47 @@ class HospitalService:
 
         if filter_args:
             query = query.where(and_(*filter_args))
-            # Get the total length of filtered records
-            statement = count.where(and_(*filter_args))
-            count_query = await db.execute(statement)
-        else:
-            # Get the total length of the database
-            count_query = await db.execute(count)
 
-        query = (
-            query.options(
-                defer(Hospital.created_at),  # Exclude created_at
-                defer(Hospital.updated_at),  # Exclude updated_at
-            )
-            .offset(offset)
-            .limit(limit)
+        # Get the total length of the (filtered) records, only the whole list is cached
+        total = await count_total(
+            db,
+            query,
+            total_mode or "cached",
+            redis,
+            None if filter_args else "hospitals:total",
+            tags=["hospitals"],
+        )
+
+        query = query.options(
+            defer(Hospital.created_at),  # Exclude created_at
+            defer(Hospital.updated_at),  # Exclude updated_at
         )
 
         # Retrieve all the doctor informations
-        result = await db.execute(query)
-        filtered_hospitals = result.scalars().all()
+        filtered_hospitals, next_cursor = await paginate(
+            db, query, [Hospital.id], limit, page, cursor
+        )
 
         # Restructure doctor data from the result
         filtered_hospitals = jsonable_encoder(
             [serialized_hospital(hospital) for hospital in filtered_hospitals]
         )
 
-        # Get the total length of the database
-        total = count_query.scalar()
-
-        # Store doctors information into redis if no filtering args was applied
-        if not q and not locations:
-            total_hospital_json = json.dumps(total)
-            hospitals_data_json = json.dumps(filtered_hospitals)
-            redis.set(redis_key_total, total_hospital_json, 3600)
-            redis.set(redis_key, hospitals_data_json, 3600)
-
-        return {"total": total, "hospitals": filtered_hospitals}
+        return {
+            "total": total,
+            "hospitals": filtered_hospitals,
+            "next_cursor": next_cursor,
+        }
 
     # Retrieve a hospital's information by its ID.
     @staticmethod
-    async def get_hospital_by_id(hospital_id: str, db: AsyncSession, redis: Redis):
+    async def get_hospital_by_id(hospital_id: str, db: AsyncSession, redis: Cache):
         hospital_id_uuid = base64_to_uuid(hospital_id)  # Covert base64 string to uuid
         redis_key = f"hospitals:info:{hospital_id}"  # Set keys dynamically
 
         # Load result from redis caching if already stored
-        if cached_hospital_data := redis.get(redis_key):
-            return json.loads(cached_hospital_data)
+        if (cached_hospital_data := await redis.get(redis_key)) is not None:
+            return cached_hospital_data
 
         query = (
             select(Hospital)
@@ -362,8 +311,7 @@ class HospitalService:
         hospital_info = serialized_hospital(hospital_info_data)
 
         # Store doctor information into redis for caching
-        hospital_info_json = json.dumps(jsonable_encoder(hospital_info))
-        redis.set(redis_key, hospital_info_json, 3600)
+        await redis.set(redis_key, jsonable_encoder(hospital_info), 3600)
 
         return hospital_info
 
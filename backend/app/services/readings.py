@@ -0,0 +1,513 @@
+import re
+import json
+import math
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Patient, HealthReading, HealthReadingRollup
+from app.core.config import settings
+from app.core.cache import redis_cache
+from app.core.security import uuid_to_base64
+from app.core.socket import socket_manager
+
+
+# Kinds of readings n the kinds of the rows they are stored as
+READING_KINDS = {
+    "glucose": ["glucose"],
+    "blood_pressure": ["systolic", "diastolic"],
+    "systolic": ["systolic"],
+    "diastolic": ["diastolic"],
+}
+
+# Seconds per bucket of the rollups, finest first
+RESOLUTIONS = {"5m": 300, "1h": 3600, "1d": 86400}
+
+CHUNK_SIZE = 1000  # Rows per insert statement (up to 8 parameters each)
+FUTURE_TOLERANCE = timedelta(minutes=5)  # Device clocks running slightly ahead
+DASHBOARD_READINGS = 288  # Latest readings per kind shown along the health record
+RAW_SPAN = timedelta(days=1)  # Longest chart of raw readings (a cgm reads every minute)
+DEFAULT_PARTITION = "health_readings_default"  # Readings w/o a monthly partition
+PARTITION_NAME = re.compile(r"^health_readings_(\d{4})_(\d{2})$")
+
+
+class HealthReadings:
+    """
+    Append-only ingestion of the timestamped health readings of the patients.
+    --------------------------------------------------------------------------
+
+    Devices (e.g, a cgm sensor or a blood pressure monitor) upload their readings
+    in batches of newline delimited json, one reading per line:
+
+        {"type": "glucose", "value": 104, "time": "2026-10-18T07:30:00Z"}
+        {"type": "blood_pressure", "systolic": 121, "diastolic": 79, "time": ...}
+
+    Every reading is stored as its own row of `health_readings` (partitioned by
+    month), so a new reading costs one row instead of rewriting the whole json
+    history of the health record. The whole body is parsed n validated first, so
+    a slow upload holds no connection, then inserted in chunks back to back within
+    a single transaction, so a batch is stored entirely or not at all. Readings
+    already stored (same kind n time) are skipped, which makes retried uploads
+    harmless.
+
+    The health record served to the dashboard carries the latest readings of every
+    kind (see `merge_readings`), its cached copy is dropped by every batch. Only
+    the readings stored by the batch are pushed to the monitoring room of the
+    patient, n added to the rollups of their buckets in the same transaction:
+    the min, max, sum n count of the readings per 5 minutes, hour n day. Charts
+    read the raw readings for a day at most n else the finest rollup that keeps
+    them below `readings_chart_points` (e.g, 2160 hourly points for 90 days).
+
+    The nightly retention drops the raw readings after `readings_retention_days`
+    (whole monthly partitions at once) n the 5 minute rollups after
+    `readings_rollup_retention_days`, the hourly n daily ones are kept.
+    """
+
+    # Store a batch of readings streamed as ndjson
+    @staticmethod
+    async def ingest(
+        lines: AsyncIterator[bytes], session_user: Patient, db: AsyncSession
+    ):
+        readings = []
+        async for number, line in numbered_lines(lines):
+            readings += parse_reading(line, number, session_user.id)
+            if len(readings) > settings.readings_max_batch:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"a batch holds at most {settings.readings_max_batch} readings.",
+                )
+
+        # the connection is checked out by the first insert, once the body is read
+        received, stored = len(readings), []
+        for i in range(0, received, CHUNK_SIZE):
+            stored += await insert_readings(db, readings[i : i + CHUNK_SIZE])
+        await upsert_rollups(db, session_user.id, stored)
+        await db.commit()
+
+        # push the new readings to the monitoring room of the patient, the cached
+        # health record is rebuilt w them on its next read
+        if stored:
+            patient_id = uuid_to_base64(session_user.id)
+            await redis_cache.delete(f"patients:monitorings:{patient_id}")
+            await socket_manager.send_private_msg(
+                f"{patient_id}_MONITORING", readings_delta(stored)
+            )
+
+        return {
+            "received": received,
+            "stored": len(stored),
+            "duplicates": received - len(stored),
+        }
+
+    # Create the monthly partitions of the readings up to `months` ahead
+    @staticmethod
+    async def create_partitions(db: AsyncSession, months: int = 3):
+        first = date.today().replace(day=1)
+        for _ in range(months + 1):
+            following = next_month(first)
+            # a failing month must not keep the following ones from being created
+            try:
+                await create_partition(db, first, following)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print(
+                    f"Creating the readings partition of {first:%Y-%m} failed: {e}",
+                    flush=True,
+                )
+            first = following
+
+    # Retrieve the readings of a kind for a chart, at the resolution fitting the window
+    @staticmethod
+    async def chart(
+        session_user: Patient,
+        db: AsyncSession,
+        kind: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ):
+        if kind not in READING_KINDS or len(READING_KINDS[kind]) > 1:
+            raise HTTPException(status_code=400, detail=f"unknown kind {kind!r}.")
+
+        end = as_utc(end) if end else datetime.now(timezone.utc)
+        start = as_utc(start) if start else end - RAW_SPAN
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start must be before end.")
+        # even the daily rollups of a longer window exceed the points of a chart
+        if end - start > timedelta(days=settings.readings_chart_points):
+            raise HTTPException(
+                status_code=400,
+                detail=f"a chart spans at most {settings.readings_chart_points} days.",
+            )
+
+        resolution = chart_resolution(start, end)
+        if resolution == "raw":
+            result = await db.execute(
+                select(HealthReading.measured_at, HealthReading.value)
+                .where(
+                    HealthReading.patient_id == session_user.id,
+                    HealthReading.kind == kind,
+                    HealthReading.measured_at >= start,
+                    HealthReading.measured_at < end,
+                )
+                .order_by(HealthReading.measured_at)
+            )
+            points = [
+                {"time": time, "mean": value, "min": value, "max": value, "count": 1}
+                for time, value in result.all()
+            ]
+        else:
+            result = await db.execute(
+                select(
+                    HealthReadingRollup.bucket,
+                    HealthReadingRollup.total,
+                    HealthReadingRollup.minimum,
+                    HealthReadingRollup.maximum,
+                    HealthReadingRollup.count,
+                )
+                .where(
+                    HealthReadingRollup.patient_id == session_user.id,
+                    HealthReadingRollup.kind == kind,
+                    HealthReadingRollup.resolution == resolution,
+                    HealthReadingRollup.bucket >= bucket_start(start, resolution),
+                    HealthReadingRollup.bucket < end,
+                )
+                .order_by(HealthReadingRollup.bucket)
+            )
+            points = [
+                {
+                    "time": time,
+                    "mean": round(total / count, 2),
+                    "min": low,
+                    "max": high,
+                    "count": count,
+                }
+                for time, total, low, high, count in result.all()
+            ]
+
+        return {
+            "kind": kind,
+            "resolution": resolution,
+            "start": start,
+            "end": end,
+            "points": points,
+        }
+
+    # Drop the raw readings older than `days` n the 5 minute rollups older than
+    # `rollup_days`
+    @staticmethod
+    async def prune(db: AsyncSession, days: int, rollup_days: int):
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=days)
+
+        # monthly partitions ending before the cutoff are dropped as a whole
+        dropped = []
+        for name in (await db.execute(text(PARTITIONS_QUERY))).scalars().all():
+            if (match := PARTITION_NAME.match(name)) is None:
+                continue  # e.g, the default partition
+            first = date(int(match[1]), int(match[2]), 1)
+            if next_month(first) <= cutoff.date():
+                await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+
+        # the rest of the expired readings (a brin index scan of their partitions)
+        readings = await db.execute(
+            delete(HealthReading).where(HealthReading.measured_at < cutoff)
+        )
+        rollups = await db.execute(
+            delete(HealthReadingRollup).where(
+                HealthReadingRollup.resolution == "5m",
+                HealthReadingRollup.bucket < now - timedelta(days=rollup_days),
+            )
+        )
+        await db.commit()
+
+        return {
+            "partitions": dropped,
+            "readings": readings.rowcount,
+            "rollups": rollups.rowcount,
+        }
+
+
+# Insert the rows w/o the stored ones, returns the inserted rows
+async def insert_readings(db: AsyncSession, rows: list[dict]) -> list:
+    result = await db.execute(
+        insert(HealthReading)
+        .values(rows)
+        .on_conflict_do_nothing()
+        .returning(HealthReading.kind, HealthReading.measured_at, HealthReading.value)
+    )
+    return result.all()
+
+
+# Add the stored rows to the rollups of their buckets at every resolution
+async def upsert_rollups(db: AsyncSession, patient_id, rows: list):
+    buckets = defaultdict(lambda: [math.inf, -math.inf, 0.0, 0])  # min, max, sum, count
+    for kind, measured_at, value in rows:
+        for resolution in RESOLUTIONS:
+            bucket = buckets[kind, resolution, bucket_start(measured_at, resolution)]
+            bucket[0] = min(bucket[0], value)
+            bucket[1] = max(bucket[1], value)
+            bucket[2] += value
+            bucket[3] += 1
+
+    rollups = [
+        {
+            "patient_id": patient_id,
+            "kind": kind,
+            "resolution": resolution,
+            "bucket": bucket,
+            "minimum": stats[0],
+            "maximum": stats[1],
+            "total": stats[2],
+            "count": stats[3],
+        }
+        for (kind, resolution, bucket), stats in sorted(buckets.items())
+    ]
+
+    # merged into the rollups stored already, every bucket appears once per statement
+    # n in the same order for concurrent uploads (no deadlocks on their rows)
+    for i in range(0, len(rollups), CHUNK_SIZE):
+        stmt = insert(HealthReadingRollup).values(rollups[i : i + CHUNK_SIZE])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    HealthReadingRollup.patient_id,
+                    HealthReadingRollup.kind,
+                    HealthReadingRollup.resolution,
+                    HealthReadingRollup.bucket,
+                ],
+                set_={
+                    "minimum": func.least(
+                        HealthReadingRollup.minimum, stmt.excluded.minimum
+                    ),
+                    "maximum": func.greatest(
+                        HealthReadingRollup.maximum, stmt.excluded.maximum
+                    ),
+                    "total": HealthReadingRollup.total + stmt.excluded.total,
+                    "count": HealthReadingRollup.count + stmt.excluded.count,
+                },
+            )
+        )
+
+
+# Latest readings of the patient per kind, in the shape of the health record records
+async def latest_readings(db: AsyncSession, patient_id, limit=DASHBOARD_READINGS):
+    rows = []
+    for kind in ("glucose", "systolic", "diastolic"):
+        result = await db.execute(
+            select(HealthReading.kind, HealthReading.measured_at, HealthReading.value)
+            .where(HealthReading.patient_id == patient_id, HealthReading.kind == kind)
+            .order_by(HealthReading.measured_at.desc())
+            .limit(limit)
+        )
+        rows += result.all()
+    return readings_delta(rows)
+
+
+# Health record (as served) along w the readings, skipping the readings whose time
+# is in the record already (e.g, copied into it by an update)
+def merge_readings(record: dict, readings: dict) -> dict:
+    def merged(records: list | None, new: list) -> list:
+        times = {item.get("time") for item in records or []}
+        return [*(records or []), *(item for item in new if item["time"] not in times)]
+
+    pressure = {item["type"]: item for item in record["blood_pressure_records"] or []}
+    for item in readings["blood_pressure_records"]:
+        previous = pressure.get(item["type"], {}).get("data")
+        pressure[item["type"]] = {
+            "type": item["type"],
+            "data": merged(previous, item["data"]),
+        }
+
+    return {
+        **record,
+        "blood_glucose_records": merged(
+            record["blood_glucose_records"], readings["blood_glucose_records"]
+        ),
+        "blood_pressure_records": list(pressure.values()),
+    }
+
+
+# Lines of a streamed body along w their number (1 based), skipping blank lines,
+# raises a 413 error as soon as the body or a line is too large
+async def numbered_lines(chunks: AsyncIterator[bytes]):
+    buffer, number, size = b"", 0, 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > settings.readings_max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"a batch holds at most {settings.readings_max_bytes} bytes.",
+            )
+
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            check_line_size(line, number)
+            if line.strip():
+                yield number, line
+        check_line_size(buffer, number + 1)  # a line still streaming in
+
+    if buffer.strip():
+        yield number + 1, buffer
+
+
+def check_line_size(line: bytes, number: int):
+    if len(line) > settings.readings_max_line_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"reading on line {number} exceeds {settings.readings_max_line_bytes} bytes.",
+        )
+
+
+# Rows of a reading line, raises a 400 error for an invalid reading
+def parse_reading(line: bytes, number: int, patient_id) -> list[dict]:
+    try:
+        reading = json.loads(line)
+        if (kinds := READING_KINDS.get(reading["type"])) is None:
+            raise ValueError(f"unknown type {reading['type']!r}")
+        measured_at = parse_time(reading["time"])
+
+        rows = []
+        for kind in kinds:
+            value = float(reading["value" if kind == reading["type"] else kind])
+            if not math.isfinite(value) or value <= 0:
+                raise ValueError(f"invalid {kind} value")
+            rows.append(
+                {
+                    "patient_id": patient_id,
+                    "kind": kind,
+                    "measured_at": measured_at,
+                    "value": value,
+                }
+            )
+        return rows
+    except (ValueError, TypeError, KeyError, OverflowError, OSError) as e:
+        # e.g, an unix time out of the range of the platform (OverflowError, OSError)
+        raise HTTPException(
+            status_code=400, detail=f"invalid reading on line {number}: {e}"
+        )
+
+
+# Time of a reading, iso 8601 (utc w/o an offset) or unix seconds
+def parse_time(value: str | int | float) -> datetime:
+    if isinstance(value, (int, float)):
+        measured_at = datetime.fromtimestamp(value, timezone.utc)
+    else:
+        measured_at = datetime.fromisoformat(value)
+        if measured_at.tzinfo is None:
+            measured_at = measured_at.replace(tzinfo=timezone.utc)
+
+    if measured_at > datetime.now(timezone.utc) + FUTURE_TOLERANCE:
+        raise ValueError("reading from the future")
+    return measured_at
+
+
+def as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# Start of the bucket (aligned to the unix epoch) a time falls in
+def bucket_start(value: datetime, resolution: str) -> datetime:
+    seconds = RESOLUTIONS[resolution]
+    return datetime.fromtimestamp(value.timestamp() // seconds * seconds, timezone.utc)
+
+
+# Finest resolution of a chart that is still stored n keeps it below the most points
+def chart_resolution(start: datetime, end: datetime) -> str:
+    span, age = end - start, datetime.now(timezone.utc) - start
+    if span <= RAW_SPAN and age <= timedelta(days=settings.readings_retention_days):
+        return "raw"
+
+    for resolution, seconds in RESOLUTIONS.items():
+        if resolution == "5m" and age > timedelta(
+            days=settings.readings_rollup_retention_days
+        ):
+            continue
+        if span.total_seconds() / seconds <= settings.readings_chart_points:
+            return resolution
+    return "1d"  # the window is capped by `chart`
+
+
+# New readings in the shape of the records of the health record, oldest first
+def readings_delta(rows: list) -> dict:
+    glucose, pressure = [], {"systolic": [], "diastolic": []}
+    for kind, measured_at, value in sorted(rows, key=lambda row: row[1]):
+        values = glucose if kind == "glucose" else pressure[kind]
+        values.append({"value": value, "time": measured_at.isoformat()})
+
+    return {
+        "type": "readings",
+        "blood_glucose_records": glucose,
+        "blood_pressure_records": [
+            {"type": kind, "data": data} for kind, data in pressure.items() if data
+        ],
+    }
+
+
+def next_month(first: date) -> date:
+    return (first + timedelta(days=32)).replace(day=1)
+
+
+# Create the monthly partition of the readings, moving the readings of the month
+# out of the default partition (e.g, stored while the beat was not running) as
+# postgres refuses to create a partition whose rows are in the default one
+async def create_partition(db: AsyncSession, first: date, following: date):
+    name = f"health_readings_{first:%Y_%m}"
+    if await db.scalar(text("SELECT to_regclass(:name)"), {"name": name}):
+        return
+
+    bounds = {
+        "first": datetime(first.year, first.month, 1, tzinfo=timezone.utc),
+        "following": datetime(following.year, following.month, 1, tzinfo=timezone.utc),
+    }
+    in_month = "measured_at >= :first AND measured_at < :following"
+    stray = await db.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month})"),
+        bounds,
+    )
+    if not stray:
+        await db.execute(text(partition_ddl(first, following)))
+        return
+
+    # all w/in the transaction, the readings are locked only meanwhile
+    await db.execute(
+        text(f"ALTER TABLE health_readings DETACH PARTITION {DEFAULT_PARTITION}")
+    )
+    await db.execute(text(partition_ddl(first, following)))
+    await db.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_month}"),
+        bounds,
+    )
+    await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"), bounds)
+    await db.execute(
+        text(
+            f"ALTER TABLE health_readings ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"
+        )
+    )
+
+
+# Monthly partition of the readings
+def partition_ddl(first: date, following: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS health_readings_{first:%Y_%m} "
+        f"PARTITION OF health_readings "
+        f"FOR VALUES FROM ('{first} 00:00+00') TO ('{following} 00:00+00')"
+    )
+
+
+# Names of the partitions of the readings
+PARTITIONS_QUERY = """
+SELECT child.relname
+FROM pg_inherits
+JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+WHERE parent.relname = 'health_readings'
+"""
@@ -0,0 +1,37 @@
+from uuid import UUID
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+
+from app.models import AppointmentSerial
+
+
+class SerialService:
+    """
+    Allocator of the appointment serial numbers of each doctor n day.
+    -----------------------------------------------------------------
+
+    The counter row is incremented by a single upsert inside the booking
+    transaction, so concurrent bookings never share a serial number and a
+    rolled back booking gives its number back. Bookings only wait for each other
+    when they target the same doctor on the same day.
+
+    Serial numbers are not gap-free: a rescheduled appointment takes the next
+    number of its new day n its old number is not reused, so the appointments
+    booked after it on the old day keep the numbers their patients were given.
+    """
+
+    # Allocate the next serial number (committed along w the appointment)
+    @staticmethod
+    async def next_serial(doctor_id: UUID, day: date, db: AsyncSession) -> int:
+        stmt = insert(AppointmentSerial).values(
+            doctor_id=doctor_id, day=day, last_serial=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["doctor_id", "day"],
+            set_={"last_serial": AppointmentSerial.last_serial + 1},
+        ).returning(AppointmentSerial.last_serial)
+
+        return await db.scalar(stmt)
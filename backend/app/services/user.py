@@ -1,35 +1,44 @@
 from typing import List
-from sqlalchemy import func
-from fastapi import Query, HTTPException
-from sqlalchemy.orm import Session, defer
+from sqlalchemy import func, select, update, delete
+from fastapi import HTTPException
+from sqlalchemy.orm import defer
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import User
 from app.core.utils import ResponseHandler
-from app.core.security import decrypt, generate_hash
+from app.core.cache import Cache
+from app.core.security import decrypt, generate_hash, forget_principal
 from app.schemas.users import UserAdminCreate, UserAdminResponse, UserAdminUpdate
 
 
 class UserService:
   @staticmethod
-  async def retrieve_all_users(
-    db: Session,
-    offset: int = 0, 
-    # this way it adds a layer of constraint, asking the parameter either be 100 or less than 100
-    limit: int = Query(default=100, le=100),
-  ):
-    users = db.query(User).offset(offset).limit(limit).options(defer(User.password)).all()
-    
+  async def retrieve_all_users(db: AsyncSession, page: int, limit: int):
+    page = max(1, page) # allow page only to be greater than 1
+    offset = (page - 1) * limit # calcuate offset based on page and limit
+
+    total = await db.scalar(select(func.count(User.id)))
+    result = await db.execute(
+      select(User)
+      .options(defer(User.password))
+      .order_by(User.created_at.desc())
+      .offset(offset)
+      .limit(limit)
+    )
+    users = result.scalars().all()
+
     return {
       "status": "successful",
       "message": "successfully fetched all users!",
+      "total": total,
       "data": users,
     } 
 
 
   # create a new user account /admin 
   @staticmethod
-  async def create_new_user(user_data: UserAdminCreate, db: Session):
-    exits = db.query(User).where(User.email == user_data.email).first()
+  async def create_new_user(user_data: UserAdminCreate, db: AsyncSession):
+    exits = await db.scalar(select(User.id).where(User.email == user_data.email))
     
     # check if the user exists
     if exits:
@@ -50,8 +59,8 @@ class UserService:
     new_user = User(**payload)
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return {
       "status": "successful",
@@ -72,8 +81,8 @@ class UserService:
 
   # get user account informations by id /admin
   @staticmethod
-  async def get_user_by_id(id: str, db: Session):
-    user = db.query(User).where(User.id == id).first()
+  async def get_user_by_id(id: str, db: AsyncSession):
+    user = await db.get(User, id, options=[defer(User.password)])
     
     # if no user was found 
     if not user:
@@ -95,9 +104,9 @@ class UserService:
 
   # update user account informations by id /admin
   @staticmethod
-  async def update_user_by_id(id: str, updated_data: UserAdminUpdate, db: Session):
+  async def update_user_by_id(id: str, updated_data: UserAdminUpdate, db: AsyncSession, redis: Cache):
     # get the user 
-    user = db.query(User).where(User.id == id).first()
+    user = await db.get(User, id, options=[defer(User.password)])
     
     # if no user found 
     if not user:
@@ -118,9 +127,12 @@ class UserService:
     # update the user 
     updated_payload = { "updated_at": func.now(), **updated_data.none_excluded() }
     
-    db.query(User).where(User.id == id).update(updated_payload)
-    db.commit()
-    db.refresh(user)
+    await db.execute(update(User).where(User.id == id).values(updated_payload))
+    await db.commit()
+    await db.refresh(user)
+
+    # drop the cached session snapshot of the user
+    await forget_principal(redis, id)
 
     return {
       "status": "successful",
@@ -140,14 +152,17 @@ class UserService:
 
   # delete user account by id /admin
   @staticmethod
-  async def delete_user_by_id(id: str, db: Session):
-    targeted_user = db.query(User).where(User.id == id).first()
+  async def delete_user_by_id(id: str, db: AsyncSession, redis: Cache):
+    # delete the user w a single statement
+    deleted = await db.scalar(delete(User).where(User.id == id).returning(User.id))
   
-    if not targeted_user:
+    if not deleted:
       raise ResponseHandler.not_found_error(f'user not found - {id}')
     
-    db.delete(targeted_user)
-    db.commit()
+    await db.commit()
+
+    # drop the cached session snapshot of the user
+    await forget_principal(redis, id)
 
     return {
       "status": "successful",
@@ -158,12 +173,12 @@ class UserService:
 
   # delete a batch of user accounts /admin
   @staticmethod
-  async def delete_user_batch(ids: List[str], db: Session):
-    # get the target users w the ids 
-    targeted_users = db.query(User).filter(User.id.in_(ids)).all()
+  async def delete_user_batch(ids: List[str], db: AsyncSession, redis: Cache):
+    # delete the target users w a single statement
+    result = await db.execute(delete(User).where(User.id.in_(ids)).returning(User.id))
     
     # get the missing ids if there is any
-    existing_ids = [str(user.id) for user in targeted_users]
+    existing_ids = [str(user_id) for user_id in result.scalars().all()]
     missing_ids = list(set(ids) - set(existing_ids))
     missing_message = None
 
@@ -171,9 +186,10 @@ class UserService:
     if len(existing_ids) == 0:
       raise ResponseHandler.not_found_error("user " +  ", ".join(missing_ids) + " has not been found!")
 
-    # delete the targeted users 
-    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
-    db.commit()
+    await db.commit()
+
+    # drop the cached session snapshots of the users
+    await forget_principal(redis, *existing_ids)
 
     # custom message when some of the ids are missing 
     if len(missing_ids) > 0:
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 from app.core.config import settings
 
 celery = Celery(__name__)
@@ -14,6 +15,21 @@ celery.conf.beat_schedule = {
         "task": "app.workers.tasks.greeting",
         "schedule": 3600,
         "args": (settings.owner_email,)
+    },
+    "reconcile-doctor-analytics-every-night": {
+        "task": "app.workers.tasks.analytics",
+        "schedule": crontab(hour=3, minute=0),
+        "args": (settings.analytics_reconcile_days,)
+    },
+    "create-health-reading-partitions-every-night": {
+        "task": "app.workers.tasks.reading_partitions",
+        "schedule": crontab(hour=3, minute=30),
+        "args": (3,)
+    },
+    "prune-health-readings-every-night": {
+        "task": "app.workers.tasks.reading_retention",
+        "schedule": crontab(hour=3, minute=45),
+        "args": (settings.readings_retention_days, settings.readings_rollup_retention_days)
     }
 }
 
@@ -1,6 +1,15 @@
+import asyncio
+
+from datetime import date, timedelta
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
 from app.workers.celery import celery
 from app.core.config import settings
+from app.db import ASYNC_DATABASE_URL
 from app.services.mail import send_email
+from app.services.doctor.analytics import DoctorAnalytics
+from app.services.readings import HealthReadings
 
 
 @celery.task(name="app.workers.tasks.greeting")
@@ -11,4 +20,53 @@ def greet_owner(name: str):
 def send_email_task(recipient: str, subject: str, body: str):
     send_email(recipient, subject, body)
     return { "message": "successfully email sent!", "sender": settings.owner_email, "recipient": recipient }
-    
+
+
+# rebuild the doctor analytics rollup of the last n days (or the whole history)
+@celery.task(name="app.workers.tasks.analytics")
+def reconcile_analytics_task(days: int | None = None):
+    since = date.today() - timedelta(days=days) if days is not None else None
+    asyncio.run(reconcile_analytics(since))
+    return { "message": "successfully reconciled doctor analytics!", "since": str(since) }
+
+
+async def reconcile_analytics(since: date | None):
+    # dedicated engine w/o pooling, as every task run has its own event loop
+    engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as db:
+            await DoctorAnalytics.rebuild(db, since)
+    finally:
+        await engine.dispose()
+
+
+# create the monthly partitions of the health readings up to n months ahead
+@celery.task(name="app.workers.tasks.reading_partitions")
+def create_reading_partitions_task(months: int = 3):
+    asyncio.run(create_reading_partitions(months))
+    return { "message": "successfully created health reading partitions!", "months": months }
+
+
+async def create_reading_partitions(months: int):
+    engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as db:
+            await HealthReadings.create_partitions(db, months)
+    finally:
+        await engine.dispose()
+
+
+# drop the raw health readings n the 5 minute rollups past their retention
+@celery.task(name="app.workers.tasks.reading_retention")
+def prune_readings_task(days: int = 90, rollup_days: int = 365):
+    result = asyncio.run(prune_readings(days, rollup_days))
+    return { "message": "successfully pruned health readings!", **result }
+
+
+async def prune_readings(days: int, rollup_days: int):
+    engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as db:
+            return await HealthReadings.prune(db, days, rollup_days)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,119 @@
+"""
+Micro-benchmark of the `include_auth` dependency.
+-------------------------------------------------
+
+Authenticates the same user over and over and compares the former auth path
+(decode the token, query the user, then query the patient/doctor again) with
+the cached principal loader, once cold (single query), once from redis and once
+from the in-process cache.
+
+Run it from /backend against a seeded database and redis:
+
+    python -m benchmarks.auth_dependency --email walterwhite@gguide.com
+"""
+
+import jwt
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from starlette.requests import Request
+from fastapi.security import SecurityScopes, HTTPAuthorizationCredentials
+
+from app.db import AsyncSessionLocal
+from app.models import User, Patient, Doctor
+from app.core.config import settings
+from app.core.utils import scopes
+from app.core.cache import redis_cache
+from app.core.dependecies import include_auth
+from app.core.security import create_access_token, principal_key
+
+
+ROUNDS = 500
+
+
+# The auth path before the principal cache (two round trips per request)
+async def legacy_include_auth(token: str, db):
+    payload = jwt.decode(
+        token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm]
+    )
+    result = await db.execute(select(User).where(User.id == payload["sub"]))
+    user = result.scalar_one()
+
+    if user.role in ("user", "doctor"):
+        model = Patient if user.role == "user" else Doctor
+        result = await db.execute(select(model).where(model.id == user.id))
+        user = result.scalar_one()
+
+    return user
+
+
+async def cached_include_auth(token: str, db, role: str):
+    request = Request({"type": "http", "headers": []})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return await include_auth(
+        request, SecurityScopes(scopes[role][:1]), db, redis_cache, credentials
+    )
+
+
+# Median and p99 (microseconds) of an auth path
+async def measure(authenticate, reset=None) -> tuple[float, float]:
+    timings = []
+    for _ in range(ROUNDS):
+        if reset:
+            await reset()
+        start = time.perf_counter()
+        await authenticate()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.median(timings) * 1e6, timings[int(ROUNDS * 0.99)] * 1e6
+
+
+async def main(email: str):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.email == email))
+        if (user := result.scalar_one_or_none()) is None:
+            raise SystemExit(f"user not found: {email}")
+
+        role = user.role
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        token = create_access_token(
+            {"sub": f"{user.id}", "scopes": scopes[role]}, expires
+        )
+        key = principal_key(user.id)
+
+        async def drop_local():
+            redis_cache.local.discard([key])
+
+        async def drop_both():
+            await redis_cache.invalidate(keys=[key])
+
+        async def before():
+            await legacy_include_auth(token, db)
+
+        async def after():
+            await cached_include_auth(token, db, role)
+
+        print(f"{'auth path':>24} | {'p50 (us)':>10} | {'p99 (us)':>10}")
+        for name, authenticate, reset in [
+            ("before (2 queries)", before, None),
+            ("after, cold (1 query)", after, drop_both),
+            ("after, redis", after, drop_local),
+            ("after, in-process", after, None),
+        ]:
+            p50, p99 = await measure(authenticate, reset)
+            print(f"{name:>24} | {p50:>10.1f} | {p99:>10.1f}")
+
+    await redis_cache.invalidate(keys=[key])
+    await redis_cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--email", default="walterwhite@gguide.com")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.email))
@@ -0,0 +1,91 @@
+"""
+Tag based invalidation vs `KEYS` pattern scans.
+-----------------------------------------------
+
+Fills redis with a growing amount of unrelated keys and measures how long it
+takes to drop the cached appointment pages of a single patient, once through
+the tag sets of the cache facade and once through the old `KEYS` scan.
+
+Run it from /backend against an empty, disposable redis database:
+
+    python -m benchmarks.cache_invalidation --url redis://localhost:6379/15
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+
+from redis.asyncio import BlockingConnectionPool
+
+from app.core.cache import Cache
+
+
+PAGES = 20  # Cached pages of the patient being invalidated
+ROUNDS = 20  # Measurements per keyspace size
+BATCH = 10_000  # Keys written per pipeline while filling the keyspace
+SIZES = [10_000, 100_000, 1_000_000, 3_000_000]
+
+
+# Populate unrelated keys until the keyspace holds `total` filler keys
+async def fill(cache: Cache, start: int, total: int):
+    for offset in range(start, total, BATCH):
+        async with cache.client.pipeline(transaction=False) as pipe:
+            for i in range(offset, min(offset + BATCH, total)):
+                pipe.set(f"patients:appointments:filler{i}:page:1", "[]")
+            await pipe.execute()
+
+
+# Cache the pages of the targeted patient the same way the services do
+async def cache_pages(cache: Cache):
+    tags = ["patient:target"]
+    for page in range(1, PAGES + 1):
+        await cache.set(f"patients:appointments:target:page:{page}", [], tags=tags)
+    await cache.set("patients:appointments:target:total", 0, tags=tags)
+
+
+# Median time (ms) of an invalidation strategy
+async def measure(cache: Cache, invalidate) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        await cache_pages(cache)
+        start = time.perf_counter()
+        await invalidate()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+async def main(url: str, sizes: list[int]):
+    cache = Cache(BlockingConnectionPool.from_url(url))
+
+    if await cache.client.dbsize():
+        raise SystemExit(f"refusing to run against a non-empty database: {url}")
+
+    async def by_tags():
+        await cache.invalidate("patient:target")
+
+    async def by_scan():
+        keys = await cache.client.keys("patients:appointments:target:*")
+        await cache.delete(*keys)
+
+    print(f"{'keys':>12} | {'tags (ms)':>10} | {'KEYS scan (ms)':>14}")
+    filled = 0
+    try:
+        for size in sizes:
+            await fill(cache, filled, size)
+            filled = size
+            tags_ms = await measure(cache, by_tags)
+            scan_ms = await measure(cache, by_scan)
+            print(f"{size:>12,} | {tags_ms:>10.3f} | {scan_ms:>14.3f}")
+    finally:
+        await cache.client.flushdb()
+        await cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", default="redis://localhost:6379/15")
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.sizes))
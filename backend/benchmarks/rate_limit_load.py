@@ -0,0 +1,132 @@
+"""
+Load test of the distributed rate limiter across worker processes.
+------------------------------------------------------------------
+
+Spawns N worker processes, each with its own `RateLimiter` and redis connection
+pool (just like N uvicorn workers), that hammer the limiter with requests of the
+same client as fast as possible. The sum of allowed requests over every worker is
+compared with what the shared limits allow, and with what the former per-process
+middleware would have allowed (N times the limits).
+
+Run it from /backend against an empty, disposable redis database:
+
+    python -m benchmarks.rate_limit_load --url redis://localhost:6379/15 --workers 4
+"""
+
+import math
+import time
+import asyncio
+import argparse
+import statistics
+import multiprocessing
+
+from redis.asyncio import Redis
+
+from app.core.ratelimit import (
+    RateLimiter,
+    RATE_LIMIT_CONFIG,
+    BURST_LIMIT,
+    BURST_WINDOW,
+)
+
+
+CONCURRENCY = 20  # Concurrent requests per worker
+
+
+# Upper bound of requests the shared limits allow for a tier within `duration`
+def allowed_bound(tier: str, duration: float) -> int:
+    config = RATE_LIMIT_CONFIG[tier]
+    bursts = BURST_LIMIT * (math.ceil(duration / BURST_WINDOW) + 1)
+    rate = config["rate_limit"] * (math.ceil(duration / config["time_window"]) + 1)
+    return min(bursts, rate)
+
+
+# Hit the limiter until the deadline, reports (allowed, rejected, latencies)
+async def hammer(url: str, tier: str, identity: str, deadline: float):
+    client = Redis.from_url(url)
+    limiter = RateLimiter(client)
+    allowed, rejected, latencies = 0, 0, []
+
+    async def run():
+        nonlocal allowed, rejected
+        while time.time() < deadline:
+            start = time.perf_counter()
+            decision = await limiter.hit(identity, tier)
+            latencies.append(time.perf_counter() - start)
+            if decision.allowed:
+                allowed += 1
+            else:
+                rejected += 1
+
+    await asyncio.gather(*[run() for _ in range(CONCURRENCY)])
+    await client.aclose()
+    return allowed, rejected, latencies
+
+
+def worker(url, tier, identity, deadline, results):
+    results.put(asyncio.run(hammer(url, tier, identity, deadline)))
+
+
+async def check_empty(url: str):
+    client = Redis.from_url(url)
+    try:
+        if await client.dbsize():
+            raise SystemExit(f"refusing to run against a non-empty database: {url}")
+    finally:
+        await client.aclose()
+
+
+async def flush(url: str):
+    client = Redis.from_url(url)
+    await client.flushdb()
+    await client.aclose()
+
+
+def main(url: str, workers: int, tier: str, duration: float):
+    asyncio.run(check_empty(url))
+
+    results = multiprocessing.Queue()
+    deadline = time.time() + 1 + duration  # Give every worker time to start
+    processes = [
+        multiprocessing.Process(
+            target=worker, args=(url, tier, "loadtest", deadline, results)
+        )
+        for _ in range(workers)
+    ]
+
+    try:
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        asyncio.run(flush(url))
+
+    allowed = sum(report[0] for report in reports)
+    rejected = sum(report[1] for report in reports)
+    latencies = sorted(latency for report in reports for latency in report[2])
+    bound = allowed_bound(tier, duration)
+
+    print(f"workers: {workers}, tier: {tier}, duration: {duration}s")
+    print(f"requests: {allowed + rejected:,} ({rejected:,} rejected)")
+    print(f"allowed: {allowed:,} (shared limits allow at most {bound:,})")
+    print(f"per-process limits would have allowed up to {bound * workers:,}")
+    print(
+        f"latency p50: {statistics.median(latencies) * 1e6:.1f}us, "
+        f"p99: {latencies[int(len(latencies) * 0.99)] * 1e6:.1f}us"
+    )
+
+    if allowed > bound:
+        raise SystemExit("the limits did not hold across workers")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", default="redis://localhost:6379/15")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tier", choices=list(RATE_LIMIT_CONFIG), default="public")
+    parser.add_argument("--duration", type=float, default=12)
+    args = parser.parse_args()
+
+    main(args.url, args.workers, args.tier, args.duration)
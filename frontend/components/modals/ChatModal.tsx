@@ -21,6 +21,7 @@ export default function ChatModal({
   const {
     value,
     sendMessage,
+    resendMessage,
     messages,
     userInfo,
     topRef,
@@ -59,7 +60,7 @@ export default function ChatModal({
             <motion.div
               key={`msg-${msg.id}`}
               initial={{ opacity: 0, y: 10 }}
-              animate={{ opacity: 1, y: 0 }}
+              animate={{ opacity: msg.status === "pending" ? 0.6 : 1, y: 0 }}
               transition={{ duration: 0.3 }}
               className={`text-sm w-fit max-w-[60%] text-wrap px-3 py-2.5 rounded-t-xl first-of-type:mb-3 md:first-of-type:mb-5 ${
                 msg.type === "direct"
@@ -72,6 +73,14 @@ export default function ChatModal({
               }`}
             >
               {msg.content}
+              {msg.status === "failed" && (
+                <button
+                  className="block mt-1 text-xs font-semibold underline"
+                  onClick={() => resendMessage(msg.id)}
+                >
+                  Not sent, tap to retry
+                </button>
+              )}
             </motion.div>
           ))
         ) : (
@@ -8,10 +8,11 @@ import { useSocket } from "@/hooks/useSocket"
 import { useProfile } from "@/hooks/useProfile"
 import { useObserver } from "@/hooks/useObserver"
 import { useAppContext } from "@/hooks/useAppContext"
+import { usePendingMessages } from "@/hooks/usePendingMessages"
 
 import { firey } from "@/utils"
 import { chatService } from "@/lib/services/chat"
-import { TMessage, TSocketMessage } from "@/types"
+import { TMessage, TSocketAck, TSocketMessage } from "@/types"
 
 import { CityScene, Icon, Modal } from "@/components"
 
@@ -28,7 +29,7 @@ export default function DoctorChatModal({
 }: Props) {
   const { data: userInfo } = useProfile()
 
-  const [page, setPage] = useState<number>(1)
+  const [cursor, setCursor] = useState<string | undefined>(undefined)
   const [limit] = useState<number>(20)
 
   const [value, setValue] = useState<string>("")
@@ -38,13 +39,13 @@ export default function DoctorChatModal({
   const chatContainer = useRef<HTMLDivElement | null>(null)
 
   const params = firey.createSearchParams({
-    page,
     limit,
+    ...(cursor && { cursor }),
   })
 
   // Retrieve all the conversations of the User
   const { data: retrievedChats, isLoading } = useApi(
-    [`user:chats:${userInfo?.id}:page:${page}`],
+    [`user:chats:${userInfo?.id}:cursor:${cursor}`],
     (_, token) => {
       if (!userInfo) throw new Error(`Failed to retrieve user chats.`)
       return chatService.getUserDirectChats(
@@ -59,7 +60,7 @@ export default function DoctorChatModal({
       staleTime: 0,
       select: (data) =>
         firey.convertKeysToCamelCase(data) as {
-          total: number
+          nextCursor: string | null
           messages: TMessage[]
         },
       onSuccess: (data) => {
@@ -86,7 +87,13 @@ export default function DoctorChatModal({
 
   // Connect the Chatting Socket Connection through the hook
   const { values, socketRef, isConnected, isReconnecting } =
-    useSocket<TSocketMessage>(socketURL, 3000)
+    useSocket<TSocketMessage | TSocketAck>(socketURL, 3000)
+
+  // Sent messages stay pending until the server acknowledges them
+  const { track, acknowledge, resend } = usePendingMessages(
+    socketRef,
+    setMessages
+  )
 
   // Handle sending new messages
   function sendMessage() {
@@ -100,14 +107,28 @@ export default function DoctorChatModal({
       return
 
     // Only send the message if the conditions on the top gets fullfilled
-    socketRef.current.send(
-      JSON.stringify({
+    // (w its own id, so a resent message is stored only once), shown as pending
+    // until it is stored
+    const id = track({
+      id: crypto.randomUUID(),
+      type: "direct",
+      content: value,
+      sender_id: userInfo.id,
+      receiver_id: receiverId,
+    })
+    setMessages((prev) => [
+      {
+        id,
         type: "direct",
         content: value,
-        sender_id: userInfo.id,
-        receiver_id: receiverId,
-      })
-    )
+        isSeen: false,
+        senderId: userInfo.id,
+        receiverId,
+        createdAt: new Date().toISOString(),
+        status: "pending",
+      },
+      ...prev,
+    ])
 
     setValue("") // Reset the prompt value
   }
@@ -123,25 +144,33 @@ export default function DoctorChatModal({
   // Add the incoming messages thats coming through the WebSocket connection
   useEffect(() => {
     if (!values) return
+    if (values.type === "ack") {
+      acknowledge(values as TSocketAck)
+      return
+    }
+
+    const message = values as TSocketMessage
+    const data: TMessage = {
+      id: message.id,
+      type: message.type,
+      content: message.content,
+      isSeen: message.is_seen,
+      senderId: message.sender_id,
+      receiverId: message.receiver_id,
+      createdAt: new Date(message.created_at).toISOString(),
+    }
 
     setMessages((prev) => {
-      const exists = prev.some((msg) => msg.id === values.id) // Prevent data duplication
+      const exists = prev.some((msg) => msg.id === message.id) // Prevent data duplication
 
+      // A sent message is already shown, keep its status until its ack
       return exists
-        ? prev
-        : [
-            {
-              id: values.id,
-              type: values.type,
-              content: values.content,
-              isSeen: values.is_seen,
-              senderId: values.sender_id,
-              receiverId: values.receiver_id,
-              createdAt: new Date(values.created_at),
-            },
-            ...prev,
-          ]
+        ? prev.map((msg) =>
+            msg.id === message.id ? { ...data, status: msg.status } : msg
+          )
+        : [data, ...prev]
     })
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [values])
 
   // Handle Infinite Scrolling through Observer
@@ -151,15 +180,14 @@ export default function DoctorChatModal({
     onIntersect: () => {
       if (!retrievedChats || !allowFetching || isLoading) return
 
-      const totalPages = Math.ceil(retrievedChats.total / limit)
-      if (page < totalPages) setPage((prev) => prev + 1)
+      if (retrievedChats.nextCursor) setCursor(retrievedChats.nextCursor)
     },
   })
 
   // Close the modal and Reset everything
   function handleCloseModal() {
     closeHandler()
-    setPage(1)
+    setCursor(undefined)
     setMessages([])
     setAllowFetching(false)
   }
@@ -208,7 +236,10 @@ export default function DoctorChatModal({
                 <motion.div
                   key={`msg-${idx}-${msg.id}`}
                   initial={{ opacity: 0, y: 10 }}
-                  animate={{ opacity: 1, y: 0 }}
+                  animate={{
+                    opacity: msg.status === "pending" ? 0.6 : 1,
+                    y: 0,
+                  }}
                   transition={{ duration: 0.3 }}
                   className={`text-sm w-fit max-w-[60%] text-wrap px-3 py-2.5 rounded-t-xl first-of-type:mb-3 md:first-of-type:mb-5 ${
                     msg.type === "direct"
@@ -221,6 +252,14 @@ export default function DoctorChatModal({
                   }`}
                 >
                   {msg.content}
+                  {msg.status === "failed" && (
+                    <button
+                      className="block mt-1 text-xs font-semibold underline"
+                      onClick={() => resend(msg.id)}
+                    >
+                      Not sent, tap to retry
+                    </button>
+                  )}
                 </motion.div>
               ))
             ) : (
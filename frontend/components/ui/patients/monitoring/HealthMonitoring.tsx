@@ -1,6 +1,6 @@
 "use client"
 
-import { TPatientHealth } from "@/types"
+import { TPatientHealth, TReadingsDelta } from "@/types"
 import React, { useState } from "react"
 import { useApi } from "@/hooks/useApi"
 import { useSocket } from "@/hooks/useSocket"
@@ -25,13 +25,6 @@ export default function HealthMonitoring() {
     ? `ws://localhost:8000/api/v1/ws/monitoring/${userInfo.id}`
     : null
 
-  // connect the socket through the hook
-  const {
-    values: healthMonitoringsWS,
-    isConnected,
-    isReconnecting,
-  } = useSocket<TPatientHealth>(socketURL)
-
   // retrieve patient health record informations
   const { data: healthRecords } = useApi(
     [`patients:monitorings:${userInfo?.id}`],
@@ -41,6 +34,20 @@ export default function HealthMonitoring() {
     }
   )
 
+  // connect the socket through the hook, new readings are appended to the record
+  const {
+    values: healthMonitoringsWS,
+    isConnected,
+    isReconnecting,
+  } = useSocket<TPatientHealth>(socketURL, 5000, (current, message) =>
+    message.type === "readings"
+      ? mergeReadings(
+          current || (Array.isArray(healthRecords) ? null : healthRecords),
+          message
+        )
+      : message
+  )
+
   // select which value to display based on the sockets connectivity
   const healthRecordValues = healthMonitoringsWS
     ? healthMonitoringsWS
@@ -111,3 +118,30 @@ export default function HealthMonitoring() {
     </React.Fragment>
   )
 }
+
+// append the new readings to the records of the health record
+function mergeReadings(
+  record: TPatientHealth | null | undefined,
+  delta: TReadingsDelta
+): TPatientHealth | null {
+  if (!record) return null
+
+  const pressure = [...(record.blood_pressure_records || [])]
+  delta.blood_pressure_records.forEach(({ type, data }) => {
+    const idx = pressure.findIndex((item) => item.type === type)
+    if (idx === -1) {
+      pressure.push({ type, data })
+    } else {
+      pressure[idx] = { type, data: [...pressure[idx].data, ...data] }
+    }
+  })
+
+  return {
+    ...record,
+    blood_glucose_records: [
+      ...(record.blood_glucose_records || []),
+      ...delta.blood_glucose_records,
+    ],
+    blood_pressure_records: pressure,
+  }
+}
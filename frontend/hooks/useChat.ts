@@ -1,4 +1,4 @@
-import { TMessage, TSocketMessage } from "@/types"
+import { TMessage, TSocketAck, TSocketMessage } from "@/types"
 import { useEffect, useRef, useState } from "react"
 import { useToken } from "./useToken"
 import { useUser } from "./useUser"
@@ -7,6 +7,7 @@ import { chatService } from "@/lib/services/chat"
 import { firey } from "@/utils"
 import { useObserver } from "./useObserver"
 import { useSocket } from "./useSocket"
+import { usePendingMessages } from "./usePendingMessages"
 
 export function useChat(role: string, receiverId?: string) {
   const [limit] = useState<number>(20)
@@ -22,10 +23,10 @@ export function useChat(role: string, receiverId?: string) {
   // Retrieve all the conversations of the User
   const { fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: [`user:chats:${receiverId ? `direct` : `help`}`],
-    queryFn: async ({ pageParam = 1 }) => {
+    queryFn: async ({ pageParam }) => {
       const params = new URLSearchParams({
-        page: String(pageParam),
         limit: String(limit),
+        ...(pageParam && { cursor: pageParam }),
       }).toString()
 
       if (!userInfo) throw new Error(`Failed to retrieve chats`)
@@ -40,10 +41,8 @@ export function useChat(role: string, receiverId?: string) {
         return chatService.getUserHelpChats(token, userInfo.id, params)
       }
     },
-    getNextPageParam(lastPage, allPages) {
-      const currentPage = allPages.length
-      const totalPages = Math.ceil(lastPage.total / limit)
-      return currentPage < totalPages ? currentPage + 1 : undefined
+    getNextPageParam(lastPage) {
+      return lastPage.next_cursor ?? undefined
     },
     onSuccess: (data) => {
       const messages = data?.pages.flatMap((page) => page.messages) || []
@@ -72,7 +71,13 @@ export function useChat(role: string, receiverId?: string) {
 
   // Connect the Chatting Socket Connection through the hook
   const { values, socketRef, isConnected, isReconnecting } =
-    useSocket<TSocketMessage>(socketURL, 3000)
+    useSocket<TSocketMessage | TSocketAck>(socketURL, 3000)
+
+  // Sent messages stay pending until the server acknowledges them
+  const { track, acknowledge, resend } = usePendingMessages(
+    socketRef,
+    setMessages
+  )
 
   // Handle sending new messages
   function sendMessage() {
@@ -86,15 +91,30 @@ export function useChat(role: string, receiverId?: string) {
       return
 
     // Only send the message if the conditions on the top gets fullfilled
+    // (w its own id, so a resent message is stored only once)
     const data = {
+      id: crypto.randomUUID(),
       type: receiverId ? "direct" : "help",
       content: value,
       sender_id: userInfo.id,
       ...(receiverId && { receiver_id: receiverId }),
     }
 
-    // Send the message through WebSocket
-    socketRef.current.send(JSON.stringify(data))
+    // Send the message through WebSocket, shown as pending until it is stored
+    const id = track(data)
+    setMessages((prev) => [
+      {
+        id,
+        senderId: userInfo.id,
+        type: data.type,
+        content: value,
+        createdAt: new Date().toISOString(),
+        isSeen: false,
+        status: "pending",
+        ...(receiverId && { receiverId }),
+      },
+      ...prev,
+    ])
 
     setValue("") // Reset the prompt value
   }
@@ -110,27 +130,39 @@ export function useChat(role: string, receiverId?: string) {
   // Store the realtime message from WebSocket
   useEffect(() => {
     if (!values) return
+    if (values.type === "ack") {
+      acknowledge(values as TSocketAck)
+      return
+    }
 
+    const message = values as TSocketMessage
     const data: TMessage = {
-      id: values.id,
-      senderId: values.sender_id,
-      type: values.type,
-      content: values.content,
-      createdAt: values.created_at,
-      isSeen: values.is_seen,
+      id: message.id,
+      senderId: message.sender_id,
+      type: message.type,
+      content: message.content,
+      createdAt: message.created_at,
+      isSeen: message.is_seen,
       ...(receiverId && { receiverId }),
     }
 
+    // A sent message is already shown, keep its status until its ack
     setMessages((prev) => {
-      const exists = prev.find((msg) => msg.id === values.id)
+      const exists = prev.find((msg) => msg.id === message.id)
 
-      return exists ? prev : [data, ...prev]
+      return exists
+        ? prev.map((msg) =>
+            msg.id === message.id ? { ...data, status: msg.status } : msg
+          )
+        : [data, ...prev]
     })
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [values, receiverId])
 
   return {
     value,
     sendMessage,
+    resendMessage: resend,
     messages,
     userInfo,
     topRef,
@@ -0,0 +1,69 @@
+import { Dispatch, MutableRefObject, SetStateAction, useRef } from "react"
+import { TMessage, TSocketAck } from "@/types"
+import { firey } from "@/utils"
+
+const MAX_RESENDS = 3 // automatic resends of a message that failed to be stored
+
+type TPending = {
+  data: { id: string; [key: string]: unknown }
+  resends: number
+}
+
+// Track the sent messages as pending until the server acknowledges them,
+// resending the failed ones w the same id (stored only once)
+export function usePendingMessages(
+  socketRef: MutableRefObject<WebSocket | null>,
+  setMessages: Dispatch<SetStateAction<TMessage[]>>
+) {
+  // messages waiting for their ack (or a manual retry), by the base64 id the
+  // server uses for them
+  const pendingRef = useRef<Record<string, TPending>>({})
+
+  function setStatus(id: string, status: TMessage["status"]) {
+    setMessages((prev) =>
+      prev.map((msg) => (msg.id === id ? { ...msg, status } : msg))
+    )
+  }
+
+  function send(data: TPending["data"]) {
+    if (socketRef.current?.readyState !== WebSocket.OPEN) return false
+    socketRef.current.send(JSON.stringify(data))
+    return true
+  }
+
+  // send a new message, returns the id it is shown with
+  function track(data: TPending["data"]) {
+    const id = firey.uuidToBase64(data.id)
+    pendingRef.current[id] = { data, resends: 0 }
+    send(data)
+    return id
+  }
+
+  // update the status of a sent message by its acknowledgement
+  function acknowledge(ack: TSocketAck) {
+    const pending = pendingRef.current[ack.id]
+    if (!pending) return
+
+    if (ack.status === "failed") {
+      if (pending.resends < MAX_RESENDS && send(pending.data)) {
+        pending.resends += 1
+        return
+      }
+      setStatus(ack.id, "failed") // kept for a manual retry
+      return
+    }
+
+    delete pendingRef.current[ack.id]
+    setStatus(ack.id, ack.status === "rejected" ? "failed" : undefined)
+  }
+
+  // retry a failed message manually
+  function resend(id: string) {
+    const pending = pendingRef.current[id]
+    if (!pending || !send(pending.data)) return
+    pending.resends = 0
+    setStatus(id, "pending")
+  }
+
+  return { track, acknowledge, resend }
+}
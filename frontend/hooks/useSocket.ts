@@ -1,12 +1,20 @@
 import { useCallback, useEffect, useRef, useState } from "react"
 
-export function useSocket<T>(url: string | null, retryInterval: number = 5000) {
+export function useSocket<T>(
+  url: string | null,
+  retryInterval: number = 5000,
+  reducer?: (current: T | null, message: any) => T | null
+) {
   const [values, setValues] = useState<T | null>(null)
   const [isConnected, setIsConnected] = useState<boolean>(false)
   const [isReconnecting, setIsReconnecting] = useState<boolean>(false)
   const socketRef = useRef<WebSocket | null>(null)
   const retryTimeout = useRef<NodeJS.Timeout | null>(null)
 
+  // keep the latest reducer w/o reconnecting the socket when it changes
+  const reducerRef = useRef(reducer)
+  reducerRef.current = reducer
+
   const connect = useCallback(() => {
     if (!url) return
 
@@ -32,7 +40,11 @@ export function useSocket<T>(url: string | null, retryInterval: number = 5000) {
     }
 
     socketRef.current.onmessage = (event: MessageEvent) => {
-      setValues(JSON.parse(event.data))
+      const message = JSON.parse(event.data)
+      // merge the message into the current values when a reducer is provided
+      setValues((current) =>
+        reducerRef.current ? reducerRef.current(current, message) : message
+      )
     }
 
     socketRef.current.onerror = () => {
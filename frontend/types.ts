@@ -154,6 +154,13 @@ export type TPatientHealth = {
   blood_glucose_records: MonitoringDetail[] | null
 }
 
+// new readings pushed to the monitoring room (only the stored ones)
+export type TReadingsDelta = {
+  type: "readings"
+  blood_pressure_records: BloodPressureDetail[]
+  blood_glucose_records: MonitoringDetail[]
+}
+
 export type TDoctorFilteringOpts = {
   locations: string[]
   hospitals: string[]
@@ -356,6 +363,14 @@ export type TMessage = {
   isSeen: boolean
   senderId: string
   receiverId?: string | null
+  status?: "pending" | "failed" // sent messages until they are stored
+}
+
+// acknowledgement of a sent message, once stored (or not)
+export type TSocketAck = {
+  type: "ack"
+  id: string
+  status: "stored" | "duplicate" | "failed" | "rejected"
 }
 
 export type TRouteProps = {